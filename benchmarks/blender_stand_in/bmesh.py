@@ -0,0 +1,63 @@
+# Minimal pure-Python stand-in for Blender's bmesh module: enough to triangulate n-gons of a stand-in bpy Mesh.
+import bpy
+
+
+class BMFace:
+    def __init__(self, polygon, loops):
+        self.polygon = polygon
+        self.loops = loops
+
+    @property
+    def verts(self) -> list:
+        return [loop.vertex_index for loop in self.loops]
+
+
+class BMesh:
+    def __init__(self):
+        self.faces = []
+
+    def from_mesh(self, mesh) -> None:
+        self.faces = [BMFace(polygon, [mesh.loops[i] for i in polygon.loop_indices]) for polygon in mesh.polygons]
+        self.__uv_layers = [(layer.name, layer.data) for layer in mesh.uv_layers]
+        self.__color_layers = [(layer.name, layer.data) for layer in mesh.vertex_colors]
+
+    def to_mesh(self, mesh) -> None:
+        mesh.loops = bpy.PropCollection()
+        mesh.polygons = bpy.PropCollection()
+        uv_layers = [(name, []) for name, _ in self.__uv_layers]
+        color_layers = [(name, []) for name, _ in self.__color_layers]
+        for face in self.faces:
+            loop_start = len(mesh.loops)
+            for loop in face.loops:
+                mesh.loops.append(bpy.MeshLoop(len(mesh.loops), loop.vertex_index, loop.normal.copy()))
+                for (_, source_data), (_, target_data) in zip(self.__uv_layers, uv_layers):
+                    target_data.append(bpy.MeshUVLoop(source_data[loop.index].uv.copy()))
+                for (_, source_data), (_, target_data) in zip(self.__color_layers, color_layers):
+                    target_data.append(bpy.MeshLoopColor(source_data[loop.index].color))
+            mesh.polygons.append(bpy.MeshPolygon(len(mesh.polygons), tuple(face.verts), loop_start,
+                                                 face.polygon.material_index))
+        mesh.uv_layers = bpy.PropCollection(bpy.MeshLayer(name, data) for name, data in uv_layers)
+        mesh.vertex_colors = bpy.PropCollection(bpy.MeshLayer(name, data) for name, data in color_layers)
+
+    def free(self) -> None:
+        self.faces = []
+
+
+class ops:
+
+    @staticmethod
+    def triangulate(bm, faces=(), quad_method="BEAUTY", ngon_method="BEAUTY") -> dict:
+        faces_to_split = set(map(id, faces))
+        triangulated_faces = []
+        for face in bm.faces:
+            if id(face) not in faces_to_split:
+                triangulated_faces.append(face)
+                continue
+            for i in range(1, len(face.loops) - 1):
+                triangulated_faces.append(BMFace(face.polygon, [face.loops[0], face.loops[i], face.loops[i + 1]]))
+        bm.faces = triangulated_faces
+        return {"faces": triangulated_faces}
+
+
+def new() -> BMesh:
+    return BMesh()
@@ -0,0 +1,403 @@
+# Minimal pure-Python stand-in for the parts of Blender's bpy module that the exporter touches, so the exporter
+# can be benchmarked without a Blender install. Objects are evaluated at context.scene.frame_current plus
+# frame_subframe: animated objects get their transform from Object.animation(frame) and their mesh from
+# Object.deformation(co, frame).
+import array
+import math
+from mathutils import Matrix, Quaternion, Vector
+
+
+class _App:
+    version = (4, 1, 0)
+
+
+app = _App()
+
+
+class PropCollection(list):
+
+    def foreach_get(self, attribute, sequence) -> None:
+        values = []
+        for item in self:
+            value = getattr(item, attribute)
+            if isinstance(value, (int, float)):
+                values.append(value)
+            else:
+                values.extend(value)
+        if len(values) != len(sequence):
+            raise RuntimeError("foreach_get: sequence size does not match (" + str(len(sequence)) + " != "
+                               + str(len(values)) + ")")
+        if isinstance(sequence, array.array):
+            sequence[:] = array.array(sequence.typecode, values)
+        else:
+            sequence[:] = values
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            item = self.get(key)
+            if item is None:
+                raise KeyError("bpy_prop_collection[key]: key \"" + key + "\" not found")
+            return item
+        return list.__getitem__(self, key)
+
+    def get(self, name, default=None):
+        return next((item for item in self if getattr(item, "name", None) == name), default)
+
+
+class MeshVertex:
+    __slots__ = ["index", "co", "normal"]
+
+    def __init__(self, index, co, normal):
+        self.index = index
+        self.co = co
+        self.normal = normal
+
+
+class MeshLoop:
+    __slots__ = ["index", "vertex_index", "normal", "tangent", "bitangent_sign"]
+
+    def __init__(self, index, vertex_index, normal):
+        self.index = index
+        self.vertex_index = vertex_index
+        self.normal = normal
+        self.tangent = Vector((0.0, 0.0, 0.0))
+        self.bitangent_sign = 1.0
+
+
+class MeshPolygon:
+    __slots__ = ["index", "vertices", "loop_start", "loop_total", "material_index"]
+
+    def __init__(self, index, vertices, loop_start, material_index):
+        self.index = index
+        self.vertices = vertices
+        self.loop_start = loop_start
+        self.loop_total = len(vertices)
+        self.material_index = material_index
+
+    @property
+    def loop_indices(self) -> range:
+        return range(self.loop_start, self.loop_start + self.loop_total)
+
+
+class MeshLoopTriangle:
+    __slots__ = ["index", "vertices", "loops", "material_index", "polygon_index"]
+
+    def __init__(self, index, vertices, loops, material_index, polygon_index):
+        self.index = index
+        self.vertices = vertices
+        self.loops = loops
+        self.material_index = material_index
+        self.polygon_index = polygon_index
+
+
+class MeshUVLoop:
+    __slots__ = ["uv"]
+
+    def __init__(self, uv):
+        self.uv = uv
+
+
+class MeshLoopColor:
+    __slots__ = ["color"]
+
+    def __init__(self, color):
+        self.color = color
+
+
+class MeshLayer:
+    def __init__(self, name, data):
+        self.name = name
+        self.data = PropCollection(data)
+
+
+class Mesh:
+    def __init__(self, name=""):
+        self.name = name
+        self.vertices = PropCollection()
+        self.loops = PropCollection()
+        self.polygons = PropCollection()
+        self.loop_triangles = PropCollection()
+        self.uv_layers = PropCollection()
+        self.vertex_colors = PropCollection()
+
+    @classmethod
+    def from_geometry(cls, name, positions, polygons, loop_normals, material_indices, uv_layers, color_layers):
+        mesh = cls(name)
+        mesh.vertices.extend(MeshVertex(i, Vector(co), Vector((0.0, 0.0, 1.0))) for i, co in enumerate(positions))
+        loop_index = 0
+        for polygon_index, polygon in enumerate(polygons):
+            mesh.polygons.append(MeshPolygon(polygon_index, tuple(polygon), loop_index,
+                                             material_indices[polygon_index]))
+            for vertex_index in polygon:
+                mesh.loops.append(MeshLoop(loop_index, vertex_index, Vector(loop_normals[loop_index])))
+                loop_index += 1
+        for layer_name, uvs in uv_layers:
+            mesh.uv_layers.append(MeshLayer(layer_name, [MeshUVLoop(Vector(uv)) for uv in uvs]))
+        for layer_name, colors in color_layers:
+            mesh.vertex_colors.append(MeshLayer(layer_name, [MeshLoopColor(tuple(color)) for color in colors]))
+        return mesh
+
+    def copy(self) -> "Mesh":
+        mesh = Mesh(self.name)
+        mesh.vertices.extend(MeshVertex(v.index, v.co.copy(), v.normal.copy()) for v in self.vertices)
+        mesh.loops.extend(MeshLoop(l.index, l.vertex_index, l.normal.copy()) for l in self.loops)
+        mesh.polygons.extend(MeshPolygon(p.index, p.vertices, p.loop_start, p.material_index) for p in self.polygons)
+        for layer in self.uv_layers:
+            mesh.uv_layers.append(MeshLayer(layer.name, [MeshUVLoop(d.uv.copy()) for d in layer.data]))
+        for layer in self.vertex_colors:
+            mesh.vertex_colors.append(MeshLayer(layer.name, [MeshLoopColor(d.color) for d in layer.data]))
+        return mesh
+
+    def transform(self, matrix) -> None:
+        rotation = matrix.to_quaternion().to_matrix()
+        for vertex in self.vertices:
+            vertex.co = matrix @ vertex.co
+        for loop in self.loops:
+            loop.normal = rotation @ loop.normal
+
+    def calc_loop_triangles(self) -> None:
+        self.loop_triangles = PropCollection()
+        for polygon in self.polygons:
+            loops = list(polygon.loop_indices)
+            for i in range(1, polygon.loop_total - 1):
+                triangle_loops = (loops[0], loops[i], loops[i + 1])
+                triangle_vertices = tuple(self.loops[loop].vertex_index for loop in triangle_loops)
+                self.loop_triangles.append(MeshLoopTriangle(len(self.loop_triangles), triangle_vertices,
+                                                            triangle_loops, polygon.material_index, polygon.index))
+
+    def calc_tangents(self, uvmap="") -> None:
+        uvs = (self.uv_layers.get(uvmap) or self.uv_layers[0]).data
+        for triangle in self.loop_triangles:
+            p0, p1, p2 = (self.vertices[v].co for v in triangle.vertices)
+            uv0, uv1, uv2 = (uvs[loop].uv for loop in triangle.loops)
+            edge1 = p1 - p0
+            edge2 = p2 - p0
+            du1, dv1 = uv1.x - uv0.x, uv1.y - uv0.y
+            du2, dv2 = uv2.x - uv0.x, uv2.y - uv0.y
+            determinant = du1 * dv2 - du2 * dv1
+            factor = 1.0 / determinant if abs(determinant) > 1e-12 else 1.0
+            tangent = (edge1 * dv2 - edge2 * dv1) * factor
+            bitangent = (edge2 * du1 - edge1 * du2) * factor
+            for loop_index in triangle.loops:
+                loop = self.loops[loop_index]
+                normal = loop.normal
+                orthogonal = (tangent - normal * normal.dot(tangent)).normalized()
+                loop.tangent = orthogonal
+                loop.bitangent_sign = -1.0 if normal.cross(orthogonal).dot(bitangent) < 0 else 1.0
+
+    def free_normals_split(self) -> None:
+        pass
+
+    def free_tangents(self) -> None:
+        for loop in self.loops:
+            loop.tangent = Vector((0.0, 0.0, 0.0))
+
+    def clear_geometry(self) -> None:
+        self.__init__(self.name)
+
+    def update(self) -> None:
+        pass
+
+
+class Material:
+    def __init__(self, name):
+        self.name = name
+
+
+class MaterialSlot:
+    def __init__(self, material):
+        self.material = material
+
+
+class FCurve:
+    def __init__(self, data_path, array_index, function):
+        self.data_path = data_path
+        self.array_index = array_index
+        self.function = function
+
+    def evaluate(self, frame) -> float:
+        return self.function(frame)
+
+
+class Action:
+    def __init__(self, name):
+        self.name = name
+        self.fcurves = PropCollection()
+        self.__frame_range = Vector((1.0, 1.0))
+
+    @property
+    def frame_range(self) -> Vector:
+        return self.__frame_range
+
+    @frame_range.setter
+    def frame_range(self, value) -> None:
+        self.__frame_range = Vector(value)
+
+
+class AnimationData:
+    def __init__(self, action=None):
+        self.action = action
+        self.drivers = PropCollection()
+        self.nla_tracks = PropCollection()
+
+
+class Object:
+    def __init__(self, name, data=None, object_type=None):
+        self.name = name
+        self.data = data
+        self.type = object_type or ("MESH" if data is not None else "EMPTY")
+        self.parent = None
+        self.parent_type = "OBJECT"
+        self.children = []
+        self.material_slots = []
+        self.modifiers = PropCollection()
+        self.animation_data = None
+        self.location = Vector((0.0, 0.0, 0.0))
+        self.rotation_quaternion = Quaternion()
+        self.scale = Vector((1.0, 1.0, 1.0))
+        self.animation = None
+        self.deformation = None
+
+    def set_parent(self, parent) -> None:
+        self.parent = parent
+        parent.children.append(self)
+
+    def is_animated(self) -> bool:
+        return self.animation_data is not None and self.animation_data.action is not None
+
+    @property
+    def matrix_basis(self) -> Matrix:
+        location, rotation, scale = self.location, self.rotation_quaternion, self.scale
+        if self.animation is not None and self.is_animated():
+            location, rotation, scale = self.animation(context.scene.frame_current + context.scene.frame_subframe)
+        return Matrix.LocRotScale(location, rotation, scale)
+
+    @property
+    def matrix_local(self) -> Matrix:
+        return self.matrix_basis
+
+    @property
+    def matrix_world(self) -> Matrix:
+        if self.parent is None:
+            return self.matrix_basis
+        return self.parent.matrix_world @ self.matrix_basis
+
+    def evaluated_get(self, depsgraph) -> "Object":
+        return self
+
+
+class Collection:
+    class _RNA:
+        identifier = "Collection"
+
+    bl_rna = _RNA()
+
+    def __init__(self, name):
+        self.name = name
+        self.objects = []
+
+    @property
+    def all_objects(self) -> list:
+        return list(self.objects)
+
+
+class _Render:
+    def __init__(self):
+        self.fps = 24
+
+
+class Scene:
+    def __init__(self, name="Scene"):
+        self.name = name
+        self.frame_start = 1
+        self.frame_end = 250
+        self.frame_current = 1
+        self.frame_subframe = 0.0
+        self.objects = PropCollection()
+        self.render = _Render()
+
+    def frame_set(self, frame, subframe=0.0) -> None:
+        self.frame_current = frame
+        self.frame_subframe = subframe
+
+
+class Depsgraph:
+    def __init__(self, scene):
+        self.scene = scene
+
+
+class Context:
+    def __init__(self):
+        self.scene = Scene()
+        self.selectable_objects = []
+        self.selected_ids = []
+
+    def evaluated_depsgraph_get(self) -> Depsgraph:
+        return Depsgraph(self.scene)
+
+
+class _Meshes(PropCollection):
+
+    def new_from_object(self, obj) -> Mesh:
+        mesh = obj.data.copy()
+        if obj.deformation is not None and obj.is_animated():
+            frame = context.scene.frame_current + context.scene.frame_subframe
+            for vertex in mesh.vertices:
+                vertex.co = obj.deformation(vertex.co, frame)
+        self.append(mesh)
+        return mesh
+
+    def remove(self, mesh) -> None:
+        list.remove(self, mesh)
+
+
+class _Actions(PropCollection):
+
+    def new(self, name) -> Action:
+        action = Action(name)
+        self.append(action)
+        return action
+
+    def remove(self, action) -> None:
+        list.remove(self, action)
+
+
+class _Data:
+    def __init__(self):
+        self.meshes = _Meshes()
+        self.actions = _Actions()
+        self.objects = PropCollection()
+        self.collections = PropCollection()
+        self.materials = PropCollection()
+        self.shape_keys = PropCollection()
+        self.armatures = PropCollection()
+        self.curves = PropCollection()
+        self.lattices = PropCollection()
+
+
+class types:
+    Mesh = Mesh
+    Object = Object
+    Collection = Collection
+    Material = Material
+    MaterialSlot = MaterialSlot
+    Action = Action
+    FCurve = FCurve
+    AnimationData = AnimationData
+    Scene = Scene
+
+
+data = _Data()
+context = Context()
+
+
+def reset() -> None:
+    global data, context
+    data = _Data()
+    context = Context()
+
+
+def quaternion_from_axis_angle(axis, angle) -> Quaternion:
+    half_angle = angle * 0.5
+    sine = math.sin(half_angle)
+    return Quaternion((math.cos(half_angle), axis[0] * sine, axis[1] * sine, axis[2] * sine))
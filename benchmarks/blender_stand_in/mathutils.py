@@ -0,0 +1,234 @@
+# Minimal pure-Python stand-in for Blender's mathutils module, covering what the exporter uses.
+import math
+
+
+class Vector:
+    __slots__ = ["_values"]
+
+    def __init__(self, values=(0.0, 0.0, 0.0)):
+        self._values = list(values)
+
+    @staticmethod
+    def _from_list(values) -> "Vector":
+        vector = Vector.__new__(Vector)
+        vector._values = values
+        return vector
+
+    x = property(lambda self: self._values[0], lambda self, value: self.__set(0, value))
+    y = property(lambda self: self._values[1], lambda self, value: self.__set(1, value))
+    z = property(lambda self: self._values[2], lambda self, value: self.__set(2, value))
+    w = property(lambda self: self._values[3], lambda self, value: self.__set(3, value))
+
+    def __set(self, index, value):
+        self._values[index] = float(value)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __getitem__(self, index):
+        return self._values[index]
+
+    def __setitem__(self, index, value):
+        self._values[index] = float(value)
+
+    def __eq__(self, other):
+        return isinstance(other, Vector) and self._values == other._values
+
+    def __hash__(self):
+        return hash(tuple(self._values))
+
+    def __add__(self, other):
+        return Vector._from_list([a + b for a, b in zip(self._values, other)])
+
+    def __sub__(self, other):
+        return Vector._from_list([a - b for a, b in zip(self._values, other)])
+
+    def __mul__(self, scalar):
+        return Vector._from_list([a * scalar for a in self._values])
+
+    def __neg__(self):
+        return Vector._from_list([-a for a in self._values])
+
+    def __repr__(self):
+        return "Vector(" + repr(tuple(self._values)) + ")"
+
+    @property
+    def length(self) -> float:
+        return math.sqrt(sum(a * a for a in self._values))
+
+    def copy(self) -> "Vector":
+        return Vector._from_list(self._values[:])
+
+    def dot(self, other) -> float:
+        return sum([a * b for a, b in zip(self._values, other)])
+
+    def cross(self, other) -> "Vector":
+        ax, ay, az = self._values[:3]
+        bx, by, bz = other[0], other[1], other[2]
+        return Vector._from_list([ay * bz - az * by, az * bx - ax * bz, ax * by - ay * bx])
+
+    def normalized(self) -> "Vector":
+        length = self.length
+        return self.copy() if length == 0 else self * (1.0 / length)
+
+
+class Quaternion:
+    __slots__ = ["w", "x", "y", "z"]
+
+    def __init__(self, values=(1.0, 0.0, 0.0, 0.0)):
+        self.w, self.x, self.y, self.z = (float(value) for value in values)
+
+    def __iter__(self):
+        return iter((self.w, self.x, self.y, self.z))
+
+    def __repr__(self):
+        return "Quaternion(" + repr(tuple(self)) + ")"
+
+    def __matmul__(self, other):
+        if isinstance(other, Quaternion):
+            return Quaternion((
+                self.w * other.w - self.x * other.x - self.y * other.y - self.z * other.z,
+                self.w * other.x + self.x * other.w + self.y * other.z - self.z * other.y,
+                self.w * other.y - self.x * other.z + self.y * other.w + self.z * other.x,
+                self.w * other.z + self.x * other.y - self.y * other.x + self.z * other.w))
+        # v' = v + 2w(q x v) + 2q x (q x v)
+        w, x, y, z = self.w, self.x, self.y, self.z
+        vx, vy, vz = other[0], other[1], other[2]
+        tx = 2 * (y * vz - z * vy)
+        ty = 2 * (z * vx - x * vz)
+        tz = 2 * (x * vy - y * vx)
+        return Vector._from_list([vx + w * tx + y * tz - z * ty,
+                                  vy + w * ty + z * tx - x * tz,
+                                  vz + w * tz + x * ty - y * tx])
+
+    def copy(self) -> "Quaternion":
+        return Quaternion(tuple(self))
+
+    def to_matrix(self) -> "Matrix":
+        w, x, y, z = self.w, self.x, self.y, self.z
+        return Matrix(((1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)),
+                       (2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)),
+                       (2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y))))
+
+
+class _MatrixColumns:
+    __slots__ = ["_matrix"]
+
+    def __init__(self, matrix):
+        self._matrix = matrix
+
+    def __getitem__(self, index):
+        return Vector([row[index] for row in self._matrix._rows])
+
+    def __setitem__(self, index, values):
+        for row, value in zip(self._matrix._rows, values):
+            row[index] = float(value)
+
+
+class Matrix:
+    __slots__ = ["_rows"]
+
+    def __init__(self, rows=None):
+        if rows is None:
+            rows = Matrix.Identity(4)._rows
+        self._rows = [[float(value) for value in row] for row in rows]
+
+    @staticmethod
+    def Identity(size) -> "Matrix":
+        return Matrix([[1.0 if i == j else 0.0 for j in range(size)] for i in range(size)])
+
+    @staticmethod
+    def Translation(vector) -> "Matrix":
+        matrix = Matrix.Identity(4)
+        for i in range(3):
+            matrix._rows[i][3] = float(vector[i])
+        return matrix
+
+    @staticmethod
+    def LocRotScale(location, rotation, scale) -> "Matrix":
+        rotation_matrix = rotation.to_matrix()._rows if rotation is not None else Matrix.Identity(3)._rows
+        scale = scale if scale is not None else (1.0, 1.0, 1.0)
+        location = location if location is not None else (0.0, 0.0, 0.0)
+        return Matrix([[rotation_matrix[i][0] * scale[0], rotation_matrix[i][1] * scale[1],
+                        rotation_matrix[i][2] * scale[2], location[i]] for i in range(3)] + [[0, 0, 0, 1]])
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        return Vector(self._rows[index])
+
+    def __eq__(self, other):
+        return isinstance(other, Matrix) and self._rows == other._rows
+
+    def __repr__(self):
+        return "Matrix(" + repr(tuple(tuple(row) for row in self._rows)) + ")"
+
+    @property
+    def col(self) -> _MatrixColumns:
+        return _MatrixColumns(self)
+
+    def __matmul__(self, other):
+        rows = self._rows
+        if isinstance(other, Matrix):
+            columns = list(zip(*other._rows))
+            return Matrix([[sum(a * b for a, b in zip(row, column)) for column in columns] for row in rows])
+
+        values = list(other)
+        if len(rows) == 4 and len(values) == 3:
+            x, y, z = values
+            return Vector._from_list([row[0] * x + row[1] * y + row[2] * z + row[3] for row in rows[:3]])
+        if len(rows) == 3 and len(values) == 3:
+            x, y, z = values
+            return Vector._from_list([row[0] * x + row[1] * y + row[2] * z for row in rows])
+        if len(rows) == 4 and len(values) == 4:
+            return Vector._from_list([sum([a * b for a, b in zip(row, values)]) for row in rows])
+        raise ValueError("Matrix and vector sizes do not match")
+
+    def copy(self) -> "Matrix":
+        return Matrix(self._rows)
+
+    def to_3x3(self) -> "Matrix":
+        return Matrix([row[:3] for row in self._rows[:3]])
+
+    def inverted(self) -> "Matrix":
+        size = len(self._rows)
+        augmented = [row[:] + [1.0 if i == j else 0.0 for j in range(size)] for i, row in enumerate(self._rows)]
+        for column in range(size):
+            pivot = max(range(column, size), key=lambda r: abs(augmented[r][column]))
+            if abs(augmented[pivot][column]) < 1e-12:
+                raise ValueError("Matrix does not have an inverse")
+            augmented[column], augmented[pivot] = augmented[pivot], augmented[column]
+            pivot_value = augmented[column][column]
+            augmented[column] = [value / pivot_value for value in augmented[column]]
+            for row in range(size):
+                if row != column:
+                    factor = augmented[row][column]
+                    if factor:
+                        augmented[row] = [a - factor * b for a, b in zip(augmented[row], augmented[column])]
+        return Matrix([row[size:] for row in augmented])
+
+    def to_translation(self) -> Vector:
+        return Vector([row[3] for row in self._rows[:3]])
+
+    def to_scale(self) -> Vector:
+        return Vector([math.sqrt(sum(self._rows[r][c] ** 2 for r in range(3))) for c in range(3)])
+
+    def to_quaternion(self) -> Quaternion:
+        scale = self.to_scale()
+        m = [[self._rows[r][c] / (scale[c] or 1.0) for c in range(3)] for r in range(3)]
+        trace = m[0][0] + m[1][1] + m[2][2]
+        if trace > 0:
+            s = math.sqrt(trace + 1.0) * 2
+            return Quaternion((0.25 * s, (m[2][1] - m[1][2]) / s, (m[0][2] - m[2][0]) / s, (m[1][0] - m[0][1]) / s))
+        if m[0][0] > m[1][1] and m[0][0] > m[2][2]:
+            s = math.sqrt(max(1.0 + m[0][0] - m[1][1] - m[2][2], 1e-12)) * 2
+            return Quaternion(((m[2][1] - m[1][2]) / s, 0.25 * s, (m[0][1] + m[1][0]) / s, (m[0][2] + m[2][0]) / s))
+        if m[1][1] > m[2][2]:
+            s = math.sqrt(max(1.0 + m[1][1] - m[0][0] - m[2][2], 1e-12)) * 2
+            return Quaternion(((m[0][2] - m[2][0]) / s, (m[0][1] + m[1][0]) / s, 0.25 * s, (m[1][2] + m[2][1]) / s))
+        s = math.sqrt(max(1.0 + m[2][2] - m[0][0] - m[1][1], 1e-12)) * 2
+        return Quaternion(((m[1][0] - m[0][1]) / s, (m[0][2] + m[2][0]) / s, (m[1][2] + m[2][1]) / s, 0.25 * s))
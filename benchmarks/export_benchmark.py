@@ -0,0 +1,189 @@
+# Runs the exporter headless on synthetic scenes built with the stand-in Blender API and records per-stage
+# timings and peak memory. Every combination of the scene parameters is measured, e.g.:
+#   python benchmarks/export_benchmark.py --objects 1 10 --triangles 2000 --frames 50 --animation node vertex
+# Results can be saved with --output and regression-checked against a saved run with --baseline.
+import argparse
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+import synthetic_scenes
+import export_profiler
+import timbermesh_exporter
+
+# Stages are groups of the exporter's profiler phases. Indexed container chunks are compressed while encoding, so
+# their compression time is part of "encode". "animations" phases are named after the sampled action.
+STAGES = ["hierarchy", "nodes", "animations", "processing", "encode", "compress"]
+PHASE_STAGES = {
+    "hierarchy": "hierarchy",
+    "nodes": "nodes",
+    "animation workers": "animations",
+    "keyframe reduction": "processing",
+    "clip deduplication": "processing",
+    "vertex animation textures": "processing",
+    "serialization": "encode",
+    "serialization and compression": "encode",
+    "compression": "compress",
+}
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Timbermesh headless export benchmark")
+    parser.add_argument("--objects", type=int, nargs="+", default=[10], help="mesh objects per scene")
+    parser.add_argument("--triangles", type=int, nargs="+", default=[2000], help="triangles per object")
+    parser.add_argument("--frames", type=int, nargs="+", default=[50], help="animation frames")
+    parser.add_argument("--seams", type=float, nargs="+", default=[0.1], help="fraction of vertices on UV seams")
+    parser.add_argument("--holds", type=float, nargs="+", default=[0.0], help="fraction of held animation frames")
+    parser.add_argument("--animation", nargs="+", default=[synthetic_scenes.ANIMATION_NODE],
+                        choices=synthetic_scenes.ANIMATION_TYPES)
+    parser.add_argument("--materials", type=int, default=2)
+    parser.add_argument("--no-merge-meshes", action="store_true")
+    parser.add_argument("--indexed-container", action="store_true")
+    parser.add_argument("--packed-node-animations", action="store_true")
+    parser.add_argument("--collapse-held-frames", action="store_true")
+    parser.add_argument("--reduce-keyframes", action="store_true")
+    parser.add_argument("--vat-textures", choices=["RGBA16F", "RGBA32F"], help="also bake VAT textures")
+    parser.add_argument("--target-framerate", type=int, default=0, help="animation sample rate, 0 for every frame")
+    parser.add_argument("--export-threads", type=int, default=0,
+                        help="threads for vertex building and compression, 0 for the main thread only")
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per scene, the fastest one is kept")
+    parser.add_argument("--no-memory", action="store_true", help="skip the (slower) peak memory run")
+    parser.add_argument("--output", help="save the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against results saved with --output")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed relative increase over the baseline before a regression is reported")
+    return parser.parse_args()
+
+
+def create_settings(arguments, parameters) -> timbermesh_exporter.ExportSettings:
+    return timbermesh_exporter.ExportSettings(synthetic_scenes.bpy.context,
+                                              not arguments.no_merge_meshes,
+                                              True,
+                                              parameters.animation == synthetic_scenes.ANIMATION_VERTEX,
+                                              arguments.indexed_container,
+                                              arguments.packed_node_animations,
+                                              collapse_held_frames=arguments.collapse_held_frames,
+                                              reduce_keyframes=arguments.reduce_keyframes,
+                                              target_framerate=arguments.target_framerate,
+                                              bake_vertex_animation_textures=arguments.vat_textures is not None,
+                                              vertex_animation_texture_format=arguments.vat_textures or "RGBA16F",
+                                              export_threads=arguments.export_threads)
+
+
+def get_stage(phase_name) -> str:
+    if phase_name.startswith("animation "):
+        return "animations"
+    return PHASE_STAGES.get(phase_name)
+
+
+def run_export(parameters, arguments, measure_memory) -> (dict, float, int):
+    # Runs Exporter.export_collection and sums the times (or takes the largest memory peak) of its profiler phases
+    # per stage.
+    collection = synthetic_scenes.create_scene(parameters)
+    profiler = export_profiler.ExportProfiler(True, measure_memory)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "model.timbermesh")
+        start_time = time.perf_counter()
+        timbermesh_exporter.Exporter.export_collection(collection, path, create_settings(arguments, parameters),
+                                                       profiler)
+        total_time = time.perf_counter() - start_time
+        output_size = os.path.getsize(path)
+
+    stage_values = dict.fromkeys(STAGES, 0)
+    for phase in profiler.phases:
+        stage = get_stage(phase.name)
+        if measure_memory:
+            stage_values[stage] = max(stage_values[stage], phase.peak_memory)
+        else:
+            stage_values[stage] += phase.time
+    return stage_values, total_time, output_size
+
+
+def measure_times(parameters, arguments) -> (dict, float, int):
+    best_times = {}
+    best_total_time = None
+    output_size = 0
+    for _ in range(arguments.repeat):
+        times, total_time, output_size = run_export(parameters, arguments, False)
+        for name, elapsed_time in times.items():
+            best_times[name] = min(best_times.get(name, elapsed_time), elapsed_time)
+        best_total_time = min(best_total_time or total_time, total_time)
+    return best_times, best_total_time, output_size
+
+
+def measure_memory(parameters, arguments) -> (dict, int):
+    peaks, _, _ = run_export(parameters, arguments, True)
+    return peaks, max(peaks.values())
+
+
+def run_benchmark(parameters, arguments) -> dict:
+    times, total_time, output_size = measure_times(parameters, arguments)
+    result = {"scene": parameters.to_dict(), "output_size": output_size, "total_time": total_time,
+              "stages": {name: {"time": times[name]} for name in STAGES}}
+    if not arguments.no_memory:
+        peaks, peak_memory = measure_memory(parameters, arguments)
+        result["peak_memory"] = peak_memory
+        for name in STAGES:
+            result["stages"][name]["peak_memory"] = peaks[name]
+    return result
+
+
+def print_result(result) -> None:
+    scene = result["scene"]
+    print("Scene: {object_count} objects, {triangle_count} triangles, {frame_count} frames, "
+          "{seam_density} seams, {animation} animation".format(**scene))
+    for name in STAGES:
+        stage = result["stages"][name]
+        line = "  {0:<12}{1:>10.3f} s".format(name, stage["time"])
+        if "peak_memory" in stage:
+            line += "{0:>12.1f} MB".format(stage["peak_memory"] / (1 << 20))
+        print(line)
+    line = "  {0:<12}{1:>10.3f} s".format("total", result["total_time"])
+    if "peak_memory" in result:
+        line += "{0:>12.1f} MB".format(result["peak_memory"] / (1 << 20))
+    print(line)
+    print("  output size", result["output_size"], "bytes")
+
+
+def find_regressions(results, baseline_results, tolerance) -> list:
+    regressions = []
+    for result in results:
+        baseline = next((b for b in baseline_results if b["scene"] == result["scene"]), None)
+        if baseline is None:
+            continue
+        for key in ("total_time", "peak_memory"):
+            if key in result and key in baseline and result[key] > baseline[key] * (1.0 + tolerance):
+                regressions.append((result["scene"], key, baseline[key], result[key]))
+    return regressions
+
+
+def main():
+    arguments = parse_arguments()
+    results = []
+    for objects, triangles, frames, seams, holds, animation in itertools.product(
+            arguments.objects, arguments.triangles, arguments.frames, arguments.seams, arguments.holds,
+            arguments.animation):
+        parameters = synthetic_scenes.SceneParameters(objects, triangles, frames, seams, animation,
+                                                      arguments.materials, hold_density=holds)
+        result = run_benchmark(parameters, arguments)
+        print_result(result)
+        results.append(result)
+
+    if arguments.output:
+        with open(arguments.output, "w") as file:
+            json.dump({"results": results}, file, indent=2)
+
+    if arguments.baseline:
+        with open(arguments.baseline) as file:
+            baseline_results = json.load(file)["results"]
+        regressions = find_regressions(results, baseline_results, arguments.tolerance)
+        for scene, key, baseline_value, value in regressions:
+            print("Regression in", key, "for", scene, ":", baseline_value, "->", value)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
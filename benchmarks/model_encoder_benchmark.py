@@ -0,0 +1,47 @@
+# Compares the speed of the generated model encoder with the generic SerializeToString(). tests/test_model_writer.py
+# checks that they emit identical bytes. Run with: python benchmarks/model_encoder_benchmark.py [--nodes N] ...
+import argparse
+import time
+import synthetic_models
+import model_encoder
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Timbermesh model encoder benchmark")
+    parser.add_argument("--nodes", type=int, default=20)
+    parser.add_argument("--vertices", type=int, default=5000)
+    parser.add_argument("--triangles", type=int, default=8000)
+    parser.add_argument("--vertex-frames", type=int, default=10)
+    parser.add_argument("--node-frames", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    return parser.parse_args()
+
+
+def measure(function, argument, repeat) -> (float, bytes):
+    best_time = None
+    result = None
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        result = function(argument)
+        elapsed_time = time.perf_counter() - start_time
+        best_time = elapsed_time if best_time is None else min(best_time, elapsed_time)
+    return best_time, result
+
+
+def main():
+    arguments = parse_arguments()
+    timbermesh_model = synthetic_models.create_model(arguments.nodes, arguments.vertices, arguments.triangles,
+                                                     vertex_animation_frame_count=arguments.vertex_frames,
+                                                     node_animation_frame_count=arguments.node_frames)
+
+    serialize_time, serialized_model = measure(lambda m: m.SerializeToString(), timbermesh_model, arguments.repeat)
+    encode_time, _ = measure(model_encoder.encode_model, timbermesh_model, arguments.repeat)
+
+    print("Model size:", len(serialized_model), "bytes")
+    print("SerializeToString():", "{0:.3f}".format(serialize_time), "s")
+    print("model_encoder.encode_model():", "{0:.3f}".format(encode_time), "s",
+          "({0:.1f}x)".format(serialize_time / encode_time))
+
+
+if __name__ == "__main__":
+    main()
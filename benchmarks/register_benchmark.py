@@ -0,0 +1,54 @@
+# Measures how long enabling the add-on takes.
+# Run with: blender --background --factory-startup --python benchmarks/register_benchmark.py -- [--repeat N]
+import argparse
+import importlib
+import sys
+import time
+from os.path import abspath, dirname, join
+
+SOURCE_DIRECTORY = join(dirname(dirname(abspath(__file__))), "src")
+PACKAGE_NAME = "timbermesh_blender_plugin"
+# The add-on adds its directory to sys.path, so its modules can be loaded under their plain and package names.
+LAZY_MODULES = ["timbermesh_exporter", "model_pb2", "google.protobuf"]
+
+
+def parse_arguments():
+    arguments = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="Timbermesh add-on registration benchmark")
+    parser.add_argument("--repeat", type=int, default=100, help="number of register/unregister cycles")
+    return parser.parse_args(arguments)
+
+
+def main():
+    arguments = parse_arguments()
+    sys.path.insert(0, SOURCE_DIRECTORY)
+
+    start_time = time.perf_counter()
+    plugin = importlib.import_module(PACKAGE_NAME)
+    import_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    plugin.register()
+    first_register_time = time.perf_counter() - start_time
+    plugin.unregister()
+
+    start_time = time.perf_counter()
+    for _ in range(arguments.repeat):
+        plugin.register()
+        plugin.unregister()
+    cycle_time = (time.perf_counter() - start_time) / arguments.repeat
+
+    print("Import:", "{0:.2f}".format(import_time * 1000), "ms")
+    print("First register():", "{0:.2f}".format(first_register_time * 1000), "ms")
+    print("register() + unregister():", "{0:.3f}".format(cycle_time * 1000), "ms (average of",
+          arguments.repeat, "cycles)")
+
+    loaded_modules = [module_name for name in LAZY_MODULES for module_name in (name, PACKAGE_NAME + "." + name)
+                      if module_name in sys.modules]
+    if loaded_modules:
+        print("Modules loaded during registration that should be lazy:", ", ".join(loaded_modules))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# Builds synthetic Timbermesh models of configurable size for the model-level benchmarks.
+import random
+import struct
+import sys
+from os.path import abspath, dirname, join
+
+PLUGIN_DIRECTORY = join(dirname(dirname(abspath(__file__))), "src", "timbermesh_blender_plugin")
+if PLUGIN_DIRECTORY not in sys.path:
+    sys.path.insert(0, PLUGIN_DIRECTORY)
+
+import model_pb2
+
+VERTEX_PROPERTIES = [("position", 3), ("normal", 3), ("tangent", 4), ("uv0", 2)]
+VERTEX_ANIMATION_PROPERTIES = [("offset", 3), ("rotation", 4)]
+
+
+def create_float_property(name, dimension, count, generator) -> model_pb2.VertexProperty:
+    vertex_property = model_pb2.VertexProperty()
+    vertex_property.name = name
+    vertex_property.scalarType = model_pb2.ScalarType.SCALAR_TYPE_FLOAT
+    vertex_property.scalarTypeDimension = dimension
+    values = [generator.uniform(-1.0, 1.0) for _ in range(count * dimension)]
+    vertex_property.data = struct.pack("<%df" % len(values), *values)
+    return vertex_property
+
+
+def create_model(node_count=10, vertex_count=5000, triangle_count=8000, material_count=2,
+                 vertex_animation_frame_count=10, node_animation_frame_count=100, seed=0) -> model_pb2.Model:
+    generator = random.Random(seed)
+    timbermesh_model = model_pb2.Model()
+    timbermesh_model.name = "Synthetic"
+
+    for node_index in range(node_count):
+        timbermesh_node = timbermesh_model.nodes.add()
+        timbermesh_node.name = "#Node" + str(node_index)
+        timbermesh_node.parent = node_index - 1
+        timbermesh_node.position.x = generator.uniform(-10.0, 10.0)
+        timbermesh_node.position.y = generator.uniform(-10.0, 10.0)
+        timbermesh_node.rotation.w = 1.0
+        timbermesh_node.scale.x = timbermesh_node.scale.y = timbermesh_node.scale.z = 1.0
+        timbermesh_node.vertexCount = vertex_count
+
+        for name, dimension in VERTEX_PROPERTIES:
+            timbermesh_node.vertexProperties.append(create_float_property(name, dimension, vertex_count, generator))
+
+        for material_index in range(material_count):
+            timbermesh_mesh = timbermesh_node.meshes.add()
+            timbermesh_mesh.material = "Material" + str(material_index)
+            timbermesh_mesh.indices.extend(generator.randrange(vertex_count)
+                                           for _ in range(triangle_count * 3 // material_count))
+
+        if vertex_animation_frame_count > 0:
+            vertex_animation = timbermesh_node.vertexAnimations.add()
+            vertex_animation.name = "Vertex"
+            vertex_animation.framerate = 24
+            vertex_animation.animatedVertexCount = vertex_count
+            for _ in range(vertex_animation_frame_count):
+                frame = vertex_animation.frames.add()
+                for name, dimension in VERTEX_ANIMATION_PROPERTIES:
+                    frame.vertexProperties.append(create_float_property(name, dimension, vertex_count, generator))
+
+        if node_animation_frame_count > 0:
+            node_animation = timbermesh_node.nodeAnimations.add()
+            node_animation.name = "Node"
+            node_animation.framerate = 24
+            for _ in range(node_animation_frame_count):
+                frame = node_animation.frames.add()
+                frame.position.x = generator.uniform(-1.0, 1.0)
+                frame.position.y = generator.uniform(-1.0, 1.0)
+                frame.position.z = generator.uniform(-1.0, 1.0)
+                frame.rotation.x = generator.uniform(-1.0, 1.0)
+                frame.rotation.w = generator.uniform(-1.0, 1.0)
+                frame.scale.x = frame.scale.y = frame.scale.z = 1.0
+
+    return timbermesh_model
@@ -0,0 +1,150 @@
+# Builds parametrized synthetic scenes on top of the stand-in Blender API in benchmarks/blender_stand_in.
+import math
+import random
+import sys
+from os.path import abspath, dirname, join
+
+BENCHMARKS_DIRECTORY = dirname(abspath(__file__))
+STAND_IN_DIRECTORY = join(BENCHMARKS_DIRECTORY, "blender_stand_in")
+PLUGIN_DIRECTORY = join(dirname(BENCHMARKS_DIRECTORY), "src", "timbermesh_blender_plugin")
+for directory in (PLUGIN_DIRECTORY, STAND_IN_DIRECTORY):
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+
+import bpy
+import mathutils
+
+ANIMATION_NONE = "none"
+ANIMATION_NODE = "node"
+ANIMATION_VERTEX = "vertex"
+ANIMATION_TYPES = [ANIMATION_NONE, ANIMATION_NODE, ANIMATION_VERTEX]
+
+
+class SceneParameters:
+    def __init__(self, object_count=10, triangle_count=2000, frame_count=50, seam_density=0.1,
+                 animation=ANIMATION_NODE, material_count=2, uv_layer_count=1, use_colors=False, hold_density=0.0,
+                 seed=0):
+        self.object_count = object_count
+        self.triangle_count = triangle_count
+        self.frame_count = frame_count
+        self.seam_density = seam_density
+        self.animation = animation
+        self.material_count = material_count
+        self.uv_layer_count = uv_layer_count
+        self.use_colors = use_colors
+        self.hold_density = hold_density
+        self.seed = seed
+
+    def to_dict(self) -> dict:
+        return dict(self.__dict__)
+
+
+def create_scene(parameters) -> bpy.types.Collection:
+    bpy.reset()
+    generator = random.Random(parameters.seed)
+    scene = bpy.context.scene
+    scene.frame_start = 0
+    scene.frame_end = max(parameters.frame_count - 1, 0)
+    scene.frame_current = 0
+
+    materials = [bpy.types.Material("Material" + str(i)) for i in range(parameters.material_count)]
+    bpy.data.materials.extend(materials)
+    collection = bpy.types.Collection("Synthetic")
+    bpy.data.collections.append(collection)
+
+    root = bpy.types.Object("#Root")
+    collection.objects.append(root)
+    for object_index in range(parameters.object_count):
+        mesh = create_grid_mesh("Mesh" + str(object_index), parameters, generator)
+        obj = bpy.types.Object("#Object" + str(object_index), mesh)
+        obj.material_slots = [bpy.types.MaterialSlot(material) for material in materials]
+        obj.location = mathutils.Vector((object_index * 2.5, 0.0, 0.0))
+        obj.set_parent(root)
+        if parameters.animation != ANIMATION_NONE and parameters.frame_count > 0:
+            __animate_object(obj, parameters, generator)
+        collection.objects.append(obj)
+
+    bpy.data.objects.extend(collection.objects)
+    scene.objects.extend(collection.objects)
+    bpy.context.selectable_objects = list(collection.objects)
+    bpy.context.selected_ids = [collection]
+    return collection
+
+
+def create_grid_mesh(name, parameters, generator) -> bpy.types.Mesh:
+    quad_count = max(parameters.triangle_count // 2, 1)
+    columns = max(int(math.sqrt(quad_count)), 1)
+    rows = max(quad_count // columns, 1)
+
+    positions = []
+    normals = []
+    for row in range(rows + 1):
+        for column in range(columns + 1):
+            x = column / columns
+            y = row / rows
+            positions.append((x, y, 0.1 * math.sin(x * 6.0) * math.cos(y * 6.0)))
+            nx = -0.6 * math.cos(x * 6.0) * math.cos(y * 6.0)
+            ny = 0.6 * math.sin(x * 6.0) * math.sin(y * 6.0)
+            length = math.sqrt(nx * nx + ny * ny + 1.0)
+            normals.append((nx / length, ny / length, 1.0 / length))
+
+    seam_vertices = {i for i in range(len(positions)) if generator.random() < parameters.seam_density}
+    polygons = []
+    material_indices = []
+    loop_normals = []
+    uv_layers = [("UVMap" if i == 0 else "UVMap." + str(i), []) for i in range(parameters.uv_layer_count)]
+    color_layers = [("Color", [])] if parameters.use_colors else []
+
+    for row in range(rows):
+        for column in range(columns):
+            polygon_index = len(polygons)
+            first = row * (columns + 1) + column
+            polygon = (first, first + 1, first + columns + 2, first + columns + 1)
+            polygons.append(polygon)
+            material_indices.append(polygon_index % max(parameters.material_count, 1))
+            for vertex_index in polygon:
+                loop_normals.append(normals[vertex_index])
+                x, y, _ = positions[vertex_index]
+                seam_offset = 0.5 * (polygon_index % 2) if vertex_index in seam_vertices else 0.0
+                for layer_index, (_, uvs) in enumerate(uv_layers):
+                    uvs.append((x + seam_offset, y + layer_index))
+                for _, colors in color_layers:
+                    colors.append((x, y, 1.0, 1.0))
+
+    return bpy.types.Mesh.from_geometry(name, positions, polygons, loop_normals, material_indices, uv_layers,
+                                        color_layers)
+
+
+def __animate_object(obj, parameters, generator) -> None:
+    action = bpy.data.actions.new(obj.name + "Action")
+    obj.animation_data = bpy.types.AnimationData(action)
+    phase = generator.uniform(0.0, math.pi)
+    base_location = obj.location.copy()
+
+    # Held frames repeat the pose of the previous frame. The animation time is exposed as an F-curve, so the
+    # exporter can see which frames are held.
+    times = [0]
+    for frame in range(1, parameters.frame_count):
+        is_held = parameters.hold_density > 0 and generator.random() < parameters.hold_density
+        times.append(times[-1] if is_held else frame)
+
+    def get_time(frame):
+        frame_index = min(max(math.floor(frame), 0), len(times) - 1)
+        next_time = times[min(frame_index + 1, len(times) - 1)]
+        return times[frame_index] + (next_time - times[frame_index]) * (frame - math.floor(frame))
+
+    action.fcurves.append(bpy.types.FCurve("time", 0, lambda frame: float(get_time(frame))))
+
+    if parameters.animation == ANIMATION_NODE:
+        def animate(frame):
+            angle = phase + get_time(frame) * 0.1
+            location = base_location + mathutils.Vector((0.0, math.sin(angle), 0.5 * math.cos(angle)))
+            rotation = bpy.quaternion_from_axis_angle((0.0, 0.0, 1.0), angle)
+            return location, rotation, mathutils.Vector((1.0, 1.0, 1.0 + 0.1 * math.sin(angle)))
+
+        obj.animation = animate
+    else:
+        def deform(co, frame):
+            return mathutils.Vector((co.x, co.y, co.z + 0.05 * math.sin(phase + get_time(frame) * 0.2 + co.x * 4.0)))
+
+        obj.deformation = deform
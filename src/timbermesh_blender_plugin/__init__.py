@@ -10,30 +10,62 @@ bl_info = {
 
 import bpy
 import sys
+import time
 from os.path import dirname
 
 sys.path.append(dirname(__file__))
 from bpy.types import Operator
 from bpy_extras.io_utils import ExportHelper, path_reference_mode
-from timbermesh_blender_plugin import timbermesh_exporter
 from timbermesh_blender_plugin import blender_utils
 
 
-class ExportCollection(Operator, ExportHelper):
-    bl_idname = "export_collection.timbermesh"
-    bl_label = "Export Collection"
-    bl_options = {'PRESET'}
+class ModalExport:
+    # Runs the export slices on timer events, for as long as SLICE_DURATION at a time, so Blender stays responsive.
+    TIMER_INTERVAL = 0.01
+    SLICE_DURATION = 0.1
 
-    filename_ext = ".timbermesh"
-    use_filter_folder = False
-    check_extension = True
-    path_mode: path_reference_mode
+    _slices = None
+    _timer = None
 
-    filter_glob: bpy.props.StringProperty(
-        default="*.timbermesh;",
-        options={'HIDDEN'},
-    )
+    def start_modal_export(self, context, slices):
+        self._slices = slices
+        window_manager = context.window_manager
+        self._timer = window_manager.event_timer_add(self.TIMER_INTERVAL, window=context.window)
+        window_manager.progress_begin(0, 100)
+        window_manager.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
 
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self.__stop_modal_export(context)
+            self._slices.close()
+            self.report({'WARNING'}, "Export cancelled")
+            return {'CANCELLED'}
+
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        slice_end_time = time.perf_counter() + self.SLICE_DURATION
+        try:
+            while time.perf_counter() < slice_end_time:
+                progress = next(self._slices)
+        except StopIteration:
+            self.__stop_modal_export(context)
+            return {'FINISHED'}
+        except Exception:
+            self.__stop_modal_export(context)
+            raise
+
+        context.window_manager.progress_update(progress * 100)
+        return {'RUNNING_MODAL'}
+
+    def __stop_modal_export(self, context):
+        context.window_manager.event_timer_remove(self._timer)
+        context.window_manager.progress_end()
+
+
+class ExportOptions:
+    # Options shared by the export operators.
     merge_meshes: bpy.props.BoolProperty(
         name="Merge meshes",
         description="Merge matching meshes together",
@@ -52,6 +84,181 @@ class ExportCollection(Operator, ExportHelper):
         default=False
     )
 
+    use_indexed_container: bpy.props.BoolProperty(
+        name="Indexed container",
+        description="Store nodes and animations as separately compressed chunks with an offset index",
+        default=False
+    )
+
+    use_packed_node_animations: bpy.props.BoolProperty(
+        name="Packed node animations",
+        description="Store node animation tracks as packed float arrays instead of per-frame messages",
+        default=False
+    )
+
+    collapse_held_frames: bpy.props.BoolProperty(
+        name="Collapse held frames",
+        description="Skip frames in which no F-curve changes and store them as repeats of the previous frame",
+        default=False
+    )
+
+    skip_unaffected_actions: bpy.props.BoolProperty(
+        name="Skip unaffected actions",
+        description="Do not store a clip for nodes that the clip's action does not animate "
+                    "(only with single animation disabled)",
+        default=False
+    )
+
+    deduplicate_clips: bpy.props.BoolProperty(
+        name="Deduplicate clips",
+        description="Store clips of a node that are identical to an earlier clip as a reference to it",
+        default=False
+    )
+
+    target_framerate: bpy.props.IntProperty(
+        name="Target framerate",
+        description="Sample animations at this framerate (0 samples every frame at the scene framerate)",
+        default=0,
+        min=0,
+        max=240
+    )
+
+    bake_vertex_animation_textures: bpy.props.BoolProperty(
+        name="Bake VAT textures",
+        description="Also store the vertex animations of every node as textures with one row per frame and one "
+                    "column per animated vertex",
+        default=False
+    )
+
+    vertex_animation_texture_format: bpy.props.EnumProperty(
+        name="VAT texture format",
+        description="Pixel format of the baked vertex animation textures",
+        items=[("RGBA16F", "RGBA16F", "Half float channels"),
+               ("RGBA32F", "RGBA32F", "Float channels")],
+        default="RGBA16F"
+    )
+
+    add_vertex_animation_texture_uvs: bpy.props.BoolProperty(
+        name="VAT UV channel",
+        description="Add a vertex property with the texture column of every vertex in the baked textures",
+        default=False
+    )
+
+    reduce_keyframes: bpy.props.BoolProperty(
+        name="Reduce keyframes",
+        description="Remove node animation frames that interpolation between the remaining frames reconstructs "
+                    "within the tolerances",
+        default=False
+    )
+
+    position_tolerance: bpy.props.FloatProperty(
+        name="Position tolerance",
+        description="Largest allowed position error of removed frames",
+        default=0.001,
+        min=0.0,
+        precision=4
+    )
+
+    rotation_tolerance: bpy.props.FloatProperty(
+        name="Rotation tolerance",
+        description="Largest allowed rotation error of removed frames in degrees",
+        default=0.1,
+        min=0.0,
+        precision=3
+    )
+
+    scale_tolerance: bpy.props.FloatProperty(
+        name="Scale tolerance",
+        description="Largest allowed scale error of removed frames",
+        default=0.001,
+        min=0.0,
+        precision=4
+    )
+
+    profile_memory: bpy.props.BoolProperty(
+        name="Profile memory",
+        description="Measure time, peak and retained memory of every export phase (slows the export down)",
+        default=False
+    )
+
+    write_memory_report: bpy.props.BoolProperty(
+        name="Write memory report",
+        description="Save the memory profile as a JSON file next to the exported model",
+        default=False
+    )
+
+    write_export_report: bpy.props.BoolProperty(
+        name="Write export report",
+        description="Save vertex, index, animation and file size statistics as a JSON file next to the model",
+        default=False
+    )
+
+    animation_workers: bpy.props.IntProperty(
+        name="Animation workers",
+        description="Sample animations in this many background Blender processes (0 samples them in this Blender)",
+        default=0,
+        min=0,
+        max=64
+    )
+
+    export_threads: bpy.props.IntProperty(
+        name="Export threads",
+        description="Build vertices and compress the file on this many threads (0 and 1 use only the main thread)",
+        default=0,
+        min=0,
+        max=64
+    )
+
+    use_modal_export: bpy.props.BoolProperty(
+        name="Export in background",
+        description="Keep Blender responsive and show the export progress, press Esc to cancel",
+        default=False
+    )
+
+    def create_export_settings(self, context, **extra_settings):
+        from timbermesh_blender_plugin import timbermesh_exporter
+
+        return timbermesh_exporter.ExportSettings(
+            context,
+            merge_meshes=self.merge_meshes,
+            single_animation=self.single_animation,
+            use_vertex_animations=self.use_vertex_animations,
+            use_indexed_container=self.use_indexed_container,
+            use_packed_node_animations=self.use_packed_node_animations,
+            profile_memory=self.profile_memory,
+            write_memory_report=self.write_memory_report,
+            write_export_report=self.write_export_report,
+            animation_workers=self.animation_workers,
+            collapse_held_frames=self.collapse_held_frames,
+            reduce_keyframes=self.reduce_keyframes,
+            position_tolerance=self.position_tolerance,
+            rotation_tolerance=self.rotation_tolerance,
+            scale_tolerance=self.scale_tolerance,
+            target_framerate=self.target_framerate,
+            bake_vertex_animation_textures=self.bake_vertex_animation_textures,
+            vertex_animation_texture_format=self.vertex_animation_texture_format,
+            add_vertex_animation_texture_uvs=self.add_vertex_animation_texture_uvs,
+            skip_unaffected_actions=self.skip_unaffected_actions,
+            deduplicate_clips=self.deduplicate_clips,
+            export_threads=self.export_threads,
+            **extra_settings)
+
+
+class ExportCollection(Operator, ExportHelper, ExportOptions, ModalExport):
+    bl_idname = "export_collection.timbermesh"
+    bl_label = "Export Collection"
+    bl_options = {'PRESET'}
+
+    filename_ext = ".timbermesh"
+    use_filter_folder = False
+    check_extension = True
+    path_mode: path_reference_mode
+
+    filter_glob: bpy.props.StringProperty(
+        default="*.timbermesh;",
+        options={'HIDDEN'},
+    )
+
     def invoke(self, context, event):
         selected_collections = blender_utils.get_selected_collections(context)
         if len(selected_collections) > 0:
@@ -60,17 +267,23 @@ class ExportCollection(Operator, ExportHelper):
         return {'RUNNING_MODAL'}
 
     def execute(self, context):
+        # The exporter pulls in model_pb2 and the vendored protobuf runtime, so it is only loaded on first export
+        # to keep add-on registration fast.
+        from timbermesh_blender_plugin import timbermesh_exporter
+
         selected_collections = blender_utils.get_selected_collections(context)
-        settings = timbermesh_exporter.ExportSettings(context,
-                                                      self.merge_meshes,
-                                                      self.single_animation,
-                                                      self.use_vertex_animations)
+        settings = self.create_export_settings(context)
+
+        if self.use_modal_export:
+            slices = timbermesh_exporter.Exporter.iterate_export_collection(selected_collections[0], self.filepath,
+                                                                            settings)
+            return self.start_modal_export(context, slices)
 
         timbermesh_exporter.Exporter.export_collection(selected_collections[0], self.filepath, settings)
         return {'FINISHED'}
 
 
-class ExportCollections(Operator, ExportHelper):
+class ExportCollections(Operator, ExportHelper, ExportOptions, ModalExport):
     bl_idname = "export_collections.timbermesh"
     bl_label = "Export Collections"
     bl_options = {'PRESET'}
@@ -89,21 +302,18 @@ class ExportCollections(Operator, ExportHelper):
         options={'HIDDEN'},
     )
 
-    merge_meshes: bpy.props.BoolProperty(
-        name="Merge meshes",
-        description="Merge matching meshes together",
-        default=True
-    )
-
-    single_animation: bpy.props.BoolProperty(
-        name="Single animation",
-        description="Use scene frame range as single animation",
-        default=True
+    snapshot_cache_size: bpy.props.IntProperty(
+        name="Batch cache (MB)",
+        description="Reuse meshes and animation frames of objects shared by the exported collections, keeping up to "
+                    "this many megabytes of them (0 disables the cache)",
+        default=0,
+        min=0,
+        max=65536
     )
 
-    use_vertex_animations: bpy.props.BoolProperty(
-        name="Use vertex animations",
-        description="Use vertex (VAT) animations where possible",
+    use_pipelined_export: bpy.props.BoolProperty(
+        name="Pipelined export",
+        description="Capture the next collection while the previous ones are compressed and written on other threads",
         default=False
     )
 
@@ -118,17 +328,30 @@ class ExportCollections(Operator, ExportHelper):
         return {'RUNNING_MODAL'}
 
     def execute(self, context):
-        settings = timbermesh_exporter.ExportSettings(context,
-                                                      self.merge_meshes,
-                                                      self.single_animation,
-                                                      self.use_vertex_animations)
+        from timbermesh_blender_plugin import timbermesh_exporter
+
+        settings = self.create_export_settings(context, snapshot_cache_size=self.snapshot_cache_size)
 
         selected_collections = blender_utils.get_selected_collections(context)
+        collections_and_paths = []
         for collection in selected_collections:
             path = self.directory + "/" + collection.name + ".timbermesh"
             if self.append_model_to_name:
                 path = path.replace(".timbermesh", ".Model.timbermesh")
-            timbermesh_exporter.Exporter.export_collection(collection, path, settings)
+            collections_and_paths.append((collection, path))
+
+        if self.use_modal_export:
+            if self.use_pipelined_export:
+                slices = timbermesh_exporter.Exporter.iterate_export_collections_pipelined(collections_and_paths,
+                                                                                           settings)
+            else:
+                slices = timbermesh_exporter.Exporter.iterate_export_collections(collections_and_paths, settings)
+            return self.start_modal_export(context, slices)
+
+        if self.use_pipelined_export:
+            timbermesh_exporter.Exporter.export_collections_pipelined(collections_and_paths, settings)
+            return {'FINISHED'}
+        timbermesh_exporter.Exporter.export_collections(collections_and_paths, settings)
         return {'FINISHED'}
 
 
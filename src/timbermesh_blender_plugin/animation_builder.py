@@ -1,150 +1,243 @@
-﻿import bpy
+﻿import array
+import bpy
 import mathutils
 import animation_utils
 import blender_utils
 import blender_types
+import scene_snapshot
 import vertex_properties_utils
+import work_slices
+
+
+class VertexAnimation:
+    def __init__(self, name, framerate, animated_vertex_count):
+        self.name = name
+        self.framerate = framerate
+        self.animated_vertex_count = animated_vertex_count
+        self.frames = []
+        self.frame_runs = array.array("i")
+        self.shared_clip = ""
+
+    def add_frame(self, frame) -> None:
+        self.frames.append(frame)
+        if self.frame_runs:
+            self.frame_runs.append(1)
+
+    def hold_frame(self) -> None:
+        if not self.frame_runs:
+            self.frame_runs = array.array("i", [1] * len(self.frames))
+        self.frame_runs[-1] += 1
+
+
+class NodeAnimation:
+    def __init__(self, name, framerate, packed=False):
+        self.name = name
+        self.framerate = framerate
+        self.packed = packed
+        self.frame_count = 0
+        self.positions = array.array("f")
+        self.rotations = array.array("f")
+        self.scales = array.array("f")
+        self.frame_runs = array.array("i")
+        self.key_frames = array.array("i")
+        self.shared_clip = ""
+
+    def add_frame(self, position, rotation, scale) -> None:
+        self.positions.extend(position)
+        self.rotations.extend(rotation)
+        self.scales.extend(scale)
+        self.frame_count += 1
+        if self.frame_runs:
+            self.frame_runs.append(1)
+
+    def hold_frame(self) -> None:
+        if not self.frame_runs:
+            self.frame_runs = array.array("i", [1] * self.frame_count)
+        self.frame_runs[-1] += 1
 
 
 class AnimationBuilder:
 
     @classmethod
-    def create_animations(cls, nodes, settings) -> None:
+    def create_animations(cls, nodes, settings, profiler, snapshot_cache=None) -> None:
+        work_slices.run(cls.iterate_animations(nodes, settings, profiler, snapshot_cache))
+
+    @classmethod
+    def iterate_animations(cls, nodes, settings, profiler, snapshot_cache=None):
         if settings.single_animation:
             action = None
             try:
                 action = bpy.data.actions.new("Default")
                 action.frame_range = blender_utils.get_scene_frame_range(settings.context.scene)
-                cls.__save_animation(action, nodes, settings)
+                with profiler.phase("animation " + action.name):
+                    yield from cls.__iterate_animation_frames(action, nodes, settings, snapshot_cache)
             finally:
                 if action is not None:
                     bpy.data.actions.remove(action)
 
         else:
-            for action in bpy.data.actions:
-                cls.__set_action_to_all_armatures(action, settings)
-                cls.__save_animation(action, nodes, settings)
+            actions = list(bpy.data.actions)
+            for action_index, action in enumerate(actions):
+                cls.set_action_to_all_armatures(action, settings)
+                with profiler.phase("animation " + action.name):
+                    yield from work_slices.scale(cls.__iterate_animation_frames(action, nodes, settings,
+                                                                                snapshot_cache),
+                                                 action_index / len(actions), (action_index + 1) / len(actions))
 
     @classmethod
-    def __set_action_to_all_armatures(cls, action, settings) -> None:
+    def set_action_to_all_armatures(cls, action, settings) -> None:
         for obj in settings.context.selectable_objects:
             if obj.type == blender_types.ARMATURE:
                 obj.animation_data.action = action
 
     @classmethod
-    def __save_animation(cls, action, nodes, settings) -> None:
-        context = settings.context
-        frame_range = action.frame_range
-
+    def create_animation_records(cls, name, nodes, settings, action=None) -> (dict, dict):
+        # With skip_unaffected_actions, nodes that the clip action does not animate get no clip.
+        framerate = settings.context.scene.render.fps / animation_utils.get_sample_step(settings)
         vertex_animations = {}
         node_animations = {}
         for node in nodes:
             if not animation_utils.is_any_object_animated_in_hierarchy(node):
                 continue
+            if action is not None and settings.skip_unaffected_actions \
+                    and not animation_utils.is_action_relevant(node, action):
+                continue
 
             if settings.use_vertex_animations and animation_utils.can_use_vertex_animations(node):
-                vertex_animation = node.timbermesh_node.vertexAnimations.add()
-                vertex_animation.name = action.name
-                vertex_animation.framerate = context.scene.render.fps
-                vertex_animation.animatedVertexCount = node.animated_vertex_count
+                vertex_animation = VertexAnimation(name, framerate, node.animated_vertex_count)
+                node.vertex_animations.append(vertex_animation)
                 vertex_animations[node] = vertex_animation
             elif animation_utils.can_use_node_animations(node):
-                node_animation = node.timbermesh_node.nodeAnimations.add()
-                node_animation.name = action.name
-                node_animation.framerate = context.scene.render.fps
+                node_animation = NodeAnimation(name, framerate, settings.use_packed_node_animations)
+                node.node_animations.append(node_animation)
                 node_animations[node] = node_animation
 
+        return vertex_animations, node_animations
+
+    @classmethod
+    def save_frame(cls, context, frame, vertex_animations, node_animations, snapshot_cache=None,
+                   action_name="") -> None:
+        snapshot = scene_snapshot.capture_frame(context, frame, vertex_animations, node_animations, snapshot_cache,
+                                                action_name)
+
+        for node, animation in vertex_animations.items():
+            cls.__save_vertex_animation_frame(node, animation, snapshot)
+        for node, animation in node_animations.items():
+            cls.__save_node_animation_frame(node, animation, snapshot)
+
+    @classmethod
+    def hold_frame(cls, vertex_animations, node_animations) -> None:
+        for animation in vertex_animations.values():
+            animation.hold_frame()
+        for animation in node_animations.values():
+            animation.hold_frame()
+
+    @classmethod
+    def __iterate_animation_frames(cls, action, nodes, settings, snapshot_cache):
+        frame_range = action.frame_range
+        clip_action = None if settings.single_animation else action
+        vertex_animations, node_animations = cls.create_animation_records(action.name, nodes, settings, clip_action)
         if not vertex_animations and not node_animations:
             return
 
         print("Saving animation", action.name, "from frame", str(frame_range.x), "to", str(frame_range.y - 1))
-        for frame_index in range(int(frame_range.x), int(frame_range.y), 1):
-            context.scene.frame_set(frame_index)
-            depsgraph = context.evaluated_depsgraph_get()
+        frames = animation_utils.get_sample_frames(int(frame_range.x), int(frame_range.y),
+                                                   animation_utils.get_sample_step(settings))
+        # Frames sampled with the scene animations (single animation) are cached under an empty action name.
+        yield from cls.iterate_frames(settings, frames, vertex_animations, node_animations, snapshot_cache,
+                                      clip_action.name if clip_action is not None else "")
 
-            for node, animation in vertex_animations.items():
-                cls.__save_vertex_animation_frame(node, animation, depsgraph)
-            for node, animation in node_animations.items():
-                cls.__save_node_animation_frame(node, animation, depsgraph)
+    @classmethod
+    def iterate_frames(cls, settings, frames, vertex_animations, node_animations, snapshot_cache=None,
+                       action_name="", previous_frame=None):
+        # With collapse_held_frames, frames in which no F-curve changed value are not evaluated but stored as
+        # a longer run of the previous frame. A clip sampled in parts passes the frame sampled before its part: the
+        # leading frames that do not change from it are not stored, their count is returned to extend the run of the
+        # previous part instead.
+        held_frame_curves = None
+        sampled_curve_values = None
+        if settings.collapse_held_frames:
+            held_frame_curves = animation_utils.get_held_frame_curves(settings.context)
+            if held_frame_curves is not None and previous_frame is not None:
+                sampled_curve_values = animation_utils.evaluate_curves(held_frame_curves, previous_frame)
+        leading_held_frame_count = 0
+        saved_frame = False
+
+        for frame_number, frame in enumerate(frames, 1):
+            if held_frame_curves is not None:
+                curve_values = animation_utils.evaluate_curves(held_frame_curves, frame)
+                if curve_values == sampled_curve_values:
+                    if saved_frame:
+                        cls.hold_frame(vertex_animations, node_animations)
+                    else:
+                        leading_held_frame_count += 1
+                    yield frame_number / len(frames)
+                    continue
+                sampled_curve_values = curve_values
+
+            cls.save_frame(settings.context, frame, vertex_animations, node_animations, snapshot_cache, action_name)
+            saved_frame = True
+            yield frame_number / len(frames)
+        return leading_held_frame_count
 
     @classmethod
-    def __save_vertex_animation_frame(cls, node, vertex_animation, depsgraph) -> None:
+    def __save_vertex_animation_frame(cls, node, vertex_animation, snapshot) -> None:
         vertex_offsets = []
         vertex_rotations = []
 
         for obj in node.mesh_objects:
-            cls.__save_vertex_animation_vertices(node, depsgraph, obj, vertex_offsets, vertex_rotations)
-
-        vertex_animation_frame = vertex_animation.frames.add()
+            cls.__save_vertex_animation_vertices(node, snapshot.meshes[obj.name], obj.name, vertex_offsets,
+                                                 vertex_rotations)
 
         vertex_offsets_properties = vertex_properties_utils.create_vector3(vertex_offsets, "offset")
         vertex_rotations_properties = vertex_properties_utils.create_vector4(vertex_rotations, "rotation")
-        vertex_animation_frame.vertexProperties.append(vertex_offsets_properties)
-        vertex_animation_frame.vertexProperties.append(vertex_rotations_properties)
+        vertex_animation.add_frame([vertex_offsets_properties, vertex_rotations_properties])
 
     @classmethod
-    def __save_vertex_animation_vertices(cls, node, depsgraph, obj, vertex_offsets, vertex_rotations) -> None:
-        frame_mesh = None
-        try:
-            evaluated_object = obj.evaluated_get(depsgraph)
-            frame_mesh = blender_utils.create_mesh(evaluated_object, obj.matrix_world)
-
-            original_world_matrix_inverted = node.original_object_meshes[obj.name].world_matrix_inverted
-            original_node_matrix = node.original_object_meshes[obj.name].node_matrix
-            original_vertices = node.original_object_meshes[obj.name].vertices
-
-            transformation_matrix = original_node_matrix @ original_world_matrix_inverted
-            transformation_matrix_rotation = transformation_matrix.to_quaternion()
-            vertex_rotation_matrix = mathutils.Matrix.Identity(3)
-
-            vertex_counter = 0
-            for original_vertex in original_vertices:
-                if vertex_counter < node.animated_vertex_count:
-                    vertex_counter += 1
-                    loop_index = original_vertex.source_loop_index
-                    loop = frame_mesh.loops[loop_index]
-                    frame_vertex = frame_mesh.vertices[original_vertex.source_index]
-
-                    position_in_node_space = transformation_matrix @ frame_vertex.co
-                    vertex_offset = position_in_node_space - original_vertex.position
-
-                    vertex_normal = transformation_matrix_rotation @ loop.normal
-                    vertex_tangent = transformation_matrix_rotation @ loop.tangent
-                    vertex_bitangent = vertex_normal.cross(vertex_tangent)
-
-                    vertex_rotation_matrix.col[0] = vertex_normal
-                    vertex_rotation_matrix.col[1] = vertex_tangent
-                    vertex_rotation_matrix.col[2] = vertex_bitangent
-                    vertex_rotation_quaternion = vertex_rotation_matrix.to_quaternion()
-
-                    vertex_offsets.append(mathutils.Vector((-vertex_offset.x, vertex_offset.z, -vertex_offset.y)))
-                    vertex_rotations.append(
-                        mathutils.Vector((vertex_rotation_quaternion.x, -vertex_rotation_quaternion.z,
-                                          vertex_rotation_quaternion.y, vertex_rotation_quaternion.w)))
-        finally:
-            if frame_mesh is not None:
-                blender_utils.remove_mesh(frame_mesh)
+    def __save_vertex_animation_vertices(cls, node, frame_mesh, obj_name, vertex_offsets, vertex_rotations) -> None:
+        original_mesh = node.original_object_meshes[obj_name]
+        original_world_matrix_inverted = original_mesh.world_matrix_inverted
+        original_node_matrix = original_mesh.node_matrix
+
+        transformation_matrix = original_node_matrix @ original_world_matrix_inverted
+        transformation_matrix_rotation = transformation_matrix.to_quaternion()
+        vertex_rotation_matrix = mathutils.Matrix.Identity(3)
+
+        frame_positions = frame_mesh.positions.tolist()
+        frame_normals = frame_mesh.loop_normals.tolist()
+        frame_tangents = frame_mesh.loop_tangents.tolist()
+        animated_vertex_count = node.animated_vertex_count
+        for source_index, loop_index, original_position in zip(
+                original_mesh.source_indices[:animated_vertex_count].tolist(),
+                original_mesh.source_loop_indices[:animated_vertex_count].tolist(),
+                original_mesh.positions[:animated_vertex_count].tolist()):
+            frame_vertex_position = mathutils.Vector(frame_positions[source_index])
+
+            position_in_node_space = transformation_matrix @ frame_vertex_position
+            vertex_offset = position_in_node_space - mathutils.Vector(original_position)
+
+            vertex_normal = transformation_matrix_rotation @ mathutils.Vector(frame_normals[loop_index])
+            vertex_tangent = transformation_matrix_rotation @ mathutils.Vector(frame_tangents[loop_index])
+            vertex_bitangent = vertex_normal.cross(vertex_tangent)
+
+            vertex_rotation_matrix.col[0] = vertex_normal
+            vertex_rotation_matrix.col[1] = vertex_tangent
+            vertex_rotation_matrix.col[2] = vertex_bitangent
+            vertex_rotation_quaternion = vertex_rotation_matrix.to_quaternion()
+
+            vertex_offsets.append(mathutils.Vector((-vertex_offset.x, vertex_offset.z, -vertex_offset.y)))
+            vertex_rotations.append(
+                mathutils.Vector((vertex_rotation_quaternion.x, -vertex_rotation_quaternion.z,
+                                  vertex_rotation_quaternion.y, vertex_rotation_quaternion.w)))
 
     @classmethod
-    def __save_node_animation_frame(cls, node, node_animation, depsgraph) -> None:
-        node_animation_frame = node_animation.frames.add()
+    def __save_node_animation_frame(cls, node, node_animation, snapshot) -> None:
         source_object = node.hierarchy_node.source_object
-        evaluated_object = source_object.evaluated_get(depsgraph)
-
-        local_matrix = blender_utils.get_local_matrix(evaluated_object)
+        local_matrix = mathutils.Matrix(snapshot.local_matrices[source_object.name].tolist())
         object_position = local_matrix.to_translation()
         object_rotation = local_matrix.to_quaternion()
         object_scale = local_matrix.to_scale()
 
-        node_animation_frame.position.x = -object_position.x
-        node_animation_frame.position.y = object_position.z
-        node_animation_frame.position.z = -object_position.y
-
-        node_animation_frame.rotation.x = object_rotation.x
-        node_animation_frame.rotation.y = -object_rotation.z
-        node_animation_frame.rotation.z = object_rotation.y
-        node_animation_frame.rotation.w = object_rotation.w
-
-        node_animation_frame.scale.x = object_scale.x
-        node_animation_frame.scale.y = object_scale.z
-        node_animation_frame.scale.z = object_scale.y
+        node_animation.add_frame((-object_position.x, object_position.z, -object_position.y),
+                                 (object_rotation.x, -object_rotation.z, object_rotation.y, object_rotation.w),
+                                 (object_scale.x, object_scale.z, object_scale.y))
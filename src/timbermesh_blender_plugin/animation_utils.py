@@ -1,9 +1,18 @@
-﻿import exporter_utils
+﻿import math
+import re
+import bpy
+import exporter_utils
 import blender_types
 
+# Modifiers that change the evaluated mesh over time without any F-curve changing.
+TIME_DEPENDENT_MODIFIERS = {"CLOTH", "COLLISION", "DYNAMIC_PAINT", "EXPLODE", "FLUID", "MESH_CACHE",
+                            "MESH_SEQUENCE_CACHE", "NODES", "OCEAN", "PARTICLE_SYSTEM", "SOFT_BODY", "WAVE"}
+ANIMATED_DATA_COLLECTIONS = ["objects", "shape_keys", "armatures", "curves", "lattices"]
+POSE_BONE_DATA_PATH = re.compile(r'^pose\.bones\["((?:[^"\\]|\\.)*)"\]')
+
 
 def can_use_vertex_animations(node) -> bool:
-    return len(node.vertices) > 0
+    return node.vertex_count > 0
 
 
 def can_use_node_animations(node) -> bool:
@@ -31,5 +40,100 @@ def is_any_object_animated_in_hierarchy(node):
     return False
 
 
+def is_action_relevant(node, action) -> bool:
+    # An action is relevant to a node when it is the own action of an object the node follows, or when it animates
+    # the transform or a bone of an armature the node follows (clip actions are assigned to all armatures).
+    data_paths = None
+    for obj in __get_source_objects(node):
+        if obj.type != blender_types.ARMATURE:
+            if __is_object_animated(obj) and obj.animation_data.action == action:
+                return True
+            continue
+
+        if data_paths is None:
+            data_paths = [curve.data_path for curve in get_action_curves(action)]
+        bone_names = {bone.name for bone in obj.data.bones}
+        for data_path in data_paths:
+            bone_path = POSE_BONE_DATA_PATH.match(data_path)
+            if bone_path is None or bone_path.group(1).replace('\\"', '"') in bone_names:
+                return True
+    return False
+
+
+def get_action_curves(action, action_slot=None) -> list:
+    # Returns the F-curves that the given slot of the action animates, or those of every slot when no slot is given
+    # (e.g. before a clip action is assigned).
+    if hasattr(action, "fcurves"):
+        return list(action.fcurves)
+    # Blender 5.0 removed Action.fcurves, the curves of layered actions live in per-slot channel bags.
+    from bpy_extras import anim_utils
+    action_slots = [action_slot] if action_slot is not None else list(action.slots)
+    curves = []
+    for slot in action_slots:
+        channelbag = anim_utils.action_get_channelbag_for_slot(action, slot)
+        if channelbag is not None:
+            curves.extend(channelbag.fcurves)
+    return curves
+
+
+def get_sample_step(settings) -> float:
+    # Returns the number of scene frames between two samples. Animations are sampled at the scene framerate unless
+    # a lower target framerate is set.
+    scene_framerate = settings.context.scene.render.fps
+    if settings.target_framerate <= 0 or settings.target_framerate >= scene_framerate:
+        return 1
+    return scene_framerate / settings.target_framerate
+
+
+def get_sample_frames(frame_start, frame_end, sample_step) -> list:
+    # Returns the (possibly fractional) frames to sample between frame_start and frame_end (exclusive).
+    if sample_step == 1:
+        return range(frame_start, frame_end)
+    sample_count = math.ceil((frame_end - frame_start) / sample_step - 1e-6)
+    return [frame_start + sample_index * sample_step for sample_index in range(sample_count)]
+
+
+def get_held_frame_curves(context) -> list:
+    # Returns the F-curves that decide the evaluated scene, or None when frames can change without any F-curve
+    # changing value (drivers, NLA strips or simulations).
+    for obj in context.scene.objects:
+        if any(modifier.type in TIME_DEPENDENT_MODIFIERS for modifier in obj.modifiers):
+            return None
+
+    curves = []
+    for collection_name in ANIMATED_DATA_COLLECTIONS:
+        for animated_data in getattr(bpy.data, collection_name):
+            animation_data = animated_data.animation_data
+            if animation_data is None:
+                continue
+            if len(animation_data.drivers) > 0 or len(animation_data.nla_tracks) > 0:
+                return None
+            if animation_data.action is not None:
+                # Action slots were added in Blender 4.4.
+                action_slot = getattr(animation_data, "action_slot", None)
+                curves.extend(get_action_curves(animation_data.action, action_slot))
+    return curves
+
+
+def evaluate_curves(curves, frame) -> list:
+    return [curve.evaluate(frame) for curve in curves]
+
+
+def __get_source_objects(node) -> list:
+    # Returns the objects whose animation moves or deforms the node: its objects, the armatures deforming them and
+    # all their parents.
+    objects = []
+    objects_to_visit = list(node.hierarchy_node.object_matrix_stack)
+    while objects_to_visit:
+        obj = objects_to_visit.pop()
+        if obj is None or obj in objects:
+            continue
+        objects.append(obj)
+        objects_to_visit.append(obj.parent)
+        objects_to_visit.extend(modifier.object for modifier in obj.modifiers
+                                if modifier.type == blender_types.ARMATURE)
+    return objects
+
+
 def __is_object_animated(obj):
     return obj is not None and obj.animation_data is not None and obj.animation_data.action is not None
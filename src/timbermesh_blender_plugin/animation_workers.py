@@ -0,0 +1,254 @@
+import array
+import json
+import math
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+
+if __name__ == "__main__":
+    sys.path.append(os.path.dirname(__file__))
+
+import bpy
+import animation_utils
+import blender_types
+import blender_utils
+import exporter_utils
+import vertex_properties_utils
+import work_slices
+from animation_builder import AnimationBuilder
+from hierarchy import Hierarchy
+from node_builder import NodeBuilder
+
+# Samples animation frames in background Blender processes. The scene is saved to a temporary .blend file, every
+# worker opens it, builds the same nodes as the exporter and samples the frames of one clip that fall into its frame
+# range. The sampled frames are sent back as raw buffers and appended in frame order to the animation records of the
+# exported nodes.
+MIN_FRAMES_PER_JOB = 25
+POLL_INTERVAL = 0.05
+
+
+class AnimationJob:
+    def __init__(self, index, clip_index, clip_name, action_name, frame_start, frame_end):
+        self.index = index
+        self.clip_index = clip_index
+        self.clip_name = clip_name
+        self.action_name = action_name
+        self.frame_start = frame_start
+        self.frame_end = frame_end
+        self.process = None
+        self.output_path = ""
+        self.log_path = ""
+
+
+def iterate_animations(collection, nodes, settings):
+    worker_count = settings.animation_workers
+    clips = __get_clips(settings)
+    clip_records = __create_clip_records(clips, nodes, settings)
+    jobs = __create_jobs(clips, clip_records, worker_count)
+    if not jobs:
+        return
+
+    with tempfile.TemporaryDirectory(prefix="timbermesh_") as directory:
+        blend_path = os.path.join(directory, "scene.blend")
+        bpy.ops.wm.save_as_mainfile(filepath=blend_path, copy=True, check_existing=False)
+        print("Sampling", len(jobs), "animation frame ranges in", worker_count, "worker processes")
+
+        waiting_jobs = list(jobs)
+        running_jobs = []
+        finished_job_count = 0
+        try:
+            while waiting_jobs or running_jobs:
+                while waiting_jobs and len(running_jobs) < worker_count:
+                    job = waiting_jobs.pop(0)
+                    __start_job(job, collection, settings, blend_path, directory)
+                    running_jobs.append(job)
+
+                for job in list(running_jobs):
+                    try:
+                        job.process.wait(POLL_INTERVAL / len(running_jobs))
+                    except subprocess.TimeoutExpired:
+                        continue
+                    running_jobs.remove(job)
+                    __check_job(job)
+                    finished_job_count += 1
+
+                yield finished_job_count / len(jobs)
+        finally:
+            for job in running_jobs:
+                job.process.kill()
+                job.process.wait()
+
+        for job in jobs:
+            __merge_job(job, nodes, clip_records[job.clip_index])
+
+
+def run_worker(job_path, output_path) -> None:
+    import timbermesh_exporter
+
+    with open(job_path) as file:
+        job = json.load(file)
+
+    context = bpy.context
+    settings = timbermesh_exporter.ExportSettings(context, job["merge_meshes"], job["action"] is None,
+                                                  job["use_vertex_animations"],
+                                                  use_packed_node_animations=job["use_packed_node_animations"],
+                                                  collapse_held_frames=job["collapse_held_frames"],
+                                                  target_framerate=job["target_framerate"],
+                                                  skip_unaffected_actions=job["skip_unaffected_actions"])
+    collection = bpy.data.collections[job["collection"]]
+
+    context.scene.frame_set(0)
+    objects_to_export = exporter_utils.get_exportable_objects(collection.all_objects)
+    root_hierarchy_node = Hierarchy.create(objects_to_export, collection.name, settings.merge_meshes)
+    nodes = NodeBuilder.create_nodes(root_hierarchy_node, context)
+
+    action = __get_action(job["action"])
+    if action is not None:
+        AnimationBuilder.set_action_to_all_armatures(action, settings)
+    vertex_animations, node_animations = AnimationBuilder.create_animation_records(job["clip"], nodes, settings,
+                                                                                   action)
+    clip_frame_start, clip_frame_end = next((frame_start, frame_end) for name, _, frame_start, frame_end
+                                            in __get_clips(settings) if name == job["clip"])
+    sample_frames = animation_utils.get_sample_frames(clip_frame_start, clip_frame_end,
+                                                      animation_utils.get_sample_step(settings))
+    frame_indices = [index for index, frame in enumerate(sample_frames)
+                     if job["frame_start"] <= frame < job["frame_end"]]
+    frames = [sample_frames[index] for index in frame_indices]
+    # Held frames are detected across job boundaries by comparing with the last frame of the previous job.
+    previous_frame = sample_frames[frame_indices[0] - 1] if frame_indices and frame_indices[0] > 0 else None
+    leading_held_frame_count = work_slices.run(AnimationBuilder.iterate_frames(settings, frames, vertex_animations,
+                                                                               node_animations,
+                                                                               previous_frame=previous_frame))
+
+    node_indices = {node: index for index, node in enumerate(nodes)}
+    output = {
+        "node_names": [node.name for node in nodes],
+        "leading_held_frame_count": leading_held_frame_count,
+        "vertex_animations": {node_indices[node]: ([[(p.name, p.scalar_type, p.scalar_type_dimension, p.data)
+                                                     for p in frame] for frame in animation.frames],
+                                                   animation.frame_runs.tolist())
+                              for node, animation in vertex_animations.items()},
+        "node_animations": {node_indices[node]: (animation.frame_count, animation.positions.tobytes(),
+                                                 animation.rotations.tobytes(), animation.scales.tobytes(),
+                                                 animation.frame_runs.tolist())
+                            for node, animation in node_animations.items()}
+    }
+    with open(output_path, "wb") as file:
+        pickle.dump(output, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def __get_clips(settings) -> list:
+    # Returns (clip name, action name, first frame, end frame) for every exported clip.
+    if settings.single_animation:
+        frame_start, frame_end = blender_utils.get_scene_frame_range(settings.context.scene)
+        return [("Default", None, int(frame_start), int(frame_end))]
+    return [(action.name, action.name, int(action.frame_range[0]), int(action.frame_range[1]))
+            for action in bpy.data.actions]
+
+
+def __get_action(action_name):
+    return bpy.data.actions[action_name] if action_name is not None else None
+
+
+def __create_clip_records(clips, nodes, settings) -> list:
+    # Creates the records with the clip action assigned to all armatures, like the sequential exporter does, since
+    # it decides which nodes the armatures animate. The original armature actions are restored afterwards.
+    armatures = [obj for obj in settings.context.selectable_objects if obj.type == blender_types.ARMATURE]
+    original_actions = [obj.animation_data.action for obj in armatures]
+    try:
+        clip_records = []
+        for name, action_name, _, _ in clips:
+            action = __get_action(action_name)
+            if action is not None:
+                AnimationBuilder.set_action_to_all_armatures(action, settings)
+            clip_records.append(AnimationBuilder.create_animation_records(name, nodes, settings, action))
+        return clip_records
+    finally:
+        for obj, action in zip(armatures, original_actions):
+            obj.animation_data.action = action
+
+
+def __create_jobs(clips, clip_records, worker_count) -> list:
+    animated_clips = [(index, clip) for index, clip in enumerate(clips) if any(clip_records[index])]
+    jobs = []
+    for clip_index, (clip_name, action_name, frame_start, frame_end) in animated_clips:
+        frame_count = frame_end - frame_start
+        job_count = min(math.ceil(worker_count / len(animated_clips)), max(1, frame_count // MIN_FRAMES_PER_JOB))
+        for job_index in range(job_count):
+            job_start = frame_start + frame_count * job_index // job_count
+            job_end = frame_start + frame_count * (job_index + 1) // job_count
+            jobs.append(AnimationJob(len(jobs), clip_index, clip_name, action_name, job_start, job_end))
+    return jobs
+
+
+def __start_job(job, collection, settings, blend_path, directory) -> None:
+    job_path = os.path.join(directory, "job" + str(job.index) + ".json")
+    job.output_path = os.path.join(directory, "job" + str(job.index) + ".pickle")
+    job.log_path = os.path.join(directory, "job" + str(job.index) + ".log")
+    with open(job_path, "w") as file:
+        json.dump({"collection": collection.name,
+                   "merge_meshes": settings.merge_meshes,
+                   "use_vertex_animations": settings.use_vertex_animations,
+                   "use_packed_node_animations": settings.use_packed_node_animations,
+                   "collapse_held_frames": settings.collapse_held_frames,
+                   "target_framerate": settings.target_framerate,
+                   "skip_unaffected_actions": settings.skip_unaffected_actions,
+                   "clip": job.clip_name,
+                   "action": job.action_name,
+                   "frame_start": job.frame_start,
+                   "frame_end": job.frame_end}, file)
+
+    with open(job.log_path, "w") as log:
+        job.process = subprocess.Popen([bpy.app.binary_path, "--background", "--factory-startup", blend_path,
+                                        "--python-exit-code", "1", "--python", os.path.abspath(__file__),
+                                        "--", job_path, job.output_path],
+                                       stdout=log, stderr=subprocess.STDOUT)
+
+
+def __check_job(job) -> None:
+    if job.process.returncode != 0 or not os.path.exists(job.output_path):
+        with open(job.log_path) as log:
+            output = log.read()
+        raise RuntimeError("Animation worker for " + job.clip_name + " frames " + str(job.frame_start) + "-"
+                           + str(job.frame_end - 1) + " failed:\n" + output[-2000:])
+
+
+def __merge_job(job, nodes, clip_records) -> None:
+    with open(job.output_path, "rb") as file:
+        output = pickle.load(file)
+    if output["node_names"] != [node.name for node in nodes]:
+        raise RuntimeError("Animation worker exported different nodes than the running Blender")
+
+    vertex_animations, node_animations = clip_records
+    held_frame_count = output["leading_held_frame_count"]
+    node_indices = {node: index for index, node in enumerate(nodes)}
+    for node, animation in vertex_animations.items():
+        frames, frame_runs = output["vertex_animations"][node_indices[node]]
+        __append_frame_runs(animation, len(animation.frames), len(frames), frame_runs, held_frame_count)
+        for frame in frames:
+            animation.frames.append([vertex_properties_utils.VertexProperty(*p) for p in frame])
+    for node, animation in node_animations.items():
+        frame_count, positions, rotations, scales, frame_runs = output["node_animations"][node_indices[node]]
+        __append_frame_runs(animation, animation.frame_count, frame_count, frame_runs, held_frame_count)
+        animation.frame_count += frame_count
+        animation.positions.frombytes(positions)
+        animation.rotations.frombytes(rotations)
+        animation.scales.frombytes(scales)
+
+
+def __append_frame_runs(animation, stored_frame_count, added_frame_count, frame_runs, held_frame_count) -> None:
+    # The first held_frame_count frames of the job repeat the last frame of the previous job.
+    if not frame_runs and not animation.frame_runs and not held_frame_count:
+        return
+    if not animation.frame_runs:
+        animation.frame_runs = array.array("i", [1] * stored_frame_count)
+    if held_frame_count:
+        animation.frame_runs[-1] += held_frame_count
+    animation.frame_runs.extend(frame_runs if frame_runs else [1] * added_frame_count)
+
+
+if __name__ == "__main__":
+    arguments = sys.argv[sys.argv.index("--") + 1:]
+    run_worker(arguments[0], arguments[1])
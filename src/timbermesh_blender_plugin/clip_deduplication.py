@@ -0,0 +1,74 @@
+import array
+import hashlib
+import thread_pools
+
+# Stores the clips of a node whose sampled frames equal an earlier clip of the same node only once. The later clip
+# keeps its name and framerate, drops its frames and names the earlier clip in shared_clip. Clips are compared by a
+# hash of their frame data, so equal actions and actions that do not affect the node are detected after sampling.
+
+
+def deduplicate_clips(nodes, thread_pool=None) -> int:
+    # Returns the number of clips that were replaced by references.
+    thread_pool = thread_pool or thread_pools.ThreadPool(0)
+    return sum(thread_pool.imap(__deduplicate_node, nodes))
+
+
+def __deduplicate_node(node) -> int:
+    return __deduplicate(node.vertex_animations, __get_vertex_animation_digest, __clear_vertex_animation) \
+        + __deduplicate(node.node_animations, __get_node_animation_digest, __clear_node_animation)
+
+
+def __deduplicate(animations, get_digest, clear) -> int:
+    clip_names = {}
+    shared_clip_count = 0
+    for animation in animations:
+        digest = get_digest(animation)
+        if digest is None:
+            continue
+        if digest not in clip_names:
+            clip_names[digest] = animation.name
+            continue
+        clear(animation)
+        animation.shared_clip = clip_names[digest]
+        shared_clip_count += 1
+    return shared_clip_count
+
+
+def __get_vertex_animation_digest(vertex_animation):
+    if not vertex_animation.frames:
+        return None
+    digest = hashlib.sha1()
+    digest.update(repr((vertex_animation.framerate, vertex_animation.animated_vertex_count)).encode())
+    for frame in vertex_animation.frames:
+        for vertex_property in frame:
+            digest.update(repr((vertex_property.name, vertex_property.scalar_type,
+                                vertex_property.scalar_type_dimension, len(vertex_property.data))).encode())
+            digest.update(vertex_property.data)
+    digest.update(vertex_animation.frame_runs.tobytes())
+    return digest.digest()
+
+
+def __get_node_animation_digest(node_animation):
+    if not node_animation.frame_count:
+        return None
+    digest = hashlib.sha1()
+    digest.update(repr((node_animation.framerate, node_animation.packed, node_animation.frame_count,
+                        len(node_animation.frame_runs), len(node_animation.key_frames))).encode())
+    for values in (node_animation.positions, node_animation.rotations, node_animation.scales,
+                   node_animation.frame_runs, node_animation.key_frames):
+        digest.update(values.tobytes())
+    return digest.digest()
+
+
+def __clear_vertex_animation(vertex_animation) -> None:
+    vertex_animation.frames = []
+    vertex_animation.frame_runs = array.array("i")
+
+
+def __clear_node_animation(node_animation) -> None:
+    node_animation.frame_count = 0
+    node_animation.positions = array.array("f")
+    node_animation.rotations = array.array("f")
+    node_animation.scales = array.array("f")
+    node_animation.frame_runs = array.array("i")
+    node_animation.key_frames = array.array("i")
@@ -0,0 +1,76 @@
+import queue
+import threading
+
+# Runs the stages of a batch export concurrently: the caller captures collections from Blender on the main thread and
+# puts them into the pipeline, an encode thread serializes and compresses them and an I/O thread writes the files.
+# The bounded queues between the stages cap how many captured and encoded collections are held in memory at once.
+# Items pass every stage in the order they were put, after an error or cancellation the remaining items are dropped.
+STAGE_QUEUE_SIZE = 1
+QUEUE_POLL_INTERVAL = 0.05
+
+
+class ExportPipeline:
+    def __init__(self, encode, write, queue_size=STAGE_QUEUE_SIZE):
+        self.__encode_queue = queue.Queue(queue_size)
+        self.__write_queue = queue.Queue(queue_size)
+        self.__cancelled = threading.Event()
+        self.__errors = []
+        self.__threads = [
+            threading.Thread(target=self.__run_stage, args=(encode, self.__encode_queue, self.__write_queue),
+                             name="timbermesh_encode", daemon=True),
+            threading.Thread(target=self.__run_stage, args=(write, self.__write_queue, None),
+                             name="timbermesh_write", daemon=True)
+        ]
+        self.__closed = False
+        for thread in self.__threads:
+            thread.start()
+
+    def iterate_put(self, item, progress):
+        # Yields the given progress while the encode stage is still busy with earlier items.
+        while True:
+            self.__raise_error()
+            try:
+                self.__encode_queue.put(item, timeout=QUEUE_POLL_INTERVAL)
+                return
+            except queue.Full:
+                yield progress
+
+    def iterate_finish(self, progress):
+        # Waits until every item has been written, yielding the given progress in the meantime.
+        self.__encode_queue.put(None)
+        self.__closed = True
+        for thread in self.__threads:
+            while thread.is_alive():
+                thread.join(QUEUE_POLL_INTERVAL)
+                yield progress
+        self.__raise_error()
+
+    def close(self) -> None:
+        # Drops the items that have not been written yet and waits for the stage threads to stop.
+        self.__cancelled.set()
+        if not self.__closed:
+            self.__encode_queue.put(None)
+            self.__closed = True
+        for thread in self.__threads:
+            thread.join()
+
+    def __run_stage(self, process, input_queue, output_queue) -> None:
+        while True:
+            item = input_queue.get()
+            if item is None:
+                break
+            if self.__cancelled.is_set() or self.__errors:
+                continue
+            try:
+                result = process(item)
+            except Exception as error:
+                self.__errors.append(error)
+                continue
+            if output_queue is not None:
+                output_queue.put(result)
+        if output_queue is not None:
+            output_queue.put(None)
+
+    def __raise_error(self) -> None:
+        if self.__errors:
+            raise self.__errors[0]
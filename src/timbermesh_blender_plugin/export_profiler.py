@@ -0,0 +1,157 @@
+import contextlib
+import json
+import sys
+import time
+import tracemalloc
+
+MEGABYTE = 1 << 20
+
+
+def get_rss() -> (int, int):
+    # Returns the current and peak resident set size of the process in bytes, None where unavailable.
+    if sys.platform.startswith("linux"):
+        return __get_linux_rss()
+    if sys.platform == "win32":
+        return __get_windows_rss()
+    return None, __get_resource_peak_rss()
+
+
+def __get_linux_rss() -> (int, int):
+    values = {}
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                key, _, value = line.partition(":")
+                if key in ("VmRSS", "VmHWM"):
+                    values[key] = int(value.split()[0]) * 1024
+    except OSError:
+        return None, None
+    return values.get("VmRSS"), values.get("VmHWM")
+
+
+def __get_windows_rss() -> (int, int):
+    import ctypes
+    from ctypes import wintypes
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD),
+                    ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t),
+                    ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t),
+                    ("PeakPagefileUsage", ctypes.c_size_t)]
+
+    counters = ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    process = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+        return None, None
+    return counters.WorkingSetSize, counters.PeakWorkingSetSize
+
+
+def __get_resource_peak_rss() -> int:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere.
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+
+def format_megabytes(value) -> str:
+    return "{0:.1f} MB".format(value / MEGABYTE) if value is not None else "n/a"
+
+
+class PhaseProfile:
+    def __init__(self, name):
+        self.name = name
+        self.time = 0.0
+        self.peak_memory = None
+        self.retained_memory = None
+        self.rss = None
+        self.retained_rss = None
+        self.peak_rss = None
+
+    def to_dict(self) -> dict:
+        return dict(self.__dict__)
+
+
+class ExportProfiler:
+    # Without measure_memory only the time of every phase is recorded, which keeps tracemalloc from slowing it down.
+    def __init__(self, enabled=False, measure_memory=True):
+        self.enabled = enabled
+        self.measure_memory = measure_memory
+        self.phases = []
+        self.__started_tracemalloc = False
+
+    def start(self) -> None:
+        if self.enabled and self.measure_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.__started_tracemalloc = True
+
+    def stop(self) -> None:
+        if self.__started_tracemalloc:
+            tracemalloc.stop()
+            self.__started_tracemalloc = False
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        if not self.enabled:
+            yield
+            return
+
+        phase = PhaseProfile(name)
+        self.phases.append(phase)
+        if not self.measure_memory:
+            start_time = time.perf_counter()
+            try:
+                yield
+            finally:
+                phase.time = time.perf_counter() - start_time
+            return
+
+        start_memory = self.__reset_traced_peak()
+        start_rss = get_rss()[0]
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            phase.time = time.perf_counter() - start_time
+            current_memory, peak_memory = tracemalloc.get_traced_memory()
+            phase.peak_memory = peak_memory - start_memory
+            phase.retained_memory = current_memory - start_memory
+            phase.rss, phase.peak_rss = get_rss()
+            if phase.rss is not None and start_rss is not None:
+                phase.retained_rss = phase.rss - start_rss
+
+    @staticmethod
+    def __reset_traced_peak() -> int:
+        # Returns the traced memory the phase starts from. tracemalloc.reset_peak needs Python 3.9, before that the traces
+        # are cleared instead, so memory allocated before the phase and freed during it is not subtracted.
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        else:
+            tracemalloc.clear_traces()
+        return tracemalloc.get_traced_memory()[0]
+
+    def print_summary(self) -> None:
+        if not self.phases or not self.measure_memory:
+            return
+        print("Memory per export phase (Python peak, Python retained, RSS retained, RSS, process peak RSS):")
+        for phase in self.phases:
+            print("  {0:<32}{1:>8.2f} s{2:>12}{3:>12}{4:>12}{5:>12}{6:>12}".format(
+                phase.name, phase.time, format_megabytes(phase.peak_memory),
+                format_megabytes(phase.retained_memory), format_megabytes(phase.retained_rss),
+                format_megabytes(phase.rss), format_megabytes(phase.peak_rss)))
+
+    def to_dict(self) -> dict:
+        return {"phases": [phase.to_dict() for phase in self.phases]}
+
+    def write_json(self, path) -> None:
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
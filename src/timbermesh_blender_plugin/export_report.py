@@ -0,0 +1,133 @@
+import json
+
+# Builds a JSON-friendly breakdown of where the bytes of an exported model go: per node vertex counts, index
+# counts, vertex property and vertex animation texture sizes, per clip frame counts and sizes, and the total
+# serialized and compressed sizes.
+# Sizes are the uncompressed wire format sizes of the corresponding messages, recorded by the writer while encoding
+# the model, keyed by the record. For the indexed container, the compressed size of every chunk is added from the
+# container index.
+
+
+def create_report(nodes, serialized_size, compressed_size, sizes, container_index=None) -> dict:
+    container_nodes = container_index.nodes if container_index is not None else [None] * len(nodes)
+    node_reports = [__create_node_report(node, container_node, sizes)
+                    for node, container_node in zip(nodes, container_nodes)]
+    return {
+        "container": "indexed" if container_index is not None else "zlib",
+        "nodes": node_reports,
+        "clips": __create_clip_reports(node_reports),
+        "vertex_count": sum(node.vertex_count for node in nodes),
+        "index_count": sum(len(mesh.indices) for node in nodes for mesh in node.meshes),
+        "serialized_size": serialized_size,
+        "compressed_size": compressed_size,
+        "compression_ratio": serialized_size / compressed_size if compressed_size else None
+    }
+
+
+def get_container_serialized_size(container_index) -> int:
+    return sum(chunk.uncompressedSize for chunk in __get_container_chunks(container_index))
+
+
+def write_report(report, path) -> None:
+    with open(path, "w") as file:
+        json.dump(report, file, indent=2)
+
+
+def __create_node_report(node, container_node, sizes) -> dict:
+    index_count = sum(len(mesh.indices) for mesh in node.meshes)
+    node_report = {
+        "name": node.name,
+        "parent_index": node.parent_index,
+        "size": sizes[node],
+        "source_vertex_count": node.source_vertex_count,
+        # Every triangle corner is a separate vertex until equal corners are merged.
+        "vertex_count_before_dedup": index_count,
+        "vertex_count": node.vertex_count,
+        "index_count": index_count,
+        "meshes": [{"material": mesh.material,
+                    "index_count": len(mesh.indices),
+                    "triangle_count": len(mesh.indices) // 3,
+                    "size": sizes[mesh]} for mesh in node.meshes],
+        "vertex_properties": [{"name": vertex_property.name,
+                               "scalar_type_dimension": vertex_property.scalar_type_dimension,
+                               "data_size": len(vertex_property.data),
+                               "size": sizes[vertex_property]}
+                              for vertex_property in node.vertex_properties],
+        "animations": [{"name": animation.name,
+                        "type": "vertex",
+                        "frame_count": sum(animation.frame_runs) or len(animation.frames),
+                        "stored_frame_count": len(animation.frames),
+                        "shared_clip": animation.shared_clip,
+                        "size": sizes[animation]}
+                       for animation in node.vertex_animations]
+                      + [{"name": animation.name,
+                          "type": "node",
+                          "frame_count": __get_node_animation_frame_count(animation),
+                          "stored_frame_count": animation.frame_count,
+                          "shared_clip": animation.shared_clip,
+                          "size": sizes[animation]}
+                         for animation in node.node_animations],
+        "vertex_animation_textures": [{"name": texture.name,
+                                       "width": texture.width,
+                                       "height": texture.height,
+                                       "data_size": len(texture.data),
+                                       "size": sizes[texture]}
+                                      for texture in node.vertex_animation_textures]
+    }
+    __set_shared_clip_frame_counts(node_report["animations"])
+
+    if container_node is not None:
+        node_report["compressed_size"] = sum(chunk.size for chunk in __get_container_node_chunks(container_node))
+        chunks = list(container_node.vertexProperties)
+        for vertex_property_report, chunk in zip(node_report["vertex_properties"], chunks):
+            vertex_property_report["compressed_size"] = chunk.size
+        chunks = list(container_node.vertexAnimations) + list(container_node.nodeAnimations)
+        for animation_report, chunk in zip(node_report["animations"], chunks):
+            animation_report["compressed_size"] = chunk.size
+        for texture_report, chunk in zip(node_report["vertex_animation_textures"],
+                                         container_node.vertexAnimationTextures):
+            texture_report["compressed_size"] = chunk.size
+
+    return node_report
+
+
+def __get_node_animation_frame_count(node_animation) -> int:
+    if node_animation.key_frames:
+        return node_animation.key_frames[-1] + 1
+    return sum(node_animation.frame_runs) or node_animation.frame_count
+
+
+def __set_shared_clip_frame_counts(animation_reports) -> None:
+    # Deduplicated clips store no frames, they play the frames of the clip they share.
+    frame_counts = {(report["type"], report["name"]): report["frame_count"] for report in animation_reports
+                    if not report["shared_clip"]}
+    for report in animation_reports:
+        if report["shared_clip"]:
+            report["frame_count"] = frame_counts.get((report["type"], report["shared_clip"]), report["frame_count"])
+
+
+def __create_clip_reports(node_reports) -> list:
+    clips = {}
+    for node_report in node_reports:
+        for animation_report in node_report["animations"]:
+            clip = clips.setdefault(animation_report["name"], {"name": animation_report["name"],
+                                                               "frame_count": 0,
+                                                               "stored_frame_count": 0,
+                                                               "node_count": 0,
+                                                               "size": 0})
+            clip["frame_count"] = max(clip["frame_count"], animation_report["frame_count"])
+            clip["stored_frame_count"] = max(clip["stored_frame_count"], animation_report["stored_frame_count"])
+            clip["node_count"] += 1
+            clip["size"] += animation_report["size"]
+            if "compressed_size" in animation_report:
+                clip["compressed_size"] = clip.get("compressed_size", 0) + animation_report["compressed_size"]
+    return list(clips.values())
+
+
+def __get_container_chunks(container_index) -> list:
+    return [chunk for container_node in container_index.nodes for chunk in __get_container_node_chunks(container_node)]
+
+
+def __get_container_node_chunks(container_node) -> list:
+    return [container_node.node] + list(container_node.vertexProperties) + list(container_node.vertexAnimations) \
+        + list(container_node.nodeAnimations) + list(container_node.vertexAnimationTextures)
@@ -96,6 +96,10 @@ class BaseContainer(Sequence[_T]):
     """Returns the number of elements in the container."""
     return len(self._values)
 
+  def __iter__(self) -> Iterator[_T]:
+    """Iterates over the underlying list instead of Sequence.__iter__."""
+    return iter(self._values)
+
   def __ne__(self, other: Any) -> bool:
     """Checks if another instance isn't equal to this one."""
     # The concrete classes should define __eq__.
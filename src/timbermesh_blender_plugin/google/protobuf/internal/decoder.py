@@ -81,6 +81,7 @@ we repeatedly read a tag, look up the corresponding decoder, and invoke it.
 __author__ = 'kenton@google.com (Kenton Varda)'
 
 import math
+import re
 import struct
 
 from google.protobuf.internal import containers
@@ -245,6 +246,95 @@ def _SimpleDecoder(wire_type, decode_value):
   return SpecificDecoder
 
 
+# Packed varint runs (e.g. large index buffers) are decoded in bulk: a regular
+# expression splits the run into one token per varint in C, and tokens of up to
+# two bytes are resolved through a lookup table which is built on first use.
+_VARINT_TOKEN = re.compile(rb'[\x80-\xff]*[\x00-\x7f]')
+_LONG_VARINT = re.compile(rb'[\x80-\xff]{3}')
+_varint_decoding_table = None
+
+
+def _GetVarintDecodingTable():
+  """Returns a dict mapping every one- and two-byte varint to its value."""
+  global _varint_decoding_table
+  if _varint_decoding_table is None:
+    _varint_decoding_table = {
+        encoder._VarintBytes(value): value for value in range(1 << 14)}
+  return _varint_decoding_table
+
+
+def _DecodePackedVarints(data, decode_value):
+  """Decodes a complete run of packed varints and returns a list of values.
+
+  Args:
+    data: bytes of the packed run (without tag and length).
+    decode_value: the field's single value decoder, used for varints that are
+      longer than three bytes so that masking and sign handling stay the same.
+
+  Returns:
+    List of decoded values.
+  """
+  if data.isascii():
+    return list(data)
+  if data[-1] & 0x80:
+    raise _DecodeError('Packed element was truncated.')
+  table_get = _GetVarintDecodingTable().get
+  tokens = _VARINT_TOKEN.findall(data)
+  if _LONG_VARINT.search(data) is None:
+    # Every varint is at most three bytes long, so the remaining values are
+    # below 2**21 and can be decoded without masking or sign handling.
+    decode_short_varint = _DecodeShortVarint
+    values = [table_get(token) if len(token) < 3 else decode_short_varint(token)
+              for token in tokens]
+  else:
+    values = [table_get(token) if len(token) < 3 else decode_value(token, 0)[0]
+              for token in tokens]
+  if None in values:
+    # Overlong two-byte varints (e.g. 80 00) are not in the table.
+    values = [decode_value(token, 0)[0] if value is None else value
+              for token, value in zip(tokens, values)]
+  return values
+
+
+def _DecodeShortVarint(token):
+  """Decodes a varint of at most three bytes, including overlong ones."""
+  token_value = int.from_bytes(token, 'little')
+  return ((token_value & 0x7f) | ((token_value >> 1) & 0x3f80) |
+          ((token_value >> 2) & 0x1fc000))
+
+
+def _BulkVarintDecoder(wire_type, decode_value):
+  """Like _SimpleDecoder, but packed fields are decoded with
+  _DecodePackedVarints and handed to the container in one step."""
+
+  simple_decoder = _SimpleDecoder(wire_type, decode_value)
+
+  def SpecificDecoder(field_number, is_repeated, is_packed, key, new_default,
+                      clear_if_default=False):
+    if is_packed:
+      local_DecodeVarint = _DecodeVarint
+      local_DecodePackedVarints = _DecodePackedVarints
+      def DecodePackedField(buffer, pos, end, message, field_dict):
+        value = field_dict.get(key)
+        if value is None:
+          value = field_dict.setdefault(key, new_default(message))
+        (endpoint, pos) = local_DecodeVarint(buffer, pos)
+        endpoint += pos
+        if endpoint > end:
+          raise _DecodeError('Truncated message.')
+        if endpoint > pos:
+          # Decoded values are always in range, so the type checks done by
+          # append() can be skipped.
+          value.MergeFrom(local_DecodePackedVarints(
+              buffer[pos:endpoint].tobytes(), decode_value))
+        return endpoint
+      return DecodePackedField
+    return simple_decoder(field_number, is_repeated, is_packed, key,
+                          new_default, clear_if_default)
+
+  return SpecificDecoder
+
+
 def _ModifiedDecoder(wire_type, decode_value, modify_value):
   """Like SimpleDecoder but additionally invokes modify_value on every value
   before storing it.  Usually modify_value is ZigZagDecode.
@@ -511,14 +601,14 @@ def EnumDecoder(field_number, is_repeated, is_packed, key, new_default,
 # --------------------------------------------------------------------
 
 
-Int32Decoder = _SimpleDecoder(
+Int32Decoder = _BulkVarintDecoder(
     wire_format.WIRETYPE_VARINT, _DecodeSignedVarint32)
 
-Int64Decoder = _SimpleDecoder(
+Int64Decoder = _BulkVarintDecoder(
     wire_format.WIRETYPE_VARINT, _DecodeSignedVarint)
 
-UInt32Decoder = _SimpleDecoder(wire_format.WIRETYPE_VARINT, _DecodeVarint32)
-UInt64Decoder = _SimpleDecoder(wire_format.WIRETYPE_VARINT, _DecodeVarint)
+UInt32Decoder = _BulkVarintDecoder(wire_format.WIRETYPE_VARINT, _DecodeVarint32)
+UInt64Decoder = _BulkVarintDecoder(wire_format.WIRETYPE_VARINT, _DecodeVarint)
 
 SInt32Decoder = _ModifiedDecoder(
     wire_format.WIRETYPE_VARINT, _DecodeVarint32, wire_format.ZigZagDecode)
@@ -150,6 +150,27 @@ def _SimpleSizer(compute_value_size):
   return SpecificSizer
 
 
+def _BulkVarintSizer(compute_value_size):
+  """Like _SimpleSizer, but packed fields are sized with _PackedVarintSize, which
+  does all of its work in C-level passes over the values instead of calling
+  compute_value_size once per element."""
+
+  simple_sizer = _SimpleSizer(compute_value_size)
+
+  def SpecificSizer(field_number, is_repeated, is_packed):
+    if is_packed:
+      tag_size = _TagSize(field_number)
+      local_VarintSize = _VarintSize
+      local_PackedVarintSize = _PackedVarintSize
+      def PackedFieldSize(value):
+        result = local_PackedVarintSize(value)
+        return result + local_VarintSize(result) + tag_size
+      return PackedFieldSize
+    return simple_sizer(field_number, is_repeated, is_packed)
+
+  return SpecificSizer
+
+
 def _ModifiedSizer(compute_value_size, modify_value):
   """Like SimpleSizer, but modify_value is invoked on each value before it is
   passed to compute_value_size.  modify_value is typically ZigZagEncode."""
@@ -212,9 +233,9 @@ def _FixedSizer(value_size):
 # a parameter and returns its encoded size.
 
 
-Int32Sizer = Int64Sizer = EnumSizer = _SimpleSizer(_SignedVarintSize)
+Int32Sizer = Int64Sizer = EnumSizer = _BulkVarintSizer(_SignedVarintSize)
 
-UInt32Sizer = UInt64Sizer = _SimpleSizer(_VarintSize)
+UInt32Sizer = UInt64Sizer = _BulkVarintSizer(_VarintSize)
 
 SInt32Sizer = SInt64Sizer = _ModifiedSizer(
     _SignedVarintSize, wire_format.ZigZagEncode)
@@ -417,6 +438,77 @@ def _VarintBytes(value):
   return b"".join(pieces)
 
 
+# Packed varint fields (e.g. large index buffers) are sized and encoded in bulk.
+# Small values are looked up in tables of pre-encoded varints which are built
+# on first use, so that whole runs can be joined without a Python loop.
+_VARINT_TABLE_BITS = 14
+_VARINT_TABLE_SIZE = 1 << _VARINT_TABLE_BITS
+_VARINT_TABLE_MASK = _VARINT_TABLE_SIZE - 1
+_varint_tables = None
+
+
+def _GetVarintTables():
+  """Returns (varint_table, continued_varint_table).
+
+  varint_table[v] is the varint encoding of v.  continued_varint_table[v] is
+  the two-byte encoding of the low 14 bits of a larger value, i.e. with the
+  continuation bit set on both bytes.
+  """
+  global _varint_tables
+  if _varint_tables is None:
+    varint_table = [_VarintBytes(value) for value in range(_VARINT_TABLE_SIZE)]
+    continued_varint_table = [
+        bytes((0x80 | (value & 0x7f), 0x80 | (value >> 7)))
+        for value in range(_VARINT_TABLE_SIZE)]
+    _varint_tables = (varint_table, continued_varint_table)
+  return _varint_tables
+
+
+def _PackedVarintSize(values):
+  """Computes the total size of the varints in values.
+
+  Negative values take 10 bytes since int32/int64 values are sign-extended.
+  Every pass (min, max, sum over map) runs in C.
+  """
+  if not values:
+    return 0
+  size = len(values)
+  if min(values) < 0:
+    size += 9 * sum(map((0).__gt__, values))
+  maximum = max(values)
+  threshold = 0x80
+  while threshold <= maximum:
+    size += sum(map(threshold.__le__, values))
+    threshold <<= 7
+  return size
+
+
+def _PackedVarintBytes(values):
+  """Encodes the varints in values and returns them as a single bytes object."""
+  if not values:
+    return b''
+  minimum = min(values)
+  maximum = max(values)
+  if minimum >= 0:
+    if maximum <= 0x7f:
+      return bytes(values)
+    varint_table, continued_varint_table = _GetVarintTables()
+    if maximum < _VARINT_TABLE_SIZE:
+      return b''.join(map(varint_table.__getitem__, values))
+    if maximum < _VARINT_TABLE_SIZE << _VARINT_TABLE_BITS:
+      return b''.join([
+          varint_table[value] if value < _VARINT_TABLE_SIZE else
+          continued_varint_table[value & _VARINT_TABLE_MASK] +
+          varint_table[value >> _VARINT_TABLE_BITS]
+          for value in values])
+  pieces = []
+  local_EncodeSignedVarint = _EncodeSignedVarint
+  write = pieces.append
+  for value in values:
+    local_EncodeSignedVarint(write, value)
+  return b''.join(pieces)
+
+
 def TagBytes(field_number, wire_type):
   """Encode the given tag and return the bytes.  Only called at startup."""
 
@@ -468,6 +560,28 @@ def _SimpleEncoder(wire_type, encode_value, compute_value_size):
   return SpecificEncoder
 
 
+def _BulkVarintEncoder(wire_type, encode_value, compute_value_size):
+  """Like _SimpleEncoder, but packed fields are encoded with a single write of
+  the bytes produced by _PackedVarintBytes."""
+
+  simple_encoder = _SimpleEncoder(wire_type, encode_value, compute_value_size)
+
+  def SpecificEncoder(field_number, is_repeated, is_packed):
+    if is_packed:
+      tag_bytes = TagBytes(field_number, wire_format.WIRETYPE_LENGTH_DELIMITED)
+      local_EncodeVarint = _EncodeVarint
+      local_PackedVarintBytes = _PackedVarintBytes
+      def EncodePackedField(write, value, deterministic):
+        write(tag_bytes)
+        encoded = local_PackedVarintBytes(value)
+        local_EncodeVarint(write, len(encoded), deterministic)
+        return write(encoded)
+      return EncodePackedField
+    return simple_encoder(field_number, is_repeated, is_packed)
+
+  return SpecificEncoder
+
+
 def _ModifiedEncoder(wire_type, encode_value, compute_value_size, modify_value):
   """Like SimpleEncoder but additionally invokes modify_value on every value
   before passing it to encode_value.  Usually modify_value is ZigZagEncode."""
@@ -622,10 +736,10 @@ def _FloatingPointEncoder(wire_type, format):
 # very similarly to sizer constructors, described earlier.
 
 
-Int32Encoder = Int64Encoder = EnumEncoder = _SimpleEncoder(
+Int32Encoder = Int64Encoder = EnumEncoder = _BulkVarintEncoder(
     wire_format.WIRETYPE_VARINT, _EncodeSignedVarint, _SignedVarintSize)
 
-UInt32Encoder = UInt64Encoder = _SimpleEncoder(
+UInt32Encoder = UInt64Encoder = _BulkVarintEncoder(
     wire_format.WIRETYPE_VARINT, _EncodeVarint, _VarintSize)
 
 SInt32Encoder = SInt64Encoder = _ModifiedEncoder(
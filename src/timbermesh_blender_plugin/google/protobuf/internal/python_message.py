@@ -50,9 +50,11 @@ this file*.
 
 __author__ = 'robinson@google.com (Will Robinson)'
 
+import contextlib
 from io import BytesIO
 import struct
 import sys
+import threading
 import weakref
 
 # We use "as" to avoid name collisions with variables.
@@ -72,6 +74,44 @@ from google.protobuf import text_format
 
 _FieldDescriptor = descriptor_mod.FieldDescriptor
 _AnyFullTypeName = 'google.protobuf.Any'
+_NULL_LISTENER = message_listener_mod.NullMessageListener()
+
+
+class _BulkBuildState(threading.local):
+  # The listeners whose parents are notified when the outermost BulkBuild()
+  # scope of the thread exits, or None outside of such a scope.
+  deferred_listeners = None
+
+
+_bulk_build_state = _BulkBuildState()
+
+
+@contextlib.contextmanager
+def BulkBuild():
+  """Defers change propagation to parent messages while a tree is built.
+
+  Setting a field or adding an element normally walks the listener chain up to
+  the root message to mark cached byte sizes dirty. Within this scope the first
+  change of a child only marks its listener and queues it. The queued listeners
+  notify their parents when the outermost scope exits, so the byte sizes of the
+  tree are invalidated once and computed bottom-up by the next ByteSize() or
+  serialization.
+
+  Until the scope exits, messages that were not changed themselves may report a
+  stale byte size and presence in their parent, so the scope should only span
+  the construction of the tree. It applies to the current thread.
+  """
+  if _bulk_build_state.deferred_listeners is not None:
+    yield
+    return
+  deferred_listeners = []
+  _bulk_build_state.deferred_listeners = deferred_listeners
+  try:
+    yield
+  finally:
+    _bulk_build_state.deferred_listeners = None
+    for listener in deferred_listeners:
+      listener._NotifyParent()
 _ExtensionDict = extension_dict._ExtensionDict
 
 class GeneratedProtocolMessageType(type):
@@ -257,7 +297,7 @@ def _AddSlots(message_descriptor, dictionary):
                              '_unknown_field_set',
                              '_is_present_in_parent',
                              '_listener',
-                             '_listener_for_children',
+                             '_children_listener',
                              '__weakref__',
                              '_oneofs']
 
@@ -510,8 +550,10 @@ def _AddInitMethod(message_descriptor, cls):
     # turned into UnknownFieldSet struct if fields are added.
     self._unknown_field_set = None      # pylint: disable=protected-access
     self._is_present_in_parent = False
-    self._listener = message_listener_mod.NullMessageListener()
-    self._listener_for_children = _Listener(self)
+    self._listener = _NULL_LISTENER
+    # The listener handed to child messages and containers is created on
+    # first use, so leaf messages never pay for it.
+    self._children_listener = None
     for field_name, field_value in kwargs.items():
       field = _GetFieldByName(message_descriptor, field_name)
       if field is None:
@@ -1068,7 +1110,8 @@ def _AddByteSizeMethod(message_descriptor, cls):
 
     self._cached_byte_size = size
     self._cached_byte_size_dirty = False
-    self._listener_for_children.dirty = False
+    if self._children_listener is not None:
+      self._children_listener.dirty = False
     return size
 
   cls.ByteSize = ByteSize
@@ -1407,7 +1450,7 @@ def _DiscardUnknownFields(self):
 
 def _SetListener(self, listener):
   if listener is None:
-    self._listener = message_listener_mod.NullMessageListener()
+    self._listener = _NULL_LISTENER
   else:
     self._listener = listener
 
@@ -1452,10 +1495,20 @@ def _AddPrivateHelperMethods(message_descriptor, cls):
     #   already true, the callers need to be updated.
     if not self._cached_byte_size_dirty:
       self._cached_byte_size_dirty = True
-      self._listener_for_children.dirty = True
+      if self._children_listener is not None:
+        self._children_listener.dirty = True
       self._is_present_in_parent = True
       self._listener.Modified()
 
+  def _GetListenerForChildren(self):
+    """Returns the listener for child messages, creating it on first use."""
+    listener = self._children_listener
+    if listener is None:
+      listener = _Listener(self)
+      listener.dirty = self._cached_byte_size_dirty
+      self._children_listener = listener
+    return listener
+
   def _UpdateOneofState(self, field):
     """Sets field as the active field in its containing oneof.
 
@@ -1469,6 +1522,7 @@ def _AddPrivateHelperMethods(message_descriptor, cls):
 
   cls._Modified = Modified
   cls.SetInParent = Modified
+  cls._listener_for_children = property(_GetListenerForChildren)
   cls._UpdateOneofState = _UpdateOneofState
 
 
@@ -1508,6 +1562,15 @@ class _Listener(object):
   def Modified(self):
     if self.dirty:
       return
+    deferred_listeners = _bulk_build_state.deferred_listeners
+    if deferred_listeners is not None:
+      # The parent is notified when the BulkBuild() scope exits.
+      self.dirty = True
+      deferred_listeners.append(self)
+      return
+    self._NotifyParent()
+
+  def _NotifyParent(self):
     try:
       # Propagate the signal to our parents iff this is the first field set.
       self._parent_message_weakref._Modified()
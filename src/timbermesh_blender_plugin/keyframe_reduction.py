@@ -0,0 +1,121 @@
+import array
+import numpy
+import thread_pools
+
+# Removes node animation samples that linear (position, scale) and spherical linear (rotation) interpolation
+# between the remaining keys reconstructs within the given tolerances. Keys are chosen by recursively splitting
+# every segment at its worst reconstructed frame until all frames are within the tolerances.
+
+
+class Tolerances:
+    def __init__(self, position, rotation, scale):
+        self.position = position
+        self.rotation = rotation
+        self.scale = scale
+
+
+def reduce_node_animations(nodes, tolerances, thread_pool=None) -> (int, int):
+    # Returns the number of removed samples and the number of samples before the reduction.
+    node_animations = [node_animation for node in nodes for node_animation in node.node_animations]
+    sample_count = sum(sum(node_animation.frame_runs) or node_animation.frame_count
+                       for node_animation in node_animations)
+    thread_pool = thread_pool or thread_pools.ThreadPool(0)
+    removed_sample_counts = thread_pool.imap(lambda node_animation: reduce_node_animation(node_animation, tolerances),
+                                             node_animations)
+    removed_sample_count = sum(removed_sample_counts)
+    return removed_sample_count, sample_count
+
+
+def reduce_node_animation(node_animation, tolerances) -> int:
+    # Returns the number of removed samples.
+    positions, rotations, scales = __get_tracks(node_animation)
+    key_frames = get_key_frames(positions, rotations, scales, tolerances)
+    removed_sample_count = len(positions) - len(key_frames)
+    if removed_sample_count == 0:
+        return 0
+
+    node_animation.positions = array.array("f", positions[key_frames].astype(numpy.float32).ravel().tobytes())
+    node_animation.rotations = array.array("f", rotations[key_frames].astype(numpy.float32).ravel().tobytes())
+    node_animation.scales = array.array("f", scales[key_frames].astype(numpy.float32).ravel().tobytes())
+    node_animation.frame_count = len(key_frames)
+    node_animation.frame_runs = array.array("i")
+    node_animation.key_frames = array.array("i", key_frames.tolist())
+    return removed_sample_count
+
+
+def get_key_frames(positions, rotations, scales, tolerances) -> numpy.ndarray:
+    frame_count = len(positions)
+    if frame_count <= 2:
+        return numpy.arange(frame_count)
+    is_key = numpy.zeros(frame_count, dtype=bool)
+    is_key[[0, -1]] = True
+    segments = [(0, frame_count - 1)]
+    while segments:
+        start, end = segments.pop()
+        if end - start < 2:
+            continue
+        errors = __get_relative_errors(positions, rotations, scales, start, end, tolerances)
+        worst_frame = int(numpy.argmax(errors))
+        if errors[worst_frame] > 1.0:
+            split = start + 1 + worst_frame
+            is_key[split] = True
+            segments.append((start, split))
+            segments.append((split, end))
+    return numpy.flatnonzero(is_key)
+
+
+def interpolate_keys(key_frames, positions, rotations, scales) -> (numpy.ndarray, numpy.ndarray, numpy.ndarray):
+    # Rebuilds one sample per frame from keys at the given frames.
+    frames = numpy.arange(key_frames[-1] + 1)
+    segment_ends = numpy.clip(numpy.searchsorted(key_frames, frames, side="right"), 1, len(key_frames) - 1)
+    segment_starts = segment_ends - 1
+    factors = (frames - key_frames[segment_starts]) / (key_frames[segment_ends] - key_frames[segment_starts])
+    factors = numpy.clip(factors, 0.0, 1.0)[:, numpy.newaxis]
+    return (__lerp(positions[segment_starts], positions[segment_ends], factors).astype(numpy.float32),
+            __slerp(rotations[segment_starts], rotations[segment_ends], factors).astype(numpy.float32),
+            __lerp(scales[segment_starts], scales[segment_ends], factors).astype(numpy.float32))
+
+
+def __get_tracks(node_animation) -> (numpy.ndarray, numpy.ndarray, numpy.ndarray):
+    positions = numpy.array(node_animation.positions, dtype=numpy.float64).reshape(-1, 3)
+    rotations = numpy.array(node_animation.rotations, dtype=numpy.float64).reshape(-1, 4)
+    scales = numpy.array(node_animation.scales, dtype=numpy.float64).reshape(-1, 3)
+    if node_animation.frame_runs:
+        frame_runs = numpy.array(node_animation.frame_runs, dtype=numpy.int64)
+        positions = numpy.repeat(positions, frame_runs, axis=0)
+        rotations = numpy.repeat(rotations, frame_runs, axis=0)
+        scales = numpy.repeat(scales, frame_runs, axis=0)
+    return positions, rotations, scales
+
+
+def __get_relative_errors(positions, rotations, scales, start, end, tolerances) -> numpy.ndarray:
+    factors = (numpy.arange(start + 1, end) - start)[:, numpy.newaxis] / (end - start)
+    position_errors = numpy.linalg.norm(
+        __lerp(positions[start], positions[end], factors) - positions[start + 1:end], axis=1)
+    scale_errors = numpy.abs(__lerp(scales[start], scales[end], factors) - scales[start + 1:end]).max(axis=1)
+    interpolated_rotations = __slerp(rotations[start], rotations[end], factors)
+    dots = numpy.abs(numpy.sum(interpolated_rotations * rotations[start + 1:end], axis=1)) \
+        / numpy.linalg.norm(rotations[start + 1:end], axis=1)
+    rotation_errors = numpy.degrees(2.0 * numpy.arccos(numpy.clip(dots, 0.0, 1.0)))
+    return numpy.maximum.reduce([position_errors / max(tolerances.position, 1e-12),
+                                 rotation_errors / max(tolerances.rotation, 1e-12),
+                                 scale_errors / max(tolerances.scale, 1e-12)])
+
+
+def __lerp(start, end, factors) -> numpy.ndarray:
+    return start + (end - start) * factors
+
+
+def __slerp(start, end, factors) -> numpy.ndarray:
+    start, end = numpy.broadcast_arrays(start, end)
+    dots = numpy.sum(start * end, axis=-1, keepdims=True)
+    end = numpy.where(dots < 0.0, -end, end)
+    dots = numpy.abs(dots)
+    angles = numpy.arccos(numpy.clip(dots, -1.0, 1.0))
+    sines = numpy.sin(angles)
+    is_small_angle = sines < 1e-6
+    safe_sines = numpy.where(is_small_angle, 1.0, sines)
+    start_weights = numpy.where(is_small_angle, 1.0 - factors, numpy.sin((1.0 - factors) * angles) / safe_sines)
+    end_weights = numpy.where(is_small_angle, factors, numpy.sin(factors * angles) / safe_sines)
+    result = start * start_weights + end * end_weights
+    return result / numpy.linalg.norm(result, axis=-1, keepdims=True)
@@ -0,0 +1,646 @@
+# Generated by tools/generate_model_encoder.py from proto/model.proto.  DO NOT EDIT!
+import struct
+from google.protobuf.internal import encoder
+
+_pack_float = struct.Struct("<f").pack
+_pack_double = struct.Struct("<d").pack
+_packed_varint_bytes = encoder._PackedVarintBytes
+_SMALL_VARINTS = [bytes((value,)) for value in range(0x80)]
+
+
+def _varint(value) -> bytes:
+    if value < 0x80:
+        return _SMALL_VARINTS[value]
+    encoded = bytearray()
+    while value > 0x7f:
+        encoded.append((value & 0x7f) | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def _signed_varint(value) -> bytes:
+    if value < 0:
+        value += 1 << 64
+    return _varint(value)
+
+
+def encode_model(message) -> bytes:
+    parts = []
+    _write_model(message, parts)
+    return b"".join(parts)
+
+
+def _write_model(message, parts) -> int:
+    size = 0
+    value = message.version
+    if value:
+        encoded = b"\x08" + _signed_varint(value)
+        parts.append(encoded)
+        size += len(encoded)
+    value = message.name
+    if value:
+        encoded = value.encode("utf-8")
+        header = b"\x12" + _varint(len(encoded))
+        parts.append(header)
+        parts.append(encoded)
+        size += len(header) + len(encoded)
+    for element in message.nodes:
+        index = len(parts)
+        parts.append(None)
+        element_size = _write_node(element, parts)
+        header = b"\x1a" + _varint(element_size)
+        parts[index] = header
+        size += len(header) + element_size
+    return size
+
+
+def encode_node(message) -> bytes:
+    parts = []
+    _write_node(message, parts)
+    return b"".join(parts)
+
+
+def _write_node(message, parts) -> int:
+    size = 0
+    value = message.parent
+    if value:
+        encoded = b"\x08" + _signed_varint(value)
+        parts.append(encoded)
+        size += len(encoded)
+    value = message.name
+    if value:
+        encoded = value.encode("utf-8")
+        header = b"\x12" + _varint(len(encoded))
+        parts.append(header)
+        parts.append(encoded)
+        size += len(header) + len(encoded)
+    if message.HasField("position"):
+        index = len(parts)
+        parts.append(None)
+        element_size = _write_vector3_float(message.position, parts)
+        header = b"\x1a" + _varint(element_size)
+        parts[index] = header
+        size += len(header) + element_size
+    if message.HasField("rotation"):
+        index = len(parts)
+        parts.append(None)
+        element_size = _write_quaternion_float(message.rotation, parts)
+        header = b"\x22" + _varint(element_size)
+        parts[index] = header
+        size += len(header) + element_size
+    if message.HasField("scale"):
+        index = len(parts)
+        parts.append(None)
+        element_size = _write_vector3_float(message.scale, parts)
+        header = b"\x2a" + _varint(element_size)
+        parts[index] = header
+        size += len(header) + element_size
+    value = message.vertexCount
+    if value:
+        encoded = b"\x30" + _signed_varint(value)
+        parts.append(encoded)
+        size += len(encoded)
+    for element in message.vertexProperties:
+        index = len(parts)
+        parts.append(None)
+        element_size = _write_vertex_property(element, parts)
+        header = b"\x3a" + _varint(element_size)
+        parts[index] = header
+        size += len(header) + element_size
+    for element in message.meshes:
+        index = len(parts)
+        parts.append(None)
+        element_size = _write_mesh(element, parts)
+        header = b"\x42" + _varint(element_size)
+        parts[index] = header
+        size += len(header) + element_size
+    for element in message.vertexAnimations:
+        index = len(parts)
+        parts.append(None)
+        element_size = _write_vertex_animation(element, parts)
+        header = b"\x4a" + _varint(element_size)
+        parts[index] = header
+        size += len(header) + element_size
+    for element in message.nodeAnimations:
+        index = len(parts)
+        parts.append(None)
+        element_size = _write_node_animation(element, parts)
+        header = b"\x52" + _varint(element_size)
+        parts[index] = header
+        size += len(header) + element_size
+    for element in message.vertexAnimationTextures:
+        index = len(parts)
+        parts.append(None)
+        element_size = _write_vertex_animation_texture(element, parts)
+        header = b"\x5a" + _varint(element_size)
+        parts[index] = header
+        size += len(header) + element_size
+    return size
+
+
+def encode_mesh(message) -> bytes:
+    parts = []
+    _write_mesh(message, parts)
+    return b"".join(parts)
+
+
+def _write_mesh(message, parts) -> int:
+    size = 0
+    values = message.indices
+    if values:
+        encoded = _packed_varint_bytes(values)
+        header = b"\x0a" + _varint(len(encoded))
+        parts.append(header)
+        parts.append(encoded)
+        size += len(header) + len(encoded)
+    value = message.material
+    if value:
+        encoded = value.encode("utf-8")
+        header = b"\x12" + _varint(len(encoded))
+        parts.append(header)
+        parts.append(encoded)
+        size += len(header) + len(encoded)
+    return size
+
+
+def encode_vertex_animation(message) -> bytes:
+    parts = []
+    _write_vertex_animation(message, parts)
+    return b"".join(parts)
+
+
+def _write_vertex_animation(message, parts) -> int:
+    size = 0
+    value = message.name
+    if value:
+        encoded = value.encode("utf-8")
+        header = b"\x0a" + _varint(len(encoded))
+        parts.append(header)
+        parts.append(encoded)
+        size += len(header) + len(encoded)
+    value = message.framerate
+    if value:
+        parts.append(b"\x15" + _pack_float(value))
+        size += 5
+    value = message.animatedVertexCount
+    if value:
+        encoded = b"\x18" + _signed_varint(value)
+        parts.append(encoded)
+        size += len(encoded)
+    for element in message.frames:
+        index = len(parts)
+        parts.append(None)
+        element_size = _write_vertex_animation_frame(element, parts)
+        header = b"\x22" + _varint(element_size)
+        parts[index] = header
+        size += len(header) + element_size
+    values = message.frameRuns
+    if values:
+        encoded = _packed_varint_bytes(values)
+        header = b"\x2a" + _varint(len(encoded))
+        parts.append(header)
+        parts.append(encoded)
+        size += len(header) + len(encoded)
+    value = message.sharedClip
+    if value:
+        encoded = value.encode("utf-8")
+        header = b"\x32" + _varint(len(encoded))
+        parts.append(header)
+        parts.append(encoded)
+        size += len(header) + len(encoded)
+    return size
+
+
+def encode_vertex_animation_texture(message) -> bytes:
+    parts = []
+    _write_vertex_animation_texture(message, parts)
+    return b"".join(parts)
+
+
+def _write_vertex_animation_texture(message, parts) -> int:
+    size = 0
+    value = message.name
+    if value:
+        encoded = value.encode("utf-8")
+        header = b"\x0a" + _varint(len(encoded))
+        parts.append(header)
+        parts.append(encoded)
+        size += len(header) + len(encoded)
+    value = message.format
+    if value:
+        encoded = b"\x10" + _signed_varint(value)
+        parts.append(encoded)
+        size += len(encoded)
+    value = message.width
+    if value:
+        encoded = b"\x18" + _signed_varint(value)
+        parts.append(encoded)
+        size += len(encoded)
+    value = message.height
+    if value:
+        encoded = b"\x20" + _signed_varint(value)
+        parts.append(encoded)
+        size += len(encoded)
+    value = message.data
+    if value:
+        encoded = value
+        header = b"\x2a" + _varint(len(encoded))
+        parts.append(header)
+        parts.append(encoded)
+        size += len(header) + len(encoded)
+    for element in message.clips:
+        index = len(parts)
+        parts.append(None)
+        element_size = _write_vertex_animation_texture_clip(element, parts)
+        header = b"\x32" + _varint(element_size)
+        parts[index] = header
+        size += len(header) + element_size
+    return size
+
+
+def encode_vertex_animation_texture_clip(message) -> bytes:
+    parts = []
+    _write_vertex_animation_texture_clip(message, parts)
+    return b"".join(parts)
+
+
+def _write_vertex_animation_texture_clip(message, parts) -> int:
+    size = 0
+    value = message.name
+    if value:
+        encoded = value.encode("utf-8")
+        header = b"\x0a" + _varint(len(encoded))
+        parts.append(header)
+        parts.append(encoded)
+        size += len(header) + len(encoded)
+    value = message.framerate
+    if value:
+        parts.append(b"\x15" + _pack_float(value))
+        size += 5
+    value = message.firstRow
+    if value:
+        encoded = b"\x18" + _signed_varint(value)
+        parts.append(encoded)
+        size += len(encoded)
+    value = message.frameCount
+    if value:
+        encoded = b"\x20" + _signed_varint(value)
+        parts.append(encoded)
+        size += len(encoded)
+    return size
+
+
+def encode_vertex_animation_frame(message) -> bytes:
+    parts = []
+    _write_vertex_animation_frame(message, parts)
+    return b"".join(parts)
+
+
+def _write_vertex_animation_frame(message, parts) -> int:
+    size = 0
+    for element in message.vertexProperties:
+        index = len(parts)
+        parts.append(None)
+        element_size = _write_vertex_property(element, parts)
+        header = b"\x0a" + _varint(element_size)
+        parts[index] = header
+        size += len(header) + element_size
+    return size
+
+
+def encode_node_animation(message) -> bytes:
+    parts = []
+    _write_node_animation(message, parts)
+    return b"".join(parts)
+
+
+def _write_node_animation(message, parts) -> int:
+    size = 0
+    value = message.name
+    if value:
+        encoded = value.encode("utf-8")
+        header = b"\x0a" + _varint(len(encoded))
+        parts.append(header)
+        parts.append(encoded)
+        size += len(header) + len(encoded)
+    value = message.framerate
+    if value:
+        parts.append(b"\x15" + _pack_float(value))
+        size += 5
+    for element in message.frames:
+        index = len(parts)
+        parts.append(None)
+        element_size = _write_node_animation_frame(element, parts)
+        header = b"\x1a" + _varint(element_size)
+        parts[index] = header
+        size += len(header) + element_size
+    value = message.frameCount
+    if value:
+        encoded = b"\x20" + _signed_varint(value)
+        parts.append(encoded)
+        size += len(encoded)
+    value = message.positions
+    if value:
+        encoded = value
+        header = b"\x2a" + _varint(len(encoded))
+        parts.append(header)
+        parts.append(encoded)
+        size += len(header) + len(encoded)
+    value = message.rotations
+    if value:
+        encoded = value
+        header = b"\x32" + _varint(len(encoded))
+        parts.append(header)
+        parts.append(encoded)
+        size += len(header) + len(encoded)
+    value = message.scales
+    if value:
+        encoded = value
+        header = b"\x3a" + _varint(len(encoded))
+        parts.append(header)
+        parts.append(encoded)
+        size += len(header) + len(encoded)
+    values = message.frameRuns
+    if values:
+        encoded = _packed_varint_bytes(values)
+        header = b"\x42" + _varint(len(encoded))
+        parts.append(header)
+        parts.append(encoded)
+        size += len(header) + len(encoded)
+    values = message.keyFrames
+    if values:
+        encoded = _packed_varint_bytes(values)
+        header = b"\x4a" + _varint(len(encoded))
+        parts.append(header)
+        parts.append(encoded)
+        size += len(header) + len(encoded)
+    value = message.sharedClip
+    if value:
+        encoded = value.encode("utf-8")
+        header = b"\x52" + _varint(len(encoded))
+        parts.append(header)
+        parts.append(encoded)
+        size += len(header) + len(encoded)
+    return size
+
+
+def encode_node_animation_frame(message) -> bytes:
+    parts = []
+    _write_node_animation_frame(message, parts)
+    return b"".join(parts)
+
+
+def _write_node_animation_frame(message, parts) -> int:
+    size = 0
+    if message.HasField("position"):
+        index = len(parts)
+        parts.append(None)
+        element_size = _write_vector3_float(message.position, parts)
+        header = b"\x0a" + _varint(element_size)
+        parts[index] = header
+        size += len(header) + element_size
+    if message.HasField("rotation"):
+        index = len(parts)
+        parts.append(None)
+        element_size = _write_quaternion_float(message.rotation, parts)
+        header = b"\x12" + _varint(element_size)
+        parts[index] = header
+        size += len(header) + element_size
+    if message.HasField("scale"):
+        index = len(parts)
+        parts.append(None)
+        element_size = _write_vector3_float(message.scale, parts)
+        header = b"\x1a" + _varint(element_size)
+        parts[index] = header
+        size += len(header) + element_size
+    return size
+
+
+def encode_vertex_property(message) -> bytes:
+    parts = []
+    _write_vertex_property(message, parts)
+    return b"".join(parts)
+
+
+def _write_vertex_property(message, parts) -> int:
+    size = 0
+    value = message.name
+    if value:
+        encoded = value.encode("utf-8")
+        header = b"\x0a" + _varint(len(encoded))
+        parts.append(header)
+        parts.append(encoded)
+        size += len(header) + len(encoded)
+    value = message.scalarType
+    if value:
+        encoded = b"\x10" + _signed_varint(value)
+        parts.append(encoded)
+        size += len(encoded)
+    value = message.scalarTypeDimension
+    if value:
+        encoded = b"\x18" + _signed_varint(value)
+        parts.append(encoded)
+        size += len(encoded)
+    value = message.data
+    if value:
+        encoded = value
+        header = b"\x22" + _varint(len(encoded))
+        parts.append(header)
+        parts.append(encoded)
+        size += len(header) + len(encoded)
+    return size
+
+
+def encode_vector3_float(message) -> bytes:
+    parts = []
+    _write_vector3_float(message, parts)
+    return b"".join(parts)
+
+
+def _write_vector3_float(message, parts) -> int:
+    size = 0
+    value = message.x
+    if value:
+        parts.append(b"\x0d" + _pack_float(value))
+        size += 5
+    value = message.y
+    if value:
+        parts.append(b"\x15" + _pack_float(value))
+        size += 5
+    value = message.z
+    if value:
+        parts.append(b"\x1d" + _pack_float(value))
+        size += 5
+    return size
+
+
+def encode_quaternion_float(message) -> bytes:
+    parts = []
+    _write_quaternion_float(message, parts)
+    return b"".join(parts)
+
+
+def _write_quaternion_float(message, parts) -> int:
+    size = 0
+    value = message.x
+    if value:
+        parts.append(b"\x0d" + _pack_float(value))
+        size += 5
+    value = message.y
+    if value:
+        parts.append(b"\x15" + _pack_float(value))
+        size += 5
+    value = message.z
+    if value:
+        parts.append(b"\x1d" + _pack_float(value))
+        size += 5
+    value = message.w
+    if value:
+        parts.append(b"\x25" + _pack_float(value))
+        size += 5
+    return size
+
+
+def encode_container_index(message) -> bytes:
+    parts = []
+    _write_container_index(message, parts)
+    return b"".join(parts)
+
+
+def _write_container_index(message, parts) -> int:
+    size = 0
+    value = message.version
+    if value:
+        encoded = b"\x08" + _signed_varint(value)
+        parts.append(encoded)
+        size += len(encoded)
+    value = message.name
+    if value:
+        encoded = value.encode("utf-8")
+        header = b"\x12" + _varint(len(encoded))
+        parts.append(header)
+        parts.append(encoded)
+        size += len(header) + len(encoded)
+    for element in message.nodes:
+        index = len(parts)
+        parts.append(None)
+        element_size = _write_container_node(element, parts)
+        header = b"\x1a" + _varint(element_size)
+        parts[index] = header
+        size += len(header) + element_size
+    return size
+
+
+def encode_container_node(message) -> bytes:
+    parts = []
+    _write_container_node(message, parts)
+    return b"".join(parts)
+
+
+def _write_container_node(message, parts) -> int:
+    size = 0
+    value = message.name
+    if value:
+        encoded = value.encode("utf-8")
+        header = b"\x0a" + _varint(len(encoded))
+        parts.append(header)
+        parts.append(encoded)
+        size += len(header) + len(encoded)
+    value = message.parent
+    if value:
+        encoded = b"\x10" + _signed_varint(value)
+        parts.append(encoded)
+        size += len(encoded)
+    if message.HasField("node"):
+        index = len(parts)
+        parts.append(None)
+        element_size = _write_container_chunk(message.node, parts)
+        header = b"\x1a" + _varint(element_size)
+        parts[index] = header
+        size += len(header) + element_size
+    for element in message.vertexProperties:
+        index = len(parts)
+        parts.append(None)
+        element_size = _write_container_chunk(element, parts)
+        header = b"\x22" + _varint(element_size)
+        parts[index] = header
+        size += len(header) + element_size
+    for element in message.vertexAnimations:
+        index = len(parts)
+        parts.append(None)
+        element_size = _write_container_chunk(element, parts)
+        header = b"\x2a" + _varint(element_size)
+        parts[index] = header
+        size += len(header) + element_size
+    for element in message.nodeAnimations:
+        index = len(parts)
+        parts.append(None)
+        element_size = _write_container_chunk(element, parts)
+        header = b"\x32" + _varint(element_size)
+        parts[index] = header
+        size += len(header) + element_size
+    for element in message.vertexAnimationTextures:
+        index = len(parts)
+        parts.append(None)
+        element_size = _write_container_chunk(element, parts)
+        header = b"\x3a" + _varint(element_size)
+        parts[index] = header
+        size += len(header) + element_size
+    return size
+
+
+def encode_container_chunk(message) -> bytes:
+    parts = []
+    _write_container_chunk(message, parts)
+    return b"".join(parts)
+
+
+def _write_container_chunk(message, parts) -> int:
+    size = 0
+    value = message.name
+    if value:
+        encoded = value.encode("utf-8")
+        header = b"\x0a" + _varint(len(encoded))
+        parts.append(header)
+        parts.append(encoded)
+        size += len(header) + len(encoded)
+    value = message.offset
+    if value:
+        encoded = b"\x10" + _signed_varint(value)
+        parts.append(encoded)
+        size += len(encoded)
+    value = message.size
+    if value:
+        encoded = b"\x18" + _signed_varint(value)
+        parts.append(encoded)
+        size += len(encoded)
+    value = message.uncompressedSize
+    if value:
+        encoded = b"\x20" + _signed_varint(value)
+        parts.append(encoded)
+        size += len(encoded)
+    return size
+
+
+ENCODERS = {
+    "protoblog.Model": encode_model,
+    "protoblog.Node": encode_node,
+    "protoblog.Mesh": encode_mesh,
+    "protoblog.VertexAnimation": encode_vertex_animation,
+    "protoblog.VertexAnimationTexture": encode_vertex_animation_texture,
+    "protoblog.VertexAnimationTextureClip": encode_vertex_animation_texture_clip,
+    "protoblog.VertexAnimationFrame": encode_vertex_animation_frame,
+    "protoblog.NodeAnimation": encode_node_animation,
+    "protoblog.NodeAnimationFrame": encode_node_animation_frame,
+    "protoblog.VertexProperty": encode_vertex_property,
+    "protoblog.Vector3Float": encode_vector3_float,
+    "protoblog.QuaternionFloat": encode_quaternion_float,
+    "protoblog.ContainerIndex": encode_container_index,
+    "protoblog.ContainerNode": encode_container_node,
+    "protoblog.ContainerChunk": encode_container_chunk,
+}
+
+
+def encode(message) -> bytes:
+    return ENCODERS[message.DESCRIPTOR.full_name](message)
@@ -13,33 +13,45 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0bmodel.proto\x12\tprotoblog\"F\n\x05Model\x12\x0f\n\x07version\x18\x01 \x01(\x05\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x1e\n\x05nodes\x18\x03 \x03(\x0b\x32\x0f.protoblog.Node\"\xf8\x02\n\x04Node\x12\x0e\n\x06parent\x18\x01 \x01(\x05\x12\x0c\n\x04name\x18\x02 \x01(\t\x12)\n\x08position\x18\x03 \x01(\x0b\x32\x17.protoblog.Vector3Float\x12,\n\x08rotation\x18\x04 \x01(\x0b\x32\x1a.protoblog.QuaternionFloat\x12&\n\x05scale\x18\x05 \x01(\x0b\x32\x17.protoblog.Vector3Float\x12\x13\n\x0bvertexCount\x18\x06 \x01(\x05\x12\x33\n\x10vertexProperties\x18\x07 \x03(\x0b\x32\x19.protoblog.VertexProperty\x12\x1f\n\x06meshes\x18\x08 \x03(\x0b\x32\x0f.protoblog.Mesh\x12\x34\n\x10vertexAnimations\x18\t \x03(\x0b\x32\x1a.protoblog.VertexAnimation\x12\x30\n\x0enodeAnimations\x18\n \x03(\x0b\x32\x18.protoblog.NodeAnimation\")\n\x04Mesh\x12\x0f\n\x07indices\x18\x01 \x03(\x05\x12\x10\n\x08material\x18\x02 \x01(\t\"\x80\x01\n\x0fVertexAnimation\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x11\n\tframerate\x18\x02 \x01(\x02\x12\x1b\n\x13\x61nimatedVertexCount\x18\x03 \x01(\x05\x12/\n\x06\x66rames\x18\x04 \x03(\x0b\x32\x1f.protoblog.VertexAnimationFrame\"K\n\x14VertexAnimationFrame\x12\x33\n\x10vertexProperties\x18\x01 \x03(\x0b\x32\x19.protoblog.VertexProperty\"_\n\rNodeAnimation\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x11\n\tframerate\x18\x02 \x01(\x02\x12-\n\x06\x66rames\x18\x03 \x03(\x0b\x32\x1d.protoblog.NodeAnimationFrame\"\x95\x01\n\x12NodeAnimationFrame\x12)\n\x08position\x18\x01 \x01(\x0b\x32\x17.protoblog.Vector3Float\x12,\n\x08rotation\x18\x02 \x01(\x0b\x32\x1a.protoblog.QuaternionFloat\x12&\n\x05scale\x18\x03 \x01(\x0b\x32\x17.protoblog.Vector3Float\"t\n\x0eVertexProperty\x12\x0c\n\x04name\x18\x01 \x01(\t\x12)\n\nscalarType\x18\x02 \x01(\x0e\x32\x15.protoblog.ScalarType\x12\x1b\n\x13scalarTypeDimension\x18\x03 \x01(\x05\x12\x0c\n\x04\x64\x61ta\x18\x04 \x01(\x0c\"/\n\x0cVector3Float\x12\t\n\x01x\x18\x01 \x01(\x02\x12\t\n\x01y\x18\x02 \x01(\x02\x12\t\n\x01z\x18\x03 \x01(\x02\"=\n\x0fQuaternionFloat\x12\t\n\x01x\x18\x01 \x01(\x02\x12\t\n\x01y\x18\x02 \x01(\x02\x12\t\n\x01z\x18\x03 \x01(\x02\x12\t\n\x01w\x18\x04 \x01(\x02*\xaa\x01\n\nScalarType\x12\x1b\n\x17SCALAR_TYPE_UNSPECIFIED\x10\x00\x12\x1d\n\x19SCALAR_TYPE_UNSIGNED_BYTE\x10\x01\x12\x1c\n\x18SCALAR_TYPE_UNSIGNED_INT\x10\x02\x12\x13\n\x0fSCALAR_TYPE_INT\x10\x03\x12\x15\n\x11SCALAR_TYPE_FLOAT\x10\x04\x12\x16\n\x12SCALAR_TYPE_DOUBLE\x10\x05\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0bmodel.proto\x12\tprotoblog\"F\n\x05Model\x12\x0f\n\x07version\x18\x01 \x01(\x05\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x1e\n\x05nodes\x18\x03 \x03(\x0b\x32\x0f.protoblog.Node\"\xbc\x03\n\x04Node\x12\x0e\n\x06parent\x18\x01 \x01(\x05\x12\x0c\n\x04name\x18\x02 \x01(\t\x12)\n\x08position\x18\x03 \x01(\x0b\x32\x17.protoblog.Vector3Float\x12,\n\x08rotation\x18\x04 \x01(\x0b\x32\x1a.protoblog.QuaternionFloat\x12&\n\x05scale\x18\x05 \x01(\x0b\x32\x17.protoblog.Vector3Float\x12\x13\n\x0bvertexCount\x18\x06 \x01(\x05\x12\x33\n\x10vertexProperties\x18\x07 \x03(\x0b\x32\x19.protoblog.VertexProperty\x12\x1f\n\x06meshes\x18\x08 \x03(\x0b\x32\x0f.protoblog.Mesh\x12\x34\n\x10vertexAnimations\x18\t \x03(\x0b\x32\x1a.protoblog.VertexAnimation\x12\x30\n\x0enodeAnimations\x18\n \x03(\x0b\x32\x18.protoblog.NodeAnimation\x12\x42\n\x17vertexAnimationTextures\x18\x0b \x03(\x0b\x32!.protoblog.VertexAnimationTexture\")\n\x04Mesh\x12\x0f\n\x07indices\x18\x01 \x03(\x05\x12\x10\n\x08material\x18\x02 \x01(\t\"\xa7\x01\n\x0fVertexAnimation\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x11\n\tframerate\x18\x02 \x01(\x02\x12\x1b\n\x13\x61nimatedVertexCount\x18\x03 \x01(\x05\x12/\n\x06\x66rames\x18\x04 \x03(\x0b\x32\x1f.protoblog.VertexAnimationFrame\x12\x11\n\tframeRuns\x18\x05 \x03(\x05\x12\x12\n\nsharedClip\x18\x06 \x01(\t\"\xb3\x01\n\x16VertexAnimationTexture\x12\x0c\n\x04name\x18\x01 \x01(\t\x12(\n\x06\x66ormat\x18\x02 \x01(\x0e\x32\x18.protoblog.TextureFormat\x12\r\n\x05width\x18\x03 \x01(\x05\x12\x0e\n\x06height\x18\x04 \x01(\x05\x12\x0c\n\x04\x64\x61ta\x18\x05 \x01(\x0c\x12\x34\n\x05\x63lips\x18\x06 \x03(\x0b\x32%.protoblog.VertexAnimationTextureClip\"c\n\x1aVertexAnimationTextureClip\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x11\n\tframerate\x18\x02 \x01(\x02\x12\x10\n\x08\x66irstRow\x18\x03 \x01(\x05\x12\x12\n\nframeCount\x18\x04 \x01(\x05\"K\n\x14VertexAnimationFrame\x12\x33\n\x10vertexProperties\x18\x01 \x03(\x0b\x32\x19.protoblog.VertexProperty\"\xe3\x01\n\rNodeAnimation\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x11\n\tframerate\x18\x02 \x01(\x02\x12-\n\x06\x66rames\x18\x03 \x03(\x0b\x32\x1d.protoblog.NodeAnimationFrame\x12\x12\n\nframeCount\x18\x04 \x01(\x05\x12\x11\n\tpositions\x18\x05 \x01(\x0c\x12\x11\n\trotations\x18\x06 \x01(\x0c\x12\x0e\n\x06scales\x18\x07 \x01(\x0c\x12\x11\n\tframeRuns\x18\x08 \x03(\x05\x12\x11\n\tkeyFrames\x18\t \x03(\x05\x12\x12\n\nsharedClip\x18\n \x01(\t\"\x95\x01\n\x12NodeAnimationFrame\x12)\n\x08position\x18\x01 \x01(\x0b\x32\x17.protoblog.Vector3Float\x12,\n\x08rotation\x18\x02 \x01(\x0b\x32\x1a.protoblog.QuaternionFloat\x12&\n\x05scale\x18\x03 \x01(\x0b\x32\x17.protoblog.Vector3Float\"t\n\x0eVertexProperty\x12\x0c\n\x04name\x18\x01 \x01(\t\x12)\n\nscalarType\x18\x02 \x01(\x0e\x32\x15.protoblog.ScalarType\x12\x1b\n\x13scalarTypeDimension\x18\x03 \x01(\x05\x12\x0c\n\x04\x64\x61ta\x18\x04 \x01(\x0c\"/\n\x0cVector3Float\x12\t\n\x01x\x18\x01 \x01(\x02\x12\t\n\x01y\x18\x02 \x01(\x02\x12\t\n\x01z\x18\x03 \x01(\x02\"=\n\x0fQuaternionFloat\x12\t\n\x01x\x18\x01 \x01(\x02\x12\t\n\x01y\x18\x02 \x01(\x02\x12\t\n\x01z\x18\x03 \x01(\x02\x12\t\n\x01w\x18\x04 \x01(\x02\"X\n\x0e\x43ontainerIndex\x12\x0f\n\x07version\x18\x01 \x01(\x05\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\'\n\x05nodes\x18\x03 \x03(\x0b\x32\x18.protoblog.ContainerNode\"\xaf\x02\n\rContainerNode\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x0e\n\x06parent\x18\x02 \x01(\x05\x12\'\n\x04node\x18\x03 \x01(\x0b\x32\x19.protoblog.ContainerChunk\x12\x33\n\x10vertexProperties\x18\x04 \x03(\x0b\x32\x19.protoblog.ContainerChunk\x12\x33\n\x10vertexAnimations\x18\x05 \x03(\x0b\x32\x19.protoblog.ContainerChunk\x12\x31\n\x0enodeAnimations\x18\x06 \x03(\x0b\x32\x19.protoblog.ContainerChunk\x12:\n\x17vertexAnimationTextures\x18\x07 \x03(\x0b\x32\x19.protoblog.ContainerChunk\"V\n\x0e\x43ontainerChunk\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x0e\n\x06offset\x18\x02 \x01(\x03\x12\x0c\n\x04size\x18\x03 \x01(\x05\x12\x18\n\x10uncompressedSize\x18\x04 \x01(\x05*\xaa\x01\n\nScalarType\x12\x1b\n\x17SCALAR_TYPE_UNSPECIFIED\x10\x00\x12\x1d\n\x19SCALAR_TYPE_UNSIGNED_BYTE\x10\x01\x12\x1c\n\x18SCALAR_TYPE_UNSIGNED_INT\x10\x02\x12\x13\n\x0fSCALAR_TYPE_INT\x10\x03\x12\x15\n\x11SCALAR_TYPE_FLOAT\x10\x04\x12\x16\n\x12SCALAR_TYPE_DOUBLE\x10\x05*l\n\rTextureFormat\x12\x1e\n\x1aTEXTURE_FORMAT_UNSPECIFIED\x10\x00\x12\x1c\n\x18TEXTURE_FORMAT_RGBA_HALF\x10\x01\x12\x1d\n\x19TEXTURE_FORMAT_RGBA_FLOAT\x10\x02\x62\x06proto3')
 
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, globals())
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'model_pb2', globals())
 if _descriptor._USE_C_DESCRIPTORS == False:
 
   DESCRIPTOR._options = None
-  _SCALARTYPE._serialized_start=1208
-  _SCALARTYPE._serialized_end=1378
+  _SCALARTYPE._serialized_start=2215
+  _SCALARTYPE._serialized_end=2385
+  _TEXTUREFORMAT._serialized_start=2387
+  _TEXTUREFORMAT._serialized_end=2495
   _MODEL._serialized_start=26
   _MODEL._serialized_end=96
   _NODE._serialized_start=99
-  _NODE._serialized_end=475
-  _MESH._serialized_start=477
-  _MESH._serialized_end=518
-  _VERTEXANIMATION._serialized_start=521
-  _VERTEXANIMATION._serialized_end=649
-  _VERTEXANIMATIONFRAME._serialized_start=651
-  _VERTEXANIMATIONFRAME._serialized_end=726
-  _NODEANIMATION._serialized_start=728
-  _NODEANIMATION._serialized_end=823
-  _NODEANIMATIONFRAME._serialized_start=826
-  _NODEANIMATIONFRAME._serialized_end=975
-  _VERTEXPROPERTY._serialized_start=977
-  _VERTEXPROPERTY._serialized_end=1093
-  _VECTOR3FLOAT._serialized_start=1095
-  _VECTOR3FLOAT._serialized_end=1142
-  _QUATERNIONFLOAT._serialized_start=1144
-  _QUATERNIONFLOAT._serialized_end=1205
+  _NODE._serialized_end=543
+  _MESH._serialized_start=545
+  _MESH._serialized_end=586
+  _VERTEXANIMATION._serialized_start=589
+  _VERTEXANIMATION._serialized_end=756
+  _VERTEXANIMATIONTEXTURE._serialized_start=759
+  _VERTEXANIMATIONTEXTURE._serialized_end=938
+  _VERTEXANIMATIONTEXTURECLIP._serialized_start=940
+  _VERTEXANIMATIONTEXTURECLIP._serialized_end=1039
+  _VERTEXANIMATIONFRAME._serialized_start=1041
+  _VERTEXANIMATIONFRAME._serialized_end=1116
+  _NODEANIMATION._serialized_start=1119
+  _NODEANIMATION._serialized_end=1346
+  _NODEANIMATIONFRAME._serialized_start=1349
+  _NODEANIMATIONFRAME._serialized_end=1498
+  _VERTEXPROPERTY._serialized_start=1500
+  _VERTEXPROPERTY._serialized_end=1616
+  _VECTOR3FLOAT._serialized_start=1618
+  _VECTOR3FLOAT._serialized_end=1665
+  _QUATERNIONFLOAT._serialized_start=1667
+  _QUATERNIONFLOAT._serialized_end=1728
+  _CONTAINERINDEX._serialized_start=1730
+  _CONTAINERINDEX._serialized_end=1818
+  _CONTAINERNODE._serialized_start=1821
+  _CONTAINERNODE._serialized_end=2124
+  _CONTAINERCHUNK._serialized_start=2126
+  _CONTAINERCHUNK._serialized_end=2212
 # @@protoc_insertion_point(module_scope)
@@ -0,0 +1,261 @@
+import functools
+import struct
+import sys
+from google.protobuf.internal import encoder
+from model_encoder import _SMALL_VARINTS, _signed_varint, _varint
+
+# Writes the Timbermesh wire format straight from the exporter's plain node, mesh, vertex property and
+# animation records, producing the same bytes as building model_pb2 messages and calling SerializeToString().
+_pack_float = struct.Struct("<f").pack
+_packed_varint_bytes = encoder._PackedVarintBytes
+_FLOAT_TAGS = [b"\x0d", b"\x15", b"\x1d", b"\x25"]
+_NODE_TRANSFORM_TAGS = (b"\x1a", b"\x22", b"\x2a")
+_FRAME_TRANSFORM_TAGS = (b"\x0a", b"\x12", b"\x1a")
+
+
+def _encode_floats(values, start, count) -> bytes:
+    return b"".join([_FLOAT_TAGS[i] + _pack_float(values[start + i]) for i in range(count) if values[start + i]])
+
+
+def _encode_transform(positions, rotations, scales, index, tags) -> bytes:
+    position = _encode_floats(positions, index * 3, 3)
+    rotation = _encode_floats(rotations, index * 4, 4)
+    scale = _encode_floats(scales, index * 3, 3)
+    return b"".join((tags[0], _SMALL_VARINTS[len(position)], position,
+                     tags[1], _SMALL_VARINTS[len(rotation)], rotation,
+                     tags[2], _SMALL_VARINTS[len(scale)], scale))
+
+
+def _append_field(tag, encoded, parts) -> int:
+    header = tag + _varint(len(encoded))
+    parts.append(header)
+    parts.append(encoded)
+    return len(header) + len(encoded)
+
+
+def _append_message(tag, write_function, record, parts, sizes=None) -> int:
+    index = len(parts)
+    parts.append(None)
+    size = write_function(record, parts)
+    header = tag + _varint(size)
+    parts[index] = header
+    if sizes is not None:
+        sizes[record] = size
+    return len(header) + size
+
+
+# With a sizes dictionary, the encoders below record the message size of every node and of the meshes, vertex
+# properties, animations and vertex animation textures of the nodes they write in it, keyed by the record.
+def encode_model(nodes, name="", version=0, sizes=None) -> bytes:
+    parts = []
+    if version:
+        parts.append(b"\x08" + _signed_varint(version))
+    if name:
+        _append_field(b"\x12", name.encode("utf-8"), parts)
+    write_node = functools.partial(_write_node, sizes=sizes)
+    for node in nodes:
+        _append_message(b"\x1a", write_node, node, parts, sizes)
+    return b"".join(parts)
+
+
+def encode_node_metadata(node, sizes=None) -> bytes:
+    parts = []
+    _write_node_metadata(node, parts, sizes=sizes)
+    return b"".join(parts)
+
+
+def encode_vertex_property(vertex_property) -> bytes:
+    parts = []
+    _write_vertex_property(vertex_property, parts)
+    return b"".join(parts)
+
+
+def encode_vertex_animation(vertex_animation) -> bytes:
+    parts = []
+    _write_vertex_animation(vertex_animation, parts)
+    return b"".join(parts)
+
+
+def encode_node_animation(node_animation) -> bytes:
+    parts = []
+    _write_node_animation(node_animation, parts)
+    return b"".join(parts)
+
+
+def encode_vertex_animation_texture(texture) -> bytes:
+    parts = []
+    _write_vertex_animation_texture(texture, parts)
+    return b"".join(parts)
+
+
+def get_field_size(message_size) -> int:
+    # Size of a node field holding a message of the given size, all of them have single byte tags.
+    return 1 + len(_varint(message_size)) + message_size
+
+
+def _write_node(node, parts, sizes=None) -> int:
+    return _write_node_metadata(node, parts, include_data=True, sizes=sizes)
+
+
+def _write_node_metadata(node, parts, include_data=False, sizes=None) -> int:
+    size = 0
+    if node.parent_index:
+        encoded = b"\x08" + _signed_varint(node.parent_index)
+        parts.append(encoded)
+        size += len(encoded)
+    if node.name:
+        size += _append_field(b"\x12", node.name.encode("utf-8"), parts)
+    transform = _encode_transform(node.position, node.rotation, node.scale, 0, _NODE_TRANSFORM_TAGS)
+    parts.append(transform)
+    size += len(transform)
+    if node.vertex_count:
+        encoded = b"\x30" + _signed_varint(node.vertex_count)
+        parts.append(encoded)
+        size += len(encoded)
+    if include_data:
+        for vertex_property in node.vertex_properties:
+            size += _append_message(b"\x3a", _write_vertex_property, vertex_property, parts, sizes)
+    for mesh in node.meshes:
+        size += _append_message(b"\x42", _write_mesh, mesh, parts, sizes)
+    if include_data:
+        for vertex_animation in node.vertex_animations:
+            size += _append_message(b"\x4a", _write_vertex_animation, vertex_animation, parts, sizes)
+        for node_animation in node.node_animations:
+            size += _append_message(b"\x52", _write_node_animation, node_animation, parts, sizes)
+        for texture in node.vertex_animation_textures:
+            size += _append_message(b"\x5a", _write_vertex_animation_texture, texture, parts, sizes)
+    return size
+
+
+def _write_mesh(mesh, parts) -> int:
+    size = 0
+    if mesh.indices:
+        size += _append_field(b"\x0a", _packed_varint_bytes(mesh.indices.tolist()), parts)
+    if mesh.material:
+        size += _append_field(b"\x12", mesh.material.encode("utf-8"), parts)
+    return size
+
+
+def _write_vertex_property(vertex_property, parts) -> int:
+    size = 0
+    if vertex_property.name:
+        size += _append_field(b"\x0a", vertex_property.name.encode("utf-8"), parts)
+    if vertex_property.scalar_type:
+        encoded = b"\x10" + _signed_varint(vertex_property.scalar_type)
+        parts.append(encoded)
+        size += len(encoded)
+    if vertex_property.scalar_type_dimension:
+        encoded = b"\x18" + _signed_varint(vertex_property.scalar_type_dimension)
+        parts.append(encoded)
+        size += len(encoded)
+    if vertex_property.data:
+        size += _append_field(b"\x22", vertex_property.data, parts)
+    return size
+
+
+def _write_vertex_animation(vertex_animation, parts) -> int:
+    size = 0
+    if vertex_animation.name:
+        size += _append_field(b"\x0a", vertex_animation.name.encode("utf-8"), parts)
+    size += _write_framerate(vertex_animation.framerate, parts)
+    if vertex_animation.animated_vertex_count:
+        encoded = b"\x18" + _signed_varint(vertex_animation.animated_vertex_count)
+        parts.append(encoded)
+        size += len(encoded)
+    for frame in vertex_animation.frames:
+        size += _append_message(b"\x22", _write_vertex_animation_frame, frame, parts)
+    if vertex_animation.frame_runs:
+        size += _append_field(b"\x2a", _packed_varint_bytes(vertex_animation.frame_runs.tolist()), parts)
+    if vertex_animation.shared_clip:
+        size += _append_field(b"\x32", vertex_animation.shared_clip.encode("utf-8"), parts)
+    return size
+
+
+def _write_vertex_animation_frame(vertex_properties, parts) -> int:
+    size = 0
+    for vertex_property in vertex_properties:
+        size += _append_message(b"\x0a", _write_vertex_property, vertex_property, parts)
+    return size
+
+
+def _write_node_animation(node_animation, parts) -> int:
+    size = 0
+    if node_animation.name:
+        size += _append_field(b"\x0a", node_animation.name.encode("utf-8"), parts)
+    size += _write_framerate(node_animation.framerate, parts)
+    positions = node_animation.positions
+    rotations = node_animation.rotations
+    scales = node_animation.scales
+    if node_animation.packed:
+        size += _write_packed_tracks(node_animation.frame_count, positions, rotations, scales, parts)
+    else:
+        frames = []
+        for frame_index in range(node_animation.frame_count):
+            frame = _encode_transform(positions, rotations, scales, frame_index, _FRAME_TRANSFORM_TAGS)
+            frames.append(b"\x1a" + _SMALL_VARINTS[len(frame)] + frame)
+        encoded = b"".join(frames)
+        parts.append(encoded)
+        size += len(encoded)
+    if node_animation.frame_runs:
+        size += _append_field(b"\x42", _packed_varint_bytes(node_animation.frame_runs.tolist()), parts)
+    if node_animation.key_frames:
+        size += _append_field(b"\x4a", _packed_varint_bytes(node_animation.key_frames.tolist()), parts)
+    if node_animation.shared_clip:
+        size += _append_field(b"\x52", node_animation.shared_clip.encode("utf-8"), parts)
+    return size
+
+
+def _write_vertex_animation_texture(texture, parts) -> int:
+    size = 0
+    if texture.name:
+        size += _append_field(b"\x0a", texture.name.encode("utf-8"), parts)
+    for tag, value in ((b"\x10", texture.format), (b"\x18", texture.width), (b"\x20", texture.height)):
+        if value:
+            encoded = tag + _signed_varint(value)
+            parts.append(encoded)
+            size += len(encoded)
+    if texture.data:
+        size += _append_field(b"\x2a", texture.data, parts)
+    for clip in texture.clips:
+        size += _append_message(b"\x32", _write_vertex_animation_texture_clip, clip, parts)
+    return size
+
+
+def _write_vertex_animation_texture_clip(clip, parts) -> int:
+    size = 0
+    if clip.name:
+        size += _append_field(b"\x0a", clip.name.encode("utf-8"), parts)
+    size += _write_framerate(clip.framerate, parts)
+    for tag, value in ((b"\x18", clip.first_row), (b"\x20", clip.frame_count)):
+        if value:
+            encoded = tag + _signed_varint(value)
+            parts.append(encoded)
+            size += len(encoded)
+    return size
+
+
+def _write_packed_tracks(frame_count, positions, rotations, scales, parts) -> int:
+    if not frame_count:
+        return 0
+    encoded = b"\x20" + _signed_varint(frame_count)
+    parts.append(encoded)
+    size = len(encoded)
+    size += _append_field(b"\x2a", _get_little_endian_bytes(positions), parts)
+    size += _append_field(b"\x32", _get_little_endian_bytes(rotations), parts)
+    size += _append_field(b"\x3a", _get_little_endian_bytes(scales), parts)
+    return size
+
+
+def _get_little_endian_bytes(values) -> bytes:
+    if sys.byteorder != "little":
+        values = values[:]
+        values.byteswap()
+    return values.tobytes()
+
+
+def _write_framerate(framerate, parts) -> int:
+    encoded = _pack_float(framerate)
+    if not struct.unpack("<f", encoded)[0]:
+        return 0
+    parts.append(b"\x15" + encoded)
+    return 5
@@ -1,46 +1,32 @@
-﻿import mathutils
-import itertools
+﻿import array
+import numpy
+import mathutils
 import animation_utils
 import blender_utils
 import blender_types
 import vertex_properties_utils
 import exporter_utils
-
-
-class MeshVertex:
-    def __init__(self, index, source_index, source_loop_index, position, normal, tangent, uv0, uv1, uv2, color):
-        self.index = index
-        self.source_index = source_index
-        self.source_loop_index = source_loop_index
-        self.position = position
-        self.normal = normal
-        self.tangent = tangent
-        self.uv0 = uv0
-        self.uv1 = uv1
-        self.uv2 = uv2
-        self.color = color
-
-    def is_replaceable_by(self, other) -> bool:
-        return self.source_index == other.source_index \
-            and self.normal == other.normal \
-            and self.tangent == other.tangent \
-            and self.uv0 == other.uv0 \
-            and self.uv1 == other.uv1 \
-            and self.uv2 == other.uv2 \
-            and self.color == other.color
+import scene_snapshot
+import thread_pools
+import work_slices
 
 
 class OriginalMesh:
     def __init__(self):
         self.node_matrix = []
         self.world_matrix_inverted = []
-        self.vertices = []
+        # Node vertex index, source vertex index, source loop index and position of every vertex created from the
+        # mesh, in creation order.
+        self.vertex_indices = None
+        self.source_indices = None
+        self.source_loop_indices = None
+        self.positions = None
 
 
 class Mesh:
     def __init__(self):
         self.name = ""
-        self.indices = []
+        self.indices = array.array("i")
 
 
 class Node:
@@ -48,10 +34,19 @@ class Node:
         self.name = ""
         self.parent = None
         self.hierarchy_node = None
+        self.parent_index = -1
         self.mesh_objects = []
-        self.timbermesh_node = None
+        self.position = array.array("f", (0, 0, 0))
+        self.rotation = array.array("f", (0, 0, 0, 0))
+        self.scale = array.array("f", (0, 0, 0))
+        self.vertex_count = 0
+        self.source_vertex_count = 0
+        self.vertex_properties = []
+        self.vertex_animations = []
+        self.node_animations = []
+        self.vertex_animation_textures = []
         self.meshes = []
-        self.vertices = []
+        self.mesh_snapshots = []
         self.original_object_meshes = {}
         self.animated_vertex_count = 0
         self.has_colors = False
@@ -63,29 +58,53 @@ class Node:
 class NodeBuilder:
 
     @classmethod
-    def create_nodes(cls, root_hierarchy_node, context, timbermesh_model) -> list:
+    def create_nodes(cls, root_hierarchy_node, context, thread_pool=None, snapshot_cache=None) -> list:
+        return work_slices.run(cls.iterate_nodes(root_hierarchy_node, context, thread_pool, snapshot_cache))
+
+    @classmethod
+    def iterate_nodes(cls, root_hierarchy_node, context, thread_pool=None, snapshot_cache=None):
+        # Meshes are captured from Blender on this thread, the vertices of every node are built from the captured
+        # snapshots on the thread pool while the next nodes are captured. The node transforms are saved from the local
+        # matrices captured with the meshes.
+        thread_pool = thread_pool or thread_pools.ThreadPool(0)
+        hierarchy_nodes = cls.__get_hierarchy_nodes(root_hierarchy_node)
+        rest_snapshot = scene_snapshot.FrameSnapshot()
+        created_nodes = {}
         nodes = []
-        cls.__create_node(context, root_hierarchy_node, nodes)
-        cls.__save_nodes(nodes, timbermesh_model)
+        vertex_futures = []
+        for hierarchy_node in hierarchy_nodes:
+            node = cls.__create_node(context, hierarchy_node, rest_snapshot, snapshot_cache)
+            if hierarchy_node.parent is not None:
+                node.parent = created_nodes[hierarchy_node.parent]
+            created_nodes[hierarchy_node] = node
+            nodes.append(node)
+            vertex_futures.append(thread_pool.submit(cls.__build_node_vertices, node))
+            yield len(nodes) / len(hierarchy_nodes)
+
+        thread_pools.get_results(vertex_futures)
+        cls.__save_nodes(nodes, rest_snapshot)
         return nodes
 
     @classmethod
-    def __create_node(cls, context, hierarchy_node, created_nodes) -> Node:
+    def __get_hierarchy_nodes(cls, hierarchy_node) -> list:
+        hierarchy_nodes = [hierarchy_node]
+        for child_node in hierarchy_node.children:
+            hierarchy_nodes.extend(cls.__get_hierarchy_nodes(child_node))
+        return hierarchy_nodes
+
+    @classmethod
+    def __create_node(cls, context, hierarchy_node, rest_snapshot, snapshot_cache) -> Node:
         node = Node()
         node.name = hierarchy_node.name
         node.hierarchy_node = hierarchy_node
-        created_nodes.append(node)
-
-        cls.__create_node_mesh(context, node)
-
-        for child_node in hierarchy_node.children:
-            child_node = cls.__create_node(context, child_node, created_nodes)
-            child_node.parent = node
-
+        source_object = hierarchy_node.source_object
+        if source_object is not None:
+            rest_snapshot.local_matrices[source_object.name] = scene_snapshot.capture_local_matrix(source_object)
+        cls.__create_node_mesh(context, node, snapshot_cache)
         return node
 
     @classmethod
-    def __create_node_mesh(cls, context, node) -> None:
+    def __create_node_mesh(cls, context, node, snapshot_cache) -> None:
         cls.__create_empty_meshes(node, node.hierarchy_node.object_matrix_stack.keys())
         objects_sorted_by_animation = sorted(node.hierarchy_node.object_matrix_stack,
                                              key=lambda x: not animation_utils.is_object_animated_in_hierarchy(x))
@@ -99,9 +118,10 @@ class NodeBuilder:
                 node.original_object_meshes[obj.name].node_matrix = object_matrix.copy()
                 node.original_object_meshes[obj.name].world_matrix_inverted = obj.matrix_world.inverted().copy()
                 node.mesh_objects.append(obj)
-                cls.__update_node_vertices(node, evaluated_object, object_matrix)
-                if animation_utils.is_object_animated_in_hierarchy(obj):
-                    node.animated_vertex_count += len(node.original_object_meshes[obj.name].vertices)
+                mesh_snapshot = scene_snapshot.capture_mesh(evaluated_object, object_matrix,
+                                                            snapshot_cache=snapshot_cache)
+                node.mesh_snapshots.append((obj.name, mesh_snapshot,
+                                            animation_utils.is_object_animated_in_hierarchy(obj)))
 
     @classmethod
     def __create_empty_meshes(cls, node, objects) -> None:
@@ -112,175 +132,136 @@ class NodeBuilder:
             node.meshes.append(mesh)
 
     @classmethod
-    def __update_node_vertices(cls, node, obj, matrix) -> None:
-        created_mesh = None
-        try:
-            created_mesh = blender_utils.create_mesh(obj, matrix)
-            has_colors, has_uv0, has_uv1, has_uv2 = cls.__get_mesh_layers(created_mesh)
-            node.has_colors = node.has_colors or has_colors
-            node.has_uv0 = node.has_uv0 or has_uv0
-            node.has_uv1 = node.has_uv1 or has_uv1
-            node.has_uv2 = node.has_uv2 or has_uv2
-
-            vertex_index = len(node.vertices)
-            created_vertex_map = {}
-            for vertex in created_mesh.vertices:
-                created_vertex_map[vertex.index] = []
-
-            sorted_triangles = sorted(created_mesh.loop_triangles, key=lambda x: x.material_index)
-            for material_index, triangles in itertools.groupby(sorted_triangles, lambda x: x.material_index):
-                triangle_list = list(triangles)
-
-                if len(obj.material_slots) > 0:
-                    material_name = obj.material_slots[material_index].material.name
-                else:
-                    material_name = ""
-                mesh = next((m for m in node.meshes if m.material == material_name), None)
-
-                for triangle in triangle_list:
-                    for i in reversed(range(3)):
-                        loop_index = triangle.loops[i]
-                        original_vertex_index = triangle.vertices[i]
-                        original_vertex = created_mesh.vertices[original_vertex_index]
-                        position = original_vertex.co.copy()
-                        normal = created_mesh.loops[loop_index].normal.copy()
-                        tangent = created_mesh.loops[loop_index].tangent.copy()
-                        bitangent_sign = created_mesh.loops[loop_index].bitangent_sign
-
-                        if has_uv0:
-                            uv0 = created_mesh.uv_layers[0].data[loop_index].uv.copy()
-                        else:
-                            uv0 = mathutils.Vector((0, 0))
-
-                        if has_uv1:
-                            uv1 = created_mesh.uv_layers[1].data[loop_index].uv.copy()
-                        else:
-                            uv1 = mathutils.Vector((0, 0))
-
-                        if has_uv2:
-                            uv2 = created_mesh.uv_layers[2].data[loop_index].uv.copy()
-                        else:
-                            uv2 = mathutils.Vector((0, 0))
-
-                        if has_colors:
-                            loop_color = created_mesh.vertex_colors[0].data[loop_index].color
-                            color = [loop_color[0], loop_color[1], loop_color[2], loop_color[3]]
-                        else:
-                            color = [1, 1, 1, 1]
-
-                        new_vertex = MeshVertex(vertex_index,
-                                                original_vertex_index,
-                                                loop_index,
-                                                position,
-                                                normal,
-                                                [tangent.x, tangent.y, tangent.z, bitangent_sign],
-                                                uv0,
-                                                uv1,
-                                                uv2,
-                                                color)
-
-                        existing_equal_vertex = next(
-                            (v for v in created_vertex_map[original_vertex_index] if v.is_replaceable_by(new_vertex)),
-                            None)
-                        if existing_equal_vertex is None:
-                            created_vertex_map[original_vertex_index].append(new_vertex)
-                            node.vertices.append(new_vertex)
-                            node.original_object_meshes[obj.name].vertices.append(new_vertex)
-                            mesh.indices.append(vertex_index)
-                            vertex_index += 1
-                        else:
-                            mesh.indices.append(existing_equal_vertex.index)
-        finally:
-            if created_mesh is not None:
-                blender_utils.remove_mesh(created_mesh)
+    def __build_node_vertices(cls, node) -> None:
+        # Runs on the thread pool, so only NumPy works on the snapshot arrays here.
+        object_vertex_values = []
+        for obj_name, mesh_snapshot, is_animated in node.mesh_snapshots:
+            object_vertex_values.append(cls.__update_node_vertices(node, obj_name, mesh_snapshot))
+            if is_animated:
+                node.animated_vertex_count += len(node.original_object_meshes[obj_name].vertex_indices)
+        node.mesh_snapshots = []
+        cls.__save_node_vertex_properties(node, object_vertex_values)
 
     @classmethod
-    def __get_mesh_layers(cls, source_mesh) -> (bool, bool, bool, bool):
-        has_colors = len(source_mesh.vertex_colors) > 0
-        has_uv0 = len(source_mesh.uv_layers) > 0
-        has_uv1 = len(source_mesh.uv_layers) > 1
-        has_uv2 = len(source_mesh.uv_layers) > 2
-        return has_colors, has_uv0, has_uv1, has_uv2
+    def __update_node_vertices(cls, node, obj_name, mesh) -> dict:
+        # Triangle corners are taken grouped by material, in reversed winding. A corner that matches an earlier corner
+        # of the same source vertex in every attribute reuses its vertex, vertices are numbered by their first corner.
+        has_colors = mesh.colors is not None
+        has_uv0 = len(mesh.uv_layers) > 0
+        has_uv1 = len(mesh.uv_layers) > 1
+        has_uv2 = len(mesh.uv_layers) > 2
+        node.has_colors = node.has_colors or has_colors
+        node.has_uv0 = node.has_uv0 or has_uv0
+        node.has_uv1 = node.has_uv1 or has_uv1
+        node.has_uv2 = node.has_uv2 or has_uv2
+        node.source_vertex_count += mesh.vertex_count
+
+        triangle_order = numpy.argsort(mesh.triangle_material_indices, kind="stable")
+        triangle_material_indices = mesh.triangle_material_indices[triangle_order]
+        corner_loops = mesh.triangle_loops[triangle_order, ::-1].reshape(-1)
+        corner_vertices = mesh.triangle_vertices[triangle_order, ::-1].reshape(-1)
+
+        corner_values = {"normal": mesh.loop_normals[corner_loops],
+                         "tangent": numpy.column_stack((mesh.loop_tangents[corner_loops],
+                                                        mesh.loop_bitangent_signs[corner_loops]))}
+        for uv_index, uvs in enumerate(mesh.uv_layers):
+            corner_values["uv" + str(uv_index)] = uvs[corner_loops]
+        if has_colors:
+            corner_values["color"] = mesh.colors[corner_loops]
+        corner_vertex_indices, vertex_corners = cls.__merge_corners(corner_vertices, list(corner_values.values()))
+
+        vertex_index = node.vertex_count
+        node.vertex_count += len(vertex_corners)
+        corner_vertex_indices += vertex_index
+
+        material_indices, material_starts = numpy.unique(triangle_material_indices, return_index=True)
+        material_corner_indices = numpy.split(corner_vertex_indices, material_starts[1:] * 3)
+        for material_index, indices in zip(material_indices.tolist(), material_corner_indices):
+            if len(mesh.material_names) > 0:
+                material_name = mesh.material_names[material_index]
+            else:
+                material_name = ""
+            node_mesh = next((m for m in node.meshes if m.material == material_name), None)
+            node_mesh.indices.frombytes(indices.astype(numpy.intc).tobytes())
+
+        original_mesh = node.original_object_meshes[obj_name]
+        original_mesh.vertex_indices = numpy.arange(vertex_index, node.vertex_count)
+        original_mesh.source_indices = corner_vertices[vertex_corners]
+        original_mesh.source_loop_indices = corner_loops[vertex_corners]
+        original_mesh.positions = mesh.positions[original_mesh.source_indices]
+
+        vertex_count = len(vertex_corners)
+        vertex_values = {"position": original_mesh.positions,
+                         "uv0": numpy.zeros((vertex_count, 2), dtype=scene_snapshot.FLOAT_DTYPE),
+                         "uv1": numpy.zeros((vertex_count, 2), dtype=scene_snapshot.FLOAT_DTYPE),
+                         "uv2": numpy.zeros((vertex_count, 2), dtype=scene_snapshot.FLOAT_DTYPE),
+                         "color": numpy.ones((vertex_count, 4), dtype=scene_snapshot.FLOAT_DTYPE)}
+        for name, values in corner_values.items():
+            vertex_values[name] = values[vertex_corners]
+        return vertex_values
 
     @classmethod
-    def __save_nodes(cls, nodes, timbermesh_model) -> None:
+    def __merge_corners(cls, corner_vertices, corner_values) -> (numpy.ndarray, numpy.ndarray):
+        # Returns the vertex of every corner, numbered in the order of first use, and the first corner of every
+        # vertex. The keys are compared bytewise, adding zero turns -0.0 into 0.0 like the float comparison does.
+        keys = numpy.column_stack([corner_vertices] + corner_values).astype(numpy.float64) + 0.0
+        keys = keys.view(numpy.dtype((numpy.void, keys.shape[1] * keys.itemsize))).reshape(-1)
+        _, first_corners, corner_keys = numpy.unique(keys, return_index=True, return_inverse=True)
+        key_order = numpy.argsort(first_corners)
+        key_vertex_indices = numpy.empty_like(key_order)
+        key_vertex_indices[key_order] = numpy.arange(len(key_order))
+        return key_vertex_indices[corner_keys.reshape(-1)], first_corners[key_order]
+
+    @classmethod
+    def __save_nodes(cls, nodes, rest_snapshot) -> None:
+        node_indices = {node: index for index, node in enumerate(nodes)}
         for node in nodes:
-            timbermesh_node = timbermesh_model.nodes.add()
-            timbermesh_node.name = node.name
-            timbermesh_node.parent = nodes.index(node.parent) if node.parent is not None else -1
-            node.timbermesh_node = timbermesh_node
+            node.parent_index = node_indices[node.parent] if node.parent is not None else -1
 
             source_object = node.hierarchy_node.source_object
             object_transform_matrix = mathutils.Matrix.Identity(4)
-            if node.hierarchy_node.source_object is not None:
-                object_transform_matrix = blender_utils.get_local_matrix(source_object)
-            cls.__save_node_transform(timbermesh_node, object_transform_matrix)
-            cls.__save_node_vertex_properties(timbermesh_node, node)
-            cls.__save_node_meshes(timbermesh_node, node)
+            if source_object is not None:
+                object_transform_matrix = mathutils.Matrix(rest_snapshot.local_matrices[source_object.name].tolist())
+            cls.__save_node_transform(node, object_transform_matrix)
 
     @classmethod
-    def __save_node_transform(cls, timbermesh_node, matrix) -> None:
+    def __save_node_transform(cls, node, matrix) -> None:
         position = matrix.to_translation()
         rotation = matrix.to_quaternion()
         scale = matrix.to_scale()
 
-        timbermesh_node.position.x = -position.x
-        timbermesh_node.position.y = position.z
-        timbermesh_node.position.z = -position.y
-
-        timbermesh_node.rotation.x = rotation.x
-        timbermesh_node.rotation.y = -rotation.z
-        timbermesh_node.rotation.z = rotation.y
-        timbermesh_node.rotation.w = rotation.w
-
-        timbermesh_node.scale.x = scale.x
-        timbermesh_node.scale.y = scale.z
-        timbermesh_node.scale.z = scale.y
+        node.position = array.array("f", (-position.x, position.z, -position.y))
+        node.rotation = array.array("f", (rotation.x, -rotation.z, rotation.y, rotation.w))
+        node.scale = array.array("f", (scale.x, scale.z, scale.y))
 
     @classmethod
-    def __save_node_vertex_properties(cls, timbermesh_node, node) -> None:
-        sorted_vertices = sorted(node.vertices, key=lambda v: v.index)
-        positions = []
-        normals = []
-        tangents = []
-        colors = []
-        uv0 = []
-        uv1 = []
-        uv2 = []
-
-        for vertex in sorted_vertices:
-            positions.append(mathutils.Vector((-vertex.position.x, vertex.position.z, -vertex.position.y)))
-            normals.append(mathutils.Vector((-vertex.normal.x, vertex.normal.z, -vertex.normal.y)))
-            tangents.append(
-                mathutils.Vector((-vertex.tangent[0], vertex.tangent[2], -vertex.tangent[1], -vertex.tangent[3])))
-
-            if node.has_colors:
-                colors.append(mathutils.Vector((vertex.color[0], vertex.color[1], vertex.color[2], vertex.color[3])))
-            if node.has_uv0:
-                uv0.append(mathutils.Vector((vertex.uv0.x, vertex.uv0.y)))
-            if node.has_uv1:
-                uv1.append(mathutils.Vector((vertex.uv1.x, vertex.uv1.y)))
-            if node.has_uv2:
-                uv2.append(mathutils.Vector((vertex.uv2.x, vertex.uv2.y)))
-
-        timbermesh_node.vertexCount = len(sorted_vertices)
-        timbermesh_node.vertexProperties.append(vertex_properties_utils.create_vector3(positions, "position"))
-        timbermesh_node.vertexProperties.append(vertex_properties_utils.create_vector3(normals, "normal"))
-        timbermesh_node.vertexProperties.append(vertex_properties_utils.create_vector4(tangents, "tangent"))
+    def __save_node_vertex_properties(cls, node, object_vertex_values) -> None:
+        # Blender axes (x, y, z) are stored as (-x, z, -y), the bitangent sign flips with the handedness.
+        positions = cls.__get_vertex_values(object_vertex_values, "position", 3)
+        normals = cls.__get_vertex_values(object_vertex_values, "normal", 3)
+        tangents = cls.__get_vertex_values(object_vertex_values, "tangent", 4)
+
+        node.vertex_properties.append(vertex_properties_utils.create_array(positions[:, [0, 2, 1]] * (-1, 1, -1),
+                                                                           "position"))
+        node.vertex_properties.append(vertex_properties_utils.create_array(normals[:, [0, 2, 1]] * (-1, 1, -1),
+                                                                           "normal"))
+        node.vertex_properties.append(vertex_properties_utils.create_array(
+            tangents[:, [0, 2, 1, 3]] * (-1, 1, -1, -1), "tangent"))
 
         if node.has_colors:
-            timbermesh_node.vertexProperties.append(vertex_properties_utils.create_vector4(colors, "color"))
+            node.vertex_properties.append(vertex_properties_utils.create_array(
+                cls.__get_vertex_values(object_vertex_values, "color", 4), "color"))
         if node.has_uv0:
-            timbermesh_node.vertexProperties.append(vertex_properties_utils.create_vector2(uv0, "uv0"))
+            node.vertex_properties.append(vertex_properties_utils.create_array(
+                cls.__get_vertex_values(object_vertex_values, "uv0", 2), "uv0"))
         if node.has_uv1:
-            timbermesh_node.vertexProperties.append(vertex_properties_utils.create_vector2(uv1, "uv1"))
+            node.vertex_properties.append(vertex_properties_utils.create_array(
+                cls.__get_vertex_values(object_vertex_values, "uv1", 2), "uv1"))
         if node.has_uv2:
-            timbermesh_node.vertexProperties.append(vertex_properties_utils.create_vector2(uv2, "uv2"))
+            node.vertex_properties.append(vertex_properties_utils.create_array(
+                cls.__get_vertex_values(object_vertex_values, "uv2", 2), "uv2"))
 
     @classmethod
-    def __save_node_meshes(cls, timbermesh_node, node) -> None:
-        for mesh in node.meshes:
-            timbermesh_mesh = timbermesh_node.meshes.add()
-            timbermesh_mesh.material = mesh.material
-            for index in mesh.indices:
-                timbermesh_mesh.indices.append(index)
+    def __get_vertex_values(cls, object_vertex_values, name, dimension) -> numpy.ndarray:
+        return numpy.concatenate([vertex_values[name] for vertex_values in object_vertex_values]
+                                 + [numpy.empty((0, dimension), dtype=scene_snapshot.FLOAT_DTYPE)])
@@ -0,0 +1,180 @@
+import collections
+import math
+import numpy
+import blender_utils
+
+# Captures what the node and animation builders need from Blender into plain NumPy arrays in one pass, so everything
+# after the capture runs on the snapshots without touching bpy data. Meshes are captured from the evaluated object,
+# transformed and triangulated, with one bulk foreach_get per attribute. Blender stores these attributes as 32-bit
+# floats, so the snapshot holds the exact values.
+FLOAT_DTYPE = numpy.float32
+INDEX_DTYPE = numpy.int32
+MAX_UV_LAYER_COUNT = 3
+
+
+class MeshSnapshot:
+    def __init__(self):
+        self.vertex_count = 0
+        # (vertex count, 3)
+        self.positions = None
+        # (loop count, 3), (loop count, 3) and (loop count)
+        self.loop_normals = None
+        self.loop_tangents = None
+        self.loop_bitangent_signs = None
+        # (loop count, 2) for each of the first UV layers and (loop count, 4) for the first color layer or None
+        self.uv_layers = []
+        self.colors = None
+        # (triangle count, 3), (triangle count, 3) and (triangle count)
+        self.triangle_loops = None
+        self.triangle_vertices = None
+        self.triangle_material_indices = None
+        # Material name of every material slot.
+        self.material_names = []
+
+
+class FrameSnapshot:
+    def __init__(self):
+        # Mesh snapshots (geometry only) by mesh object name.
+        self.meshes = {}
+        # (4, 4) local matrices by source object name.
+        self.local_matrices = {}
+
+
+class FrameState:
+    def __init__(self, context, frame):
+        self.context = context
+        self.frame = frame
+        self.depsgraph = None
+
+    def get_depsgraph(self):
+        if self.depsgraph is None:
+            frame_index = math.floor(self.frame)
+            self.context.scene.frame_set(frame_index, subframe=self.frame - frame_index)
+            self.depsgraph = self.context.evaluated_depsgraph_get()
+        return self.depsgraph
+
+
+class SnapshotCache:
+    # Keeps snapshots for the duration of a batch export, so objects shared by several collections are only captured
+    # once. Mesh snapshots are keyed by object, evaluated mesh and matrix, frame snapshots by the action the frame was
+    # sampled with, the frame and the object. The least recently used snapshots are dropped once the arrays exceed
+    # memory_limit bytes. Cached arrays are shared between exports and must not be modified.
+    def __init__(self, memory_limit):
+        self.memory_limit = memory_limit
+        self.memory_size = 0
+        self.hit_count = 0
+        self.miss_count = 0
+        self.__entries = collections.OrderedDict()
+
+    def get(self, key):
+        entry = self.__entries.get(key)
+        if entry is None:
+            self.miss_count += 1
+            return None
+        self.hit_count += 1
+        self.__entries.move_to_end(key)
+        return entry[0]
+
+    def contains(self, key) -> bool:
+        return key in self.__entries
+
+    def put(self, key, value, size) -> None:
+        if key in self.__entries or size > self.memory_limit:
+            return
+        self.__entries[key] = (value, size)
+        self.memory_size += size
+        while self.memory_size > self.memory_limit:
+            _, (_, evicted_size) = self.__entries.popitem(last=False)
+            self.memory_size -= evicted_size
+
+    def print_summary(self) -> None:
+        print("Snapshot cache reused", self.hit_count, "of", self.hit_count + self.miss_count, "captures,",
+              "{0:.1f} MB".format(self.memory_size / (1 << 20)), "cached")
+
+
+def capture_mesh(evaluated_object, matrix, include_attributes=True, snapshot_cache=None) -> MeshSnapshot:
+    key = ("mesh", evaluated_object.name, evaluated_object.data.name, tuple(tuple(row) for row in matrix),
+           include_attributes)
+    return __get_cached(snapshot_cache, key, lambda: __capture_mesh(evaluated_object, matrix, include_attributes),
+                        get_mesh_size)
+
+
+def get_mesh_size(snapshot) -> int:
+    arrays = [snapshot.positions, snapshot.loop_normals, snapshot.loop_tangents, snapshot.loop_bitangent_signs,
+              snapshot.colors, snapshot.triangle_loops, snapshot.triangle_vertices,
+              snapshot.triangle_material_indices] + snapshot.uv_layers
+    return sum(values.nbytes for values in arrays if values is not None)
+
+
+def __capture_mesh(evaluated_object, matrix, include_attributes) -> MeshSnapshot:
+    snapshot = MeshSnapshot()
+    mesh = None
+    try:
+        mesh = blender_utils.create_mesh(evaluated_object, matrix)
+        vertex_count = len(mesh.vertices)
+        loop_count = len(mesh.loops)
+        snapshot.vertex_count = vertex_count
+        snapshot.positions = __get_values(mesh.vertices, "co", vertex_count, 3)
+        snapshot.loop_normals = __get_values(mesh.loops, "normal", loop_count, 3)
+        snapshot.loop_tangents = __get_values(mesh.loops, "tangent", loop_count, 3)
+        if not include_attributes:
+            return snapshot
+
+        snapshot.loop_bitangent_signs = __get_values(mesh.loops, "bitangent_sign", loop_count, 1)
+        snapshot.uv_layers = [__get_values(uv_layer.data, "uv", loop_count, 2)
+                              for uv_layer in list(mesh.uv_layers)[:MAX_UV_LAYER_COUNT]]
+        if len(mesh.vertex_colors) > 0:
+            snapshot.colors = __get_values(mesh.vertex_colors[0].data, "color", loop_count, 4)
+
+        triangle_count = len(mesh.loop_triangles)
+        snapshot.triangle_loops = __get_values(mesh.loop_triangles, "loops", triangle_count, 3, INDEX_DTYPE)
+        snapshot.triangle_vertices = __get_values(mesh.loop_triangles, "vertices", triangle_count, 3, INDEX_DTYPE)
+        snapshot.triangle_material_indices = __get_values(mesh.loop_triangles, "material_index", triangle_count, 1,
+                                                          INDEX_DTYPE)
+        snapshot.material_names = [slot.material.name if slot.material is not None else ""
+                                   for slot in evaluated_object.material_slots]
+        return snapshot
+    finally:
+        if mesh is not None:
+            blender_utils.remove_mesh(mesh)
+
+
+def capture_frame(context, frame, vertex_animation_nodes, node_animation_nodes, snapshot_cache=None,
+                  action_name="") -> FrameSnapshot:
+    # The scene is only set to the frame when a snapshot is not in the cache.
+    frame_state = FrameState(context, frame)
+    snapshot = FrameSnapshot()
+    for node in vertex_animation_nodes:
+        for obj in node.mesh_objects:
+            snapshot.meshes[obj.name] = __get_cached(
+                snapshot_cache, ("frame mesh", action_name, frame, obj.name),
+                lambda: __capture_mesh(obj.evaluated_get(frame_state.get_depsgraph()), obj.matrix_world, False),
+                get_mesh_size)
+    for node in node_animation_nodes:
+        source_object = node.hierarchy_node.source_object
+        snapshot.local_matrices[source_object.name] = __get_cached(
+            snapshot_cache, ("local matrix", action_name, frame, source_object.name),
+            lambda: capture_local_matrix(source_object.evaluated_get(frame_state.get_depsgraph())),
+            lambda local_matrix: local_matrix.nbytes)
+    return snapshot
+
+
+def capture_local_matrix(obj) -> numpy.ndarray:
+    local_matrix = blender_utils.get_local_matrix(obj)
+    return numpy.array([list(row) for row in local_matrix], dtype=FLOAT_DTYPE)
+
+
+def __get_cached(snapshot_cache, key, capture, get_size):
+    if snapshot_cache is None:
+        return capture()
+    value = snapshot_cache.get(key)
+    if value is None:
+        value = capture()
+        snapshot_cache.put(key, value, get_size(value))
+    return value
+
+
+def __get_values(collection, attribute, count, dimension, dtype=None) -> numpy.ndarray:
+    values = numpy.empty(count * dimension, dtype=dtype or FLOAT_DTYPE)
+    collection.foreach_get(attribute, values)
+    return values.reshape(count, dimension) if dimension > 1 else values
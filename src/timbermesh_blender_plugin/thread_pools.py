@@ -0,0 +1,69 @@
+import collections
+import concurrent.futures
+import weakref
+
+# Runs the export work that no longer touches Blender data (vertex processing, serialization and compression) on
+# worker threads. zlib and most NumPy operations release the GIL while they run. Results are always consumed in
+# submission order, so the exported file is identical for any thread count of 2 or more. A pool with fewer than two
+# threads runs every task at once on the calling thread, and the compressed stream then differs (see work_slices).
+PENDING_TASKS_PER_THREAD = 2
+
+
+class ThreadPool:
+    def __init__(self, thread_count):
+        self.thread_count = thread_count
+        self.executor = None
+        self.__submitted_futures = weakref.WeakSet()
+        if thread_count > 1:
+            self.executor = concurrent.futures.ThreadPoolExecutor(thread_count, "timbermesh_export")
+
+    def is_parallel(self) -> bool:
+        return self.executor is not None
+
+    def submit(self, function, *args) -> concurrent.futures.Future:
+        if self.executor is not None:
+            future = self.executor.submit(function, *args)
+            self.__submitted_futures.add(future)
+            return future
+        future = concurrent.futures.Future()
+        future.set_result(function(*args))
+        return future
+
+    def imap(self, function, items):
+        # Yields the results in the order of the items and keeps a bounded number of tasks pending, so large
+        # results do not pile up in memory.
+        pending_futures = collections.deque()
+        max_pending_task_count = max(self.thread_count, 1) * PENDING_TASKS_PER_THREAD
+        try:
+            for item in items:
+                pending_futures.append(self.submit(function, item))
+                if len(pending_futures) >= max_pending_task_count:
+                    yield pending_futures.popleft().result()
+            while pending_futures:
+                yield pending_futures.popleft().result()
+        finally:
+            for future in pending_futures:
+                future.cancel()
+
+    def close(self) -> None:
+        if self.executor is not None:
+            # Cancels the tasks that have not started yet. Executor.shutdown(cancel_futures=True) would do the same,
+            # but it needs Python 3.9 (Blender 2.93).
+            for future in list(self.__submitted_futures):
+                future.cancel()
+            self.executor.shutdown()
+            self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def get_results(futures) -> list:
+    try:
+        return [future.result() for future in futures]
+    finally:
+        for future in futures:
+            future.cancel()
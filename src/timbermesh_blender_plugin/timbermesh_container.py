@@ -0,0 +1,223 @@
+import itertools
+import struct
+import zlib
+from google.protobuf.internal import python_message
+import model_pb2
+import model_encoder
+import model_writer
+import thread_pools
+import work_slices
+
+# Indexed container layout:
+#   MAGIC | index size (uint32, little-endian) | ContainerIndex | chunk data
+# Chunk offsets are relative to the start of the chunk data, every chunk is compressed independently.
+MAGIC = b"TMBC"
+INDEX_SIZE_FORMAT = "<I"
+HEADER_SIZE = len(MAGIC) + struct.calcsize(INDEX_SIZE_FORMAT)
+
+
+def is_container(data) -> bool:
+    return bytes(data[:len(MAGIC)]) == MAGIC
+
+
+class ContainerWriter:
+
+    @classmethod
+    def write(cls, nodes, file, compression_level=zlib.Z_DEFAULT_COMPRESSION, name="", version=0,
+              thread_pool=None, sizes=None) -> model_pb2.ContainerIndex:
+        return work_slices.run(cls.iterate_write(nodes, file, compression_level, name, version, thread_pool, sizes))
+
+    @classmethod
+    def iterate_write(cls, nodes, file, compression_level=zlib.Z_DEFAULT_COMPRESSION, name="", version=0,
+                      thread_pool=None, sizes=None):
+        # sizes receives the message sizes of the written records, see model_writer.
+        node_chunks = (cls.__get_node_chunks(node, sizes) for node in nodes)
+        return (yield from cls.__iterate_write_chunks(node_chunks, len(nodes), file, compression_level, name,
+                                                      version, thread_pool))
+
+    @classmethod
+    def write_model(cls, timbermesh_model, file, compression_level=zlib.Z_DEFAULT_COMPRESSION,
+                    thread_pool=None) -> model_pb2.ContainerIndex:
+        node_chunks = (cls.__get_message_node_chunks(timbermesh_node) for timbermesh_node in timbermesh_model.nodes)
+        return work_slices.run(cls.__iterate_write_chunks(node_chunks, len(timbermesh_model.nodes), file,
+                                                          compression_level, timbermesh_model.name,
+                                                          timbermesh_model.version, thread_pool))
+
+    @classmethod
+    def __get_node_chunks(cls, node, sizes) -> tuple:
+        node_chunk = model_writer.encode_node_metadata(node, sizes)
+        data_chunks = ([(p, model_writer.encode_vertex_property(p)) for p in node.vertex_properties],
+                       [(a, model_writer.encode_vertex_animation(a)) for a in node.vertex_animations],
+                       [(a, model_writer.encode_node_animation(a)) for a in node.node_animations],
+                       [(t, model_writer.encode_vertex_animation_texture(t)) for t in node.vertex_animation_textures])
+        if sizes is not None:
+            # The node chunk holds the node without its data, which the other chunks hold.
+            sizes[node] = len(node_chunk)
+            for record, chunk in itertools.chain.from_iterable(data_chunks):
+                sizes[record] = len(chunk)
+                sizes[node] += model_writer.get_field_size(len(chunk))
+        return (node.name, node.parent_index, node_chunk,
+                *[[(record.name, chunk) for record, chunk in chunks] for chunks in data_chunks])
+
+    @classmethod
+    def __get_message_node_chunks(cls, timbermesh_node) -> tuple:
+        node_metadata = model_pb2.Node()
+        node_metadata.CopyFrom(timbermesh_node)
+        node_metadata.ClearField("vertexProperties")
+        node_metadata.ClearField("vertexAnimations")
+        node_metadata.ClearField("nodeAnimations")
+        node_metadata.ClearField("vertexAnimationTextures")
+        return (timbermesh_node.name, timbermesh_node.parent, model_encoder.encode_node(node_metadata),
+                [(p.name, model_encoder.encode_vertex_property(p)) for p in timbermesh_node.vertexProperties],
+                [(a.name, model_encoder.encode_vertex_animation(a)) for a in timbermesh_node.vertexAnimations],
+                [(a.name, model_encoder.encode_node_animation(a)) for a in timbermesh_node.nodeAnimations],
+                [(t.name, model_encoder.encode_vertex_animation_texture(t))
+                 for t in timbermesh_node.vertexAnimationTextures])
+
+    @classmethod
+    def __iterate_write_chunks(cls, node_chunks, node_count, file, compression_level, name, version, thread_pool):
+        # Chunks are serialized on this thread and compressed on the thread pool, the chunk data is assembled in
+        # chunk order. The index is built once all chunks are known, in a single bulk build scope that does not span
+        # the yields of a modal export.
+        chunk_data = bytearray()
+        index_chunks = []
+        thread_pool = thread_pool or thread_pools.ThreadPool(0)
+        compressed_chunks = thread_pool.imap(lambda chunk: cls.__compress_chunk(chunk, compression_level),
+                                             cls.__get_flat_chunks(node_chunks))
+        for node_index, node_name, parent, field_name, chunk_name, compressed_message, uncompressed_size \
+                in compressed_chunks:
+            index_chunks.append((node_name, parent, field_name, chunk_name, len(chunk_data), len(compressed_message),
+                                 uncompressed_size))
+            chunk_data += compressed_message
+            yield node_index / node_count
+
+        index = cls.__create_index(index_chunks, name, version)
+        serialized_index = model_encoder.encode_container_index(index)
+        file.write(MAGIC)
+        file.write(struct.pack(INDEX_SIZE_FORMAT, len(serialized_index)))
+        file.write(serialized_index)
+        file.write(chunk_data)
+        return index
+
+    @classmethod
+    def __get_flat_chunks(cls, node_chunks):
+        for node_index, node_chunk_data in enumerate(node_chunks):
+            node_name, parent, node_chunk, vertex_properties, vertex_animations, node_animations, \
+                vertex_animation_textures = node_chunk_data
+            yield node_index, node_name, parent, None, node_name, node_chunk
+            for field_name, chunks in (("vertexProperties", vertex_properties),
+                                       ("vertexAnimations", vertex_animations),
+                                       ("nodeAnimations", node_animations),
+                                       ("vertexAnimationTextures", vertex_animation_textures)):
+                for chunk_name, chunk in chunks:
+                    yield node_index, node_name, parent, field_name, chunk_name, chunk
+
+    @classmethod
+    def __compress_chunk(cls, chunk, compression_level) -> tuple:
+        node_index, node_name, parent, field_name, chunk_name, serialized_message = chunk
+        return (node_index, node_name, parent, field_name, chunk_name,
+                zlib.compress(serialized_message, compression_level), len(serialized_message))
+
+    @classmethod
+    def __create_index(cls, index_chunks, name, version) -> model_pb2.ContainerIndex:
+        index = model_pb2.ContainerIndex()
+        with python_message.BulkBuild():
+            index.version = version
+            index.name = name
+            container_node = None
+            for node_name, parent, field_name, chunk_name, offset, size, uncompressed_size in index_chunks:
+                if field_name is None:
+                    container_node = index.nodes.add(name=node_name, parent=parent)
+                    container_chunk = container_node.node
+                else:
+                    container_chunk = getattr(container_node, field_name).add()
+                container_chunk.name = chunk_name
+                container_chunk.offset = offset
+                container_chunk.size = size
+                container_chunk.uncompressedSize = uncompressed_size
+        return index
+
+
+class ContainerReader:
+    def __init__(self, file):
+        self.file = file
+        header = file.read(HEADER_SIZE)
+        if not is_container(header):
+            raise ValueError("Not an indexed Timbermesh container")
+        index_size = struct.unpack_from(INDEX_SIZE_FORMAT, header, len(MAGIC))[0]
+        self.index = model_pb2.ContainerIndex()
+        self.index.MergeFromString(file.read(index_size))
+        self.chunks_offset = HEADER_SIZE + index_size
+
+    @classmethod
+    def open(cls, path) -> "ContainerReader":
+        return cls(open(path, "rb"))
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def find_node_index(self, name) -> int:
+        node_index = next((i for i, container_node in enumerate(self.index.nodes) if container_node.name == name),
+                          None)
+        if node_index is None:
+            raise KeyError(name)
+        return node_index
+
+    def read_node(self, node_index) -> model_pb2.Node:
+        return self.__read_chunk(self.index.nodes[node_index].node, model_pb2.Node)
+
+    def read_vertex_property(self, node_index, name) -> model_pb2.VertexProperty:
+        container_chunk = self.__find_chunk(self.index.nodes[node_index].vertexProperties, name)
+        return self.__read_chunk(container_chunk, model_pb2.VertexProperty)
+
+    def read_vertex_animation(self, node_index, name) -> model_pb2.VertexAnimation:
+        container_chunk = self.__find_chunk(self.index.nodes[node_index].vertexAnimations, name)
+        return self.__read_chunk(container_chunk, model_pb2.VertexAnimation)
+
+    def read_node_animation(self, node_index, name) -> model_pb2.NodeAnimation:
+        container_chunk = self.__find_chunk(self.index.nodes[node_index].nodeAnimations, name)
+        return self.__read_chunk(container_chunk, model_pb2.NodeAnimation)
+
+    def read_vertex_animation_texture(self, node_index, name) -> model_pb2.VertexAnimationTexture:
+        container_chunk = self.__find_chunk(self.index.nodes[node_index].vertexAnimationTextures, name)
+        return self.__read_chunk(container_chunk, model_pb2.VertexAnimationTexture)
+
+    def read_full_node(self, node_index) -> model_pb2.Node:
+        container_node = self.index.nodes[node_index]
+        timbermesh_node = self.read_node(node_index)
+        for container_chunk in container_node.vertexProperties:
+            timbermesh_node.vertexProperties.append(self.__read_chunk(container_chunk, model_pb2.VertexProperty))
+        for container_chunk in container_node.vertexAnimations:
+            timbermesh_node.vertexAnimations.append(self.__read_chunk(container_chunk, model_pb2.VertexAnimation))
+        for container_chunk in container_node.nodeAnimations:
+            timbermesh_node.nodeAnimations.append(self.__read_chunk(container_chunk, model_pb2.NodeAnimation))
+        for container_chunk in container_node.vertexAnimationTextures:
+            timbermesh_node.vertexAnimationTextures.append(
+                self.__read_chunk(container_chunk, model_pb2.VertexAnimationTexture))
+        return timbermesh_node
+
+    def read_model(self) -> model_pb2.Model:
+        timbermesh_model = model_pb2.Model()
+        timbermesh_model.version = self.index.version
+        timbermesh_model.name = self.index.name
+        for node_index in range(len(self.index.nodes)):
+            timbermesh_model.nodes.append(self.read_full_node(node_index))
+        return timbermesh_model
+
+    def __read_chunk(self, container_chunk, message_type):
+        self.file.seek(self.chunks_offset + container_chunk.offset)
+        message = message_type()
+        message.MergeFromString(zlib.decompress(self.file.read(container_chunk.size)))
+        return message
+
+    def __find_chunk(self, container_chunks, name) -> model_pb2.ContainerChunk:
+        container_chunk = next((c for c in container_chunks if c.name == name), None)
+        if container_chunk is None:
+            raise KeyError(name)
+        return container_chunk
@@ -1,50 +1,280 @@
+import io
+import os
 import time
-import zlib
-import model_pb2
+from typing import Optional
+import model_writer
+import animation_workers
 import blender_utils
+import clip_deduplication
 import exporter_utils
+import export_pipeline
+import export_profiler
+import export_report
+import keyframe_reduction
+import scene_snapshot
+import thread_pools
+import timbermesh_container
+import vertex_animation_textures
+import work_slices
 from hierarchy import Hierarchy
 from node_builder import NodeBuilder
 from animation_builder import AnimationBuilder
 
+HIERARCHY_PROGRESS = 0.05
+NODES_PROGRESS = 0.5
+ANIMATIONS_PROGRESS = 0.9
+
 
 class ExportSettings:
-    def __init__(self, context, merge_meshes, single_animation, use_vertex_animations) -> None:
+    def __init__(self, context, merge_meshes, single_animation, use_vertex_animations,
+                 use_indexed_container=False, use_packed_node_animations=False, profile_memory=False,
+                 write_memory_report=False, write_export_report=False, animation_workers=0,
+                 collapse_held_frames=False, reduce_keyframes=False, position_tolerance=0.001,
+                 rotation_tolerance=0.1, scale_tolerance=0.001, target_framerate=0,
+                 bake_vertex_animation_textures=False, vertex_animation_texture_format="RGBA16F",
+                 add_vertex_animation_texture_uvs=False, skip_unaffected_actions=False,
+                 deduplicate_clips=False, export_threads=0, snapshot_cache_size=0) -> None:
         self.context = context
         self.merge_meshes = merge_meshes
         self.single_animation = single_animation
         self.use_vertex_animations = use_vertex_animations
+        self.use_indexed_container = use_indexed_container
+        self.use_packed_node_animations = use_packed_node_animations
+        self.profile_memory = profile_memory
+        self.write_memory_report = write_memory_report
+        self.write_export_report = write_export_report
+        self.animation_workers = animation_workers
+        self.collapse_held_frames = collapse_held_frames
+        self.reduce_keyframes = reduce_keyframes
+        self.keyframe_tolerances = keyframe_reduction.Tolerances(position_tolerance, rotation_tolerance,
+                                                                 scale_tolerance)
+        self.target_framerate = target_framerate
+        self.bake_vertex_animation_textures = bake_vertex_animation_textures
+        self.vertex_animation_texture_format = vertex_animation_texture_format
+        self.add_vertex_animation_texture_uvs = add_vertex_animation_texture_uvs
+        self.skip_unaffected_actions = skip_unaffected_actions
+        self.deduplicate_clips = deduplicate_clips
+        self.export_threads = export_threads
+        # Megabytes of captured meshes and frames kept for reuse by the other collections of a batch export.
+        self.snapshot_cache_size = snapshot_cache_size
+
+
+def get_memory_report_path(path) -> str:
+    return os.path.splitext(path)[0] + ".memory.json"
+
+
+def get_export_report_path(path) -> str:
+    return os.path.splitext(path)[0] + ".report.json"
+
+
+class PipelinedExport:
+    def __init__(self, path, settings, profiler, start_time, nodes):
+        self.path = path
+        self.settings = settings
+        self.profiler = profiler
+        self.start_time = start_time
+        self.nodes = nodes
+        self.data = None
+        self.container_index = None
+        self.serialized_size = 0
+        self.compressed_size = 0
+        self.sizes = None
 
 
 class Exporter:
 
     @classmethod
-    def export_collection(cls, collection, path, settings) -> None:
+    def export_collection(cls, collection, path, settings, profiler=None) -> None:
+        work_slices.run(cls.iterate_export_collection(collection, path, settings, profiler=profiler))
+
+    @classmethod
+    def export_collections(cls, collections_and_paths, settings) -> None:
+        work_slices.run(cls.iterate_export_collections(collections_and_paths, settings))
+
+    @classmethod
+    def export_collections_pipelined(cls, collections_and_paths, settings) -> None:
+        work_slices.run(cls.iterate_export_collections_pipelined(collections_and_paths, settings))
+
+    @classmethod
+    def iterate_export_collections(cls, collections_and_paths, settings):
+        snapshot_cache = cls.__create_snapshot_cache(settings)
+        for export_index, (collection, path) in enumerate(collections_and_paths):
+            yield from work_slices.scale(cls.iterate_export_collection(collection, path, settings, snapshot_cache),
+                                         export_index / len(collections_and_paths),
+                                         (export_index + 1) / len(collections_and_paths))
+        if snapshot_cache is not None:
+            snapshot_cache.print_summary()
+
+    @classmethod
+    def iterate_export_collections_pipelined(cls, collections_and_paths, settings):
+        # Collections are captured one after another on this thread, while the previous ones are encoded and written
+        # on the pipeline threads. Memory profiles of overlapping phases include the memory of the other stages.
+        snapshot_cache = cls.__create_snapshot_cache(settings)
+        batch_profiler = export_profiler.ExportProfiler(settings.profile_memory)
+        batch_profiler.start()
+        try:
+            with thread_pools.ThreadPool(settings.export_threads) as thread_pool:
+                pipeline = export_pipeline.ExportPipeline(lambda export: cls.__encode_export(export, thread_pool),
+                                                          cls.__write_export)
+                try:
+                    for export_index, (collection, path) in enumerate(collections_and_paths):
+                        start_time = time.time()
+                        profiler = export_profiler.ExportProfiler(settings.profile_memory)
+                        nodes = yield from work_slices.scale(
+                            cls.__iterate_capture(collection, settings, profiler, thread_pool, snapshot_cache),
+                            export_index / len(collections_and_paths),
+                            (export_index + 1) / len(collections_and_paths))
+                        export = PipelinedExport(path, settings, profiler, start_time, nodes)
+                        yield from pipeline.iterate_put(export, (export_index + 1) / len(collections_and_paths))
+                    yield from pipeline.iterate_finish(1)
+                finally:
+                    pipeline.close()
+        finally:
+            batch_profiler.stop()
+        if snapshot_cache is not None:
+            snapshot_cache.print_summary()
+
+    @classmethod
+    def iterate_export_collection(cls, collection, path, settings, snapshot_cache=None, profiler=None):
+        # The file at path is only replaced once the export has finished, so a cancelled export leaves it intact.
+        # A profiler can be passed in to read the phases of the export afterwards.
         start_time = time.time()
+        profiler = profiler or export_profiler.ExportProfiler(settings.profile_memory)
+        profiler.start()
+        try:
+            with thread_pools.ThreadPool(settings.export_threads) as thread_pool:
+                yield from cls.__iterate_export(collection, path, settings, profiler, thread_pool, snapshot_cache)
+        finally:
+            profiler.stop()
+        cls.__finish_export(path, settings, profiler, start_time)
+
+    @classmethod
+    def __iterate_export(cls, collection, path, settings, profiler, thread_pool, snapshot_cache):
+        nodes = yield from work_slices.scale(cls.__iterate_capture(collection, settings, profiler, thread_pool,
+                                                                   snapshot_cache),
+                                             0, ANIMATIONS_PROGRESS)
+        cls.__process_nodes(nodes, settings, profiler, thread_pool)
 
+        temporary_path = path + ".tmp"
+        try:
+            with open(temporary_path, "wb") as file:
+                container_index, serialized_size, compressed_size, sizes = yield from work_slices.scale(
+                    cls.__iterate_write(nodes, file, settings, profiler, thread_pool), ANIMATIONS_PROGRESS, 1)
+            os.replace(temporary_path, path)
+        finally:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+        cls.__write_export_report(nodes, path, settings, serialized_size, compressed_size, sizes, container_index)
+
+    @classmethod
+    def __iterate_capture(cls, collection, settings, profiler, thread_pool, snapshot_cache):
+        # Everything that reads Blender data, the returned nodes are only processed and written afterwards.
         settings.context.scene.frame_set(0)
-        objects_to_export = exporter_utils.get_exportable_objects(collection.all_objects)
-        root_hierarchy_node = Hierarchy.create(objects_to_export, collection.name, settings.merge_meshes)
-        timbermesh_model = cls.__create_model(root_hierarchy_node, settings)
+        with profiler.phase("hierarchy"):
+            objects_to_export = exporter_utils.get_exportable_objects(collection.all_objects)
+            root_hierarchy_node = Hierarchy.create(objects_to_export, collection.name, settings.merge_meshes)
+        yield HIERARCHY_PROGRESS / ANIMATIONS_PROGRESS
 
-        with open(path, "wb") as file:
-            serialized_model = timbermesh_model.SerializeToString()
-            file.write(zlib.compress(serialized_model))
+        with profiler.phase("nodes"):
+            nodes = yield from work_slices.scale(NodeBuilder.iterate_nodes(root_hierarchy_node, settings.context,
+                                                                           thread_pool, snapshot_cache),
+                                                 HIERARCHY_PROGRESS / ANIMATIONS_PROGRESS,
+                                                 NODES_PROGRESS / ANIMATIONS_PROGRESS)
+        yield from work_slices.scale(cls.__iterate_animations(collection, nodes, settings, profiler, snapshot_cache),
+                                     NODES_PROGRESS / ANIMATIONS_PROGRESS, 1)
+        return nodes
 
-        end_time = time.time()
-        print("Export finished in", '{0:.2f}'.format(end_time - start_time), "seconds")
+    @classmethod
+    def __create_snapshot_cache(cls, settings) -> Optional[scene_snapshot.SnapshotCache]:
+        # Without a cache size the snapshots are not cached, which the export steps take None for.
+        if settings.snapshot_cache_size <= 0:
+            return None
+        return scene_snapshot.SnapshotCache(settings.snapshot_cache_size << 20)
+
+    @classmethod
+    def __process_nodes(cls, nodes, settings, profiler, thread_pool) -> None:
+        if settings.reduce_keyframes:
+            with profiler.phase("keyframe reduction"):
+                removed_sample_count, sample_count = keyframe_reduction.reduce_node_animations(
+                    nodes, settings.keyframe_tolerances, thread_pool)
+            print("Keyframe reduction removed", removed_sample_count, "of", sample_count, "node animation samples")
+        if settings.deduplicate_clips:
+            with profiler.phase("clip deduplication"):
+                shared_clip_count = clip_deduplication.deduplicate_clips(nodes, thread_pool)
+            print("Clip deduplication stored", shared_clip_count, "clips as references to identical clips")
+        if settings.bake_vertex_animation_textures:
+            with profiler.phase("vertex animation textures"):
+                thread_pools.get_results([thread_pool.submit(vertex_animation_textures.add_textures, node,
+                                                             settings.vertex_animation_texture_format,
+                                                             settings.add_vertex_animation_texture_uvs)
+                                          for node in nodes])
+
+    @classmethod
+    def __encode_export(cls, export, thread_pool) -> PipelinedExport:
+        cls.__process_nodes(export.nodes, export.settings, export.profiler, thread_pool)
+        output = io.BytesIO()
+        export.container_index, export.serialized_size, export.compressed_size, export.sizes = work_slices.run(
+            cls.__iterate_write(export.nodes, output, export.settings, export.profiler, thread_pool))
+        export.data = output.getvalue()
+        return export
 
     @classmethod
-    def __create_model(cls, hierarchy_node, settings) -> model_pb2.Model:
-        timbermesh_model = model_pb2.Model()
-        nodes = NodeBuilder.create_nodes(hierarchy_node, settings.context, timbermesh_model)
-        cls.__create_animation(nodes, settings)
-        return timbermesh_model
+    def __write_export(cls, export) -> None:
+        temporary_path = export.path + ".tmp"
+        try:
+            with export.profiler.phase("file write"):
+                with open(temporary_path, "wb") as file:
+                    file.write(export.data)
+            os.replace(temporary_path, export.path)
+        finally:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+        export.data = None
+        cls.__write_export_report(export.nodes, export.path, export.settings, export.serialized_size,
+                                  export.compressed_size, export.sizes, export.container_index)
+        cls.__finish_export(export.path, export.settings, export.profiler, export.start_time)
+
+    @classmethod
+    def __write_export_report(cls, nodes, path, settings, serialized_size, compressed_size, sizes,
+                              container_index) -> None:
+        if settings.write_export_report:
+            report = export_report.create_report(nodes, serialized_size, compressed_size, sizes, container_index)
+            export_report.write_report(report, get_export_report_path(path))
 
     @classmethod
-    def __create_animation(cls, nodes, settings):
+    def __finish_export(cls, path, settings, profiler, start_time) -> None:
+        end_time = time.time()
+        print("Export finished in", '{0:.2f}'.format(end_time - start_time), "seconds")
+        profiler.print_summary()
+        if settings.profile_memory and settings.write_memory_report:
+            profiler.write_json(get_memory_report_path(path))
+
+    @classmethod
+    def __iterate_animations(cls, collection, nodes, settings, profiler, snapshot_cache):
         animations, current_frame = blender_utils.get_current_scene_animations(settings.context)
         try:
-            AnimationBuilder.create_animations(nodes, settings)
+            if settings.animation_workers > 1:
+                with profiler.phase("animation workers"):
+                    yield from animation_workers.iterate_animations(collection, nodes, settings)
+            else:
+                yield from AnimationBuilder.iterate_animations(nodes, settings, profiler, snapshot_cache)
         finally:
             blender_utils.restore_scene_animations(settings.context, animations, current_frame)
+
+    @classmethod
+    def __iterate_write(cls, nodes, file, settings, profiler, thread_pool):
+        # The message sizes for the export report are collected while encoding, instead of encoding again.
+        sizes = {} if settings.write_export_report else None
+        if settings.use_indexed_container:
+            with profiler.phase("serialization and compression"):
+                container_index = yield from timbermesh_container.ContainerWriter.iterate_write(
+                    nodes, file, thread_pool=thread_pool, sizes=sizes)
+            serialized_size = export_report.get_container_serialized_size(container_index)
+            return container_index, serialized_size, file.tell(), sizes
+
+        with profiler.phase("serialization"):
+            serialized_model = model_writer.encode_model(nodes, sizes=sizes)
+        with profiler.phase("compression"):
+            compressed_model = yield from work_slices.compress(serialized_model, thread_pool=thread_pool)
+        file.write(compressed_model)
+        return None, len(serialized_model), len(compressed_model), sizes
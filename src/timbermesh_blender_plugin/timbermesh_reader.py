@@ -0,0 +1,364 @@
+import io
+import zlib
+import numpy
+import keyframe_reduction
+import model_pb2
+import timbermesh_container
+
+SCALAR_TYPE_DTYPES = {
+    model_pb2.ScalarType.SCALAR_TYPE_UNSIGNED_BYTE: numpy.dtype("<u1"),
+    model_pb2.ScalarType.SCALAR_TYPE_UNSIGNED_INT: numpy.dtype("<u4"),
+    model_pb2.ScalarType.SCALAR_TYPE_INT: numpy.dtype("<i4"),
+    model_pb2.ScalarType.SCALAR_TYPE_FLOAT: numpy.dtype("<f4"),
+    model_pb2.ScalarType.SCALAR_TYPE_DOUBLE: numpy.dtype("<f8"),
+}
+TEXTURE_FORMAT_DTYPES = {
+    model_pb2.TextureFormat.TEXTURE_FORMAT_RGBA_HALF: numpy.dtype("<f2"),
+    model_pb2.TextureFormat.TEXTURE_FORMAT_RGBA_FLOAT: numpy.dtype("<f4"),
+}
+STREAM_CHUNK_SIZE = 1 << 20
+WIRE_TYPE_VARINT = 0
+WIRE_TYPE_FIXED64 = 1
+WIRE_TYPE_LENGTH_DELIMITED = 2
+WIRE_TYPE_FIXED32 = 5
+
+
+class MeshData:
+    def __init__(self):
+        self.material = ""
+        self.indices = None
+
+
+class VertexAnimationData:
+    def __init__(self):
+        self.name = ""
+        self.framerate = 0.0
+        self.animated_vertex_count = 0
+        self.frame_count = 0
+        self.vertex_properties = {}
+        self.shared_clip = ""
+
+
+class NodeAnimationData:
+    def __init__(self):
+        self.name = ""
+        self.framerate = 0.0
+        self.frame_count = 0
+        self.positions = None
+        self.rotations = None
+        self.scales = None
+        self.shared_clip = ""
+
+
+class VertexAnimationTextureClipData:
+    def __init__(self):
+        self.name = ""
+        self.framerate = 0.0
+        self.first_row = 0
+        self.frame_count = 0
+
+
+class VertexAnimationTextureData:
+    def __init__(self):
+        self.name = ""
+        self.width = 0
+        self.height = 0
+        self.pixels = None
+        self.clips = []
+
+
+class NodeData:
+    def __init__(self):
+        self.name = ""
+        self.parent = -1
+        self.position = None
+        self.rotation = None
+        self.scale = None
+        self.vertex_count = 0
+        self.vertex_properties = {}
+        self.meshes = []
+        self.vertex_animations = []
+        self.node_animations = []
+        self.vertex_animation_textures = []
+
+
+class ModelData:
+    def __init__(self):
+        self.version = 0
+        self.name = ""
+        self.nodes = []
+
+
+def get_vertex_property_array(vertex_property) -> numpy.ndarray:
+    dtype = SCALAR_TYPE_DTYPES[vertex_property.scalarType]
+    array = numpy.frombuffer(vertex_property.data, dtype=dtype)
+    return array.reshape(-1, vertex_property.scalarTypeDimension)
+
+
+def get_vertex_property_frames_array(vertex_properties) -> numpy.ndarray:
+    first_property = vertex_properties[0]
+    dtype = SCALAR_TYPE_DTYPES[first_property.scalarType]
+    array = numpy.frombuffer(b"".join(p.data for p in vertex_properties), dtype=dtype)
+    return array.reshape(len(vertex_properties), -1, first_property.scalarTypeDimension)
+
+
+def expand_frame_runs(frames, frame_runs) -> numpy.ndarray:
+    # Repeats every stored frame for the number of frames it is held, see the frameRuns field of the animations.
+    if not frame_runs:
+        return frames
+    return numpy.repeat(frames, numpy.array(frame_runs, dtype=numpy.int64), axis=0)
+
+
+def read_varint(buffer, position) -> (int, int):
+    result = 0
+    shift = 0
+    while position < len(buffer):
+        byte = buffer[position]
+        result |= (byte & 0x7f) << shift
+        position += 1
+        if not byte & 0x80:
+            return result, position
+        shift += 7
+    return None, position
+
+
+def get_field_end(buffer, position) -> (int, int):
+    tag, position = read_varint(buffer, position)
+    if tag is None:
+        return None, None
+    wire_type = tag & 0x7
+    if wire_type == WIRE_TYPE_VARINT:
+        value, end = read_varint(buffer, position)
+        if value is None:
+            return tag, None
+    elif wire_type == WIRE_TYPE_FIXED64:
+        end = position + 8
+    elif wire_type == WIRE_TYPE_FIXED32:
+        end = position + 4
+    elif wire_type == WIRE_TYPE_LENGTH_DELIMITED:
+        length, position = read_varint(buffer, position)
+        if length is None:
+            return tag, None
+        end = position + length
+    else:
+        raise ValueError("Unsupported wire type " + str(wire_type))
+    return tag, end if end <= len(buffer) else None
+
+
+def iterate_model_fields(file, chunk_size=STREAM_CHUNK_SIZE):
+    # Decompresses the stream in fixed-size chunks and yields (field name, value) for every
+    # top-level Model field as soon as it is complete, so only one node is kept in memory at a time.
+    decompressor = zlib.decompressobj()
+    buffer = bytearray()
+    position = 0
+    end_of_stream = False
+
+    while True:
+        tag, end = get_field_end(buffer, position)
+        if end is None:
+            if end_of_stream:
+                if position < len(buffer):
+                    raise ValueError("Truncated Timbermesh stream")
+                return
+            del buffer[:position]
+            position = 0
+            end_of_stream = __decompress_next_chunk(file, decompressor, buffer, chunk_size)
+            continue
+
+        field = model_pb2.Model.DESCRIPTOR.fields_by_number.get(tag >> 3)
+        if field is not None:
+            field_bytes = bytes(buffer[position:end])
+            if field.label == field.LABEL_REPEATED and field.message_type is not None:
+                message_type = getattr(model_pb2, field.message_type.name)
+                _, value_position = read_varint(field_bytes, 0)
+                _, value_position = read_varint(field_bytes, value_position)
+                yield field.name, message_type.FromString(field_bytes[value_position:])
+            else:
+                yield field.name, getattr(model_pb2.Model.FromString(field_bytes), field.name)
+        position = end
+
+
+def __decompress_next_chunk(file, decompressor, buffer, chunk_size) -> bool:
+    if decompressor.unconsumed_tail:
+        buffer += decompressor.decompress(decompressor.unconsumed_tail, chunk_size)
+        return False
+
+    compressed_chunk = file.read(chunk_size)
+    if compressed_chunk:
+        buffer += decompressor.decompress(compressed_chunk, chunk_size)
+        return False
+
+    buffer += decompressor.flush()
+    return True
+
+
+class ModelReader:
+
+    @classmethod
+    def read(cls, path) -> ModelData:
+        with open(path, "rb") as file:
+            return cls.read_bytes(file.read())
+
+    @classmethod
+    def read_bytes(cls, compressed_data) -> ModelData:
+        if timbermesh_container.is_container(compressed_data):
+            container_reader = timbermesh_container.ContainerReader(io.BytesIO(compressed_data))
+            return cls.read_model(container_reader.read_model())
+
+        timbermesh_model = model_pb2.Model()
+        timbermesh_model.MergeFromString(zlib.decompress(compressed_data))
+        return cls.read_model(timbermesh_model)
+
+    @classmethod
+    def iterate_fields(cls, path, chunk_size=STREAM_CHUNK_SIZE):
+        with open(path, "rb") as file:
+            if timbermesh_container.is_container(file.read(len(timbermesh_container.MAGIC))):
+                file.seek(0)
+                container_reader = timbermesh_container.ContainerReader(file)
+                yield "version", container_reader.index.version
+                yield "name", container_reader.index.name
+                for node_index in range(len(container_reader.index.nodes)):
+                    yield "nodes", container_reader.read_full_node(node_index)
+            else:
+                file.seek(0)
+                yield from iterate_model_fields(file, chunk_size)
+
+    @classmethod
+    def iterate_nodes(cls, path, chunk_size=STREAM_CHUNK_SIZE):
+        for field_name, value in cls.iterate_fields(path, chunk_size):
+            if field_name == "nodes":
+                yield cls.read_node(value)
+
+    @classmethod
+    def read_model(cls, timbermesh_model) -> ModelData:
+        model = ModelData()
+        model.version = timbermesh_model.version
+        model.name = timbermesh_model.name
+        model.nodes = [cls.read_node(timbermesh_node) for timbermesh_node in timbermesh_model.nodes]
+        return model
+
+    @classmethod
+    def read_node(cls, timbermesh_node) -> NodeData:
+        node = NodeData()
+        node.name = timbermesh_node.name
+        node.parent = timbermesh_node.parent
+        node.position = cls.__read_vector3(timbermesh_node.position)
+        node.rotation = cls.__read_quaternion(timbermesh_node.rotation)
+        node.scale = cls.__read_vector3(timbermesh_node.scale)
+        node.vertex_count = timbermesh_node.vertexCount
+
+        for vertex_property in timbermesh_node.vertexProperties:
+            node.vertex_properties[vertex_property.name] = get_vertex_property_array(vertex_property)
+        for timbermesh_mesh in timbermesh_node.meshes:
+            node.meshes.append(cls.__read_mesh(timbermesh_mesh))
+        for vertex_animation in timbermesh_node.vertexAnimations:
+            node.vertex_animations.append(cls.read_vertex_animation(vertex_animation))
+        for node_animation in timbermesh_node.nodeAnimations:
+            node.node_animations.append(cls.read_node_animation(node_animation))
+        for texture in timbermesh_node.vertexAnimationTextures:
+            node.vertex_animation_textures.append(cls.read_vertex_animation_texture(texture))
+        cls.__resolve_shared_clips(node.vertex_animations, ["frame_count", "vertex_properties"])
+        cls.__resolve_shared_clips(node.node_animations, ["frame_count", "positions", "rotations", "scales"])
+
+        return node
+
+    @classmethod
+    def __resolve_shared_clips(cls, animations, shared_attributes) -> None:
+        # Clips stored as references to an identical clip share its arrays.
+        clips = {animation.name: animation for animation in animations if not animation.shared_clip}
+        for animation in animations:
+            if animation.shared_clip:
+                for attribute in shared_attributes:
+                    setattr(animation, attribute, getattr(clips[animation.shared_clip], attribute))
+
+    @classmethod
+    def __read_mesh(cls, timbermesh_mesh) -> MeshData:
+        mesh = MeshData()
+        mesh.material = timbermesh_mesh.material
+        mesh.indices = numpy.array(timbermesh_mesh.indices[:], dtype=numpy.int32)
+        return mesh
+
+    @classmethod
+    def read_vertex_animation(cls, vertex_animation) -> VertexAnimationData:
+        animation = VertexAnimationData()
+        animation.name = vertex_animation.name
+        animation.framerate = vertex_animation.framerate
+        animation.animated_vertex_count = vertex_animation.animatedVertexCount
+        animation.shared_clip = vertex_animation.sharedClip
+        frame_runs = vertex_animation.frameRuns[:]
+        animation.frame_count = sum(frame_runs) if frame_runs else len(vertex_animation.frames)
+
+        if len(vertex_animation.frames) > 0:
+            first_frame = vertex_animation.frames[0]
+            for property_index, vertex_property in enumerate(first_frame.vertexProperties):
+                frame_properties = [frame.vertexProperties[property_index] for frame in vertex_animation.frames]
+                frames = get_vertex_property_frames_array(frame_properties)
+                animation.vertex_properties[vertex_property.name] = expand_frame_runs(frames, frame_runs)
+
+        return animation
+
+    @classmethod
+    def read_node_animation(cls, node_animation) -> NodeAnimationData:
+        animation = NodeAnimationData()
+        animation.name = node_animation.name
+        animation.framerate = node_animation.framerate
+        animation.shared_clip = node_animation.sharedClip
+        frame_runs = node_animation.frameRuns[:]
+        if node_animation.frameCount > 0:
+            stored_frame_count = node_animation.frameCount
+            positions = numpy.frombuffer(node_animation.positions, dtype="<f4").reshape(-1, 3)
+            rotations = numpy.frombuffer(node_animation.rotations, dtype="<f4").reshape(-1, 4)
+            scales = numpy.frombuffer(node_animation.scales, dtype="<f4").reshape(-1, 3)
+        else:
+            stored_frame_count = len(node_animation.frames)
+            frames = node_animation.frames
+            positions = numpy.fromiter(
+                (value for frame in frames for value in (frame.position.x, frame.position.y, frame.position.z)),
+                dtype=numpy.float32, count=stored_frame_count * 3).reshape(-1, 3)
+            rotations = numpy.fromiter(
+                (value for frame in frames
+                 for value in (frame.rotation.x, frame.rotation.y, frame.rotation.z, frame.rotation.w)),
+                dtype=numpy.float32, count=stored_frame_count * 4).reshape(-1, 4)
+            scales = numpy.fromiter(
+                (value for frame in frames for value in (frame.scale.x, frame.scale.y, frame.scale.z)),
+                dtype=numpy.float32, count=stored_frame_count * 3).reshape(-1, 3)
+
+        key_frames = node_animation.keyFrames[:]
+        if key_frames:
+            animation.frame_count = key_frames[-1] + 1
+            animation.positions, animation.rotations, animation.scales = keyframe_reduction.interpolate_keys(
+                numpy.array(key_frames, dtype=numpy.int64), positions.astype(numpy.float64),
+                rotations.astype(numpy.float64), scales.astype(numpy.float64))
+            return animation
+
+        animation.frame_count = sum(frame_runs) if frame_runs else stored_frame_count
+        animation.positions = expand_frame_runs(positions, frame_runs)
+        animation.rotations = expand_frame_runs(rotations, frame_runs)
+        animation.scales = expand_frame_runs(scales, frame_runs)
+        return animation
+
+    @classmethod
+    def read_vertex_animation_texture(cls, texture) -> VertexAnimationTextureData:
+        # The pixels are a (height, width, 4) view of the texture data, ready to be uploaded as is.
+        texture_data = VertexAnimationTextureData()
+        texture_data.name = texture.name
+        texture_data.width = texture.width
+        texture_data.height = texture.height
+        texture_data.pixels = numpy.frombuffer(texture.data, dtype=TEXTURE_FORMAT_DTYPES[texture.format]).reshape(
+            texture.height, texture.width, 4)
+        for texture_clip in texture.clips:
+            clip = VertexAnimationTextureClipData()
+            clip.name = texture_clip.name
+            clip.framerate = texture_clip.framerate
+            clip.first_row = texture_clip.firstRow
+            clip.frame_count = texture_clip.frameCount
+            texture_data.clips.append(clip)
+        return texture_data
+
+    @classmethod
+    def __read_vector3(cls, vector) -> numpy.ndarray:
+        return numpy.array((vector.x, vector.y, vector.z), dtype=numpy.float32)
+
+    @classmethod
+    def __read_quaternion(cls, quaternion) -> numpy.ndarray:
+        return numpy.array((quaternion.x, quaternion.y, quaternion.z, quaternion.w), dtype=numpy.float32)
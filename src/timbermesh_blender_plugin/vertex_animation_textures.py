@@ -0,0 +1,94 @@
+import numpy
+import model_pb2
+import vertex_properties_utils
+
+# Bakes the vertex animations of a node into GPU-ready textures, one per animated vertex property (offsets and
+# rotations). Every row holds one frame and every column one vertex stored in the frames, the clips of the node are
+# stacked one below another. Held frames are expanded, so every frame has its own row. The optional UV property gives
+# every vertex the horizontal texture coordinate of its column (-1 for vertices without a column).
+TEXTURE_FORMATS = {
+    "RGBA16F": (model_pb2.TextureFormat.TEXTURE_FORMAT_RGBA_HALF, numpy.dtype("<f2")),
+    "RGBA32F": (model_pb2.TextureFormat.TEXTURE_FORMAT_RGBA_FLOAT, numpy.dtype("<f4")),
+}
+TEXTURE_CHANNEL_COUNT = 4
+UV_PROPERTY_NAME = "vat_uv"
+
+
+class VertexAnimationTexture:
+    def __init__(self, name, texture_format, width, height, data, clips):
+        self.name = name
+        self.format = texture_format
+        self.width = width
+        self.height = height
+        self.data = data
+        self.clips = clips
+
+
+class VertexAnimationTextureClip:
+    def __init__(self, name, framerate, first_row, frame_count):
+        self.name = name
+        self.framerate = framerate
+        self.first_row = first_row
+        self.frame_count = frame_count
+
+
+def add_textures(node, texture_format, add_uv_property) -> None:
+    node.vertex_animation_textures = bake_textures(node, texture_format)
+    if add_uv_property and node.vertex_animation_textures:
+        node.vertex_properties.append(create_uv_property(node))
+
+
+def bake_textures(node, texture_format) -> list:
+    animations = node.vertex_animations
+    first_frame = next((animation.frames[0] for animation in animations if animation.frames), None)
+    if first_frame is None or not node.animated_vertex_count:
+        return []
+
+    # Clips shared with an identical clip point to its rows.
+    stored_animations = [animation for animation in animations if not animation.shared_clip]
+    clip_rows = {}
+    row_count = 0
+    for animation in stored_animations:
+        frame_count = sum(animation.frame_runs) or len(animation.frames)
+        clip_rows[animation.name] = (row_count, frame_count)
+        row_count += frame_count
+    clips = [VertexAnimationTextureClip(animation.name, animation.framerate,
+                                        *clip_rows[animation.shared_clip or animation.name])
+             for animation in animations]
+
+    format_value, dtype = TEXTURE_FORMATS[texture_format]
+    width = len(get_frame_vertex_indices(node))
+    textures = []
+    for property_index, vertex_property in enumerate(first_frame):
+        pixels = numpy.concatenate([__get_clip_pixels(animation, property_index, width)
+                                    for animation in stored_animations])
+        textures.append(VertexAnimationTexture(vertex_property.name, format_value, width, row_count,
+                                               pixels.astype(dtype).tobytes(), clips))
+    return textures
+
+
+def create_uv_property(node) -> vertex_properties_utils.VertexProperty:
+    vertex_indices = get_frame_vertex_indices(node)
+    width = len(vertex_indices)
+    uvs = numpy.full(node.vertex_count, -1.0, dtype="<f4")
+    uvs[vertex_indices] = (numpy.arange(width) + 0.5) / width
+    return vertex_properties_utils.create(uvs.tobytes(), UV_PROPERTY_NAME, model_pb2.ScalarType.SCALAR_TYPE_FLOAT, 1)
+
+
+def get_frame_vertex_indices(node) -> list:
+    # Vertex animation frames store the first animated_vertex_count vertices of every mesh object of the node, so
+    # a node that merges animated and static objects stores more vertices per frame than animated_vertex_count.
+    return [vertex_index for obj in node.mesh_objects
+            for vertex_index in node.original_object_meshes[obj.name].vertex_indices[:node.animated_vertex_count]]
+
+
+def __get_clip_pixels(animation, property_index, width) -> numpy.ndarray:
+    pixels = numpy.zeros((len(animation.frames), width, TEXTURE_CHANNEL_COUNT), dtype=numpy.float32)
+    if animation.frames:
+        data = b"".join(frame[property_index].data for frame in animation.frames)
+        dimension = animation.frames[0][property_index].scalar_type_dimension
+        pixels[:, :, :dimension] = numpy.frombuffer(data, dtype="<f4").reshape(len(animation.frames), width,
+                                                                                dimension)
+    if animation.frame_runs:
+        pixels = numpy.repeat(pixels, numpy.array(animation.frame_runs, dtype=numpy.int64), axis=0)
+    return pixels
@@ -1,7 +1,16 @@
 import struct
+import numpy
 import model_pb2
 
 
+class VertexProperty:
+    def __init__(self, name, scalar_type, scalar_type_dimension, data):
+        self.name = name
+        self.scalar_type = scalar_type
+        self.scalar_type_dimension = scalar_type_dimension
+        self.data = data
+
+
 def pack_vector2f_array(source_array, target_bytearray) -> None:
     for item in source_array:
         target_bytearray += bytearray(struct.pack('<f', item.x))
@@ -23,28 +32,29 @@ def pack_vector4f_array(source_array, target_bytearray) -> None:
         target_bytearray += bytearray(struct.pack('<f', item.w))
 
 
-def create_vector2(source_array, name) -> model_pb2.VertexProperty:
+def create_vector2(source_array, name) -> VertexProperty:
     target_bytearray = bytearray()
     pack_vector2f_array(source_array, target_bytearray)
     return create(target_bytearray, name, model_pb2.ScalarType.SCALAR_TYPE_FLOAT, 2)
 
 
-def create_vector3(source_array, name) -> model_pb2.VertexProperty:
+def create_vector3(source_array, name) -> VertexProperty:
     target_bytearray = bytearray()
     pack_vector3f_array(source_array, target_bytearray)
     return create(target_bytearray, name, model_pb2.ScalarType.SCALAR_TYPE_FLOAT, 3)
 
 
-def create_vector4(source_array, name) -> model_pb2.VertexProperty:
+def create_vector4(source_array, name) -> VertexProperty:
     target_bytearray = bytearray()
     pack_vector4f_array(source_array, target_bytearray)
     return create(target_bytearray, name, model_pb2.ScalarType.SCALAR_TYPE_FLOAT, 4)
 
 
-def create(target_bytearray, name, scalar_type, scalar_type_dimension) -> model_pb2.VertexProperty:
-    container = model_pb2.VertexProperty()
-    container.name = name
-    container.scalarType = scalar_type
-    container.scalarTypeDimension = scalar_type_dimension
-    container.data = bytes(target_bytearray)
-    return container
+def create_array(values, name) -> VertexProperty:
+    # Packs a (vertex count, dimension) array of float vectors.
+    values = numpy.asarray(values, dtype="<f4")
+    return create(values.tobytes(), name, model_pb2.ScalarType.SCALAR_TYPE_FLOAT, values.shape[1])
+
+
+def create(target_bytearray, name, scalar_type, scalar_type_dimension) -> VertexProperty:
+    return VertexProperty(name, scalar_type, scalar_type_dimension, bytes(target_bytearray))
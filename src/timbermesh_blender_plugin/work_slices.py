@@ -0,0 +1,72 @@
+import struct
+import zlib
+
+# Long running export steps are generators that yield their progress (from 0 to 1) after every slice of work and
+# return their result. They can be run at once with run() or spread over the timer events of a modal operator.
+# Closing a generator cancels the step, its finally blocks restore whatever it changed.
+COMPRESSION_SLICE_SIZE = 4 << 20
+# Slices compressed on a thread pool are raw deflate streams joined into one zlib stream, the way pigz does it. Every
+# slice is primed with the last 32 KiB of the previous one, so the ratio stays close to the sequential stream. The
+# slice size does not depend on the number of threads, so the output is identical for any thread count of 2 or
+# more. It differs from the single stream written without a pool.
+PARALLEL_COMPRESSION_SLICE_SIZE = 1 << 20
+DEFLATE_WINDOW_SIZE = 32 << 10
+
+
+def run(slices):
+    while True:
+        try:
+            next(slices)
+        except StopIteration as stop:
+            return stop.value
+
+
+def scale(slices, start, end):
+    try:
+        while True:
+            try:
+                progress = next(slices)
+            except StopIteration as stop:
+                return stop.value
+            yield start + (end - start) * progress
+    finally:
+        slices.close()
+
+
+def compress(data, compression_level=zlib.Z_DEFAULT_COMPRESSION, slice_size=COMPRESSION_SLICE_SIZE,
+             thread_pool=None):
+    if thread_pool is not None and thread_pool.is_parallel():
+        return (yield from __compress_in_parallel(data, compression_level, thread_pool))
+    compressor = zlib.compressobj(compression_level)
+    compressed_slices = []
+    view = memoryview(data)
+    for start in range(0, len(data), slice_size):
+        compressed_slices.append(compressor.compress(view[start:start + slice_size]))
+        yield min(start + slice_size, len(data)) / len(data)
+    compressed_slices.append(compressor.flush())
+    return b"".join(compressed_slices)
+
+
+def __compress_in_parallel(data, compression_level, thread_pool):
+    view = memoryview(data)
+    slice_starts = range(0, len(data), PARALLEL_COMPRESSION_SLICE_SIZE)
+    compressed_slices = [zlib.compress(b"", compression_level)[:2]]
+    for compressed_slice in thread_pool.imap(lambda start: __compress_slice(view, start, compression_level),
+                                             slice_starts):
+        compressed_slices.append(compressed_slice)
+        yield (len(compressed_slices) - 1) / len(slice_starts)
+    if not slice_starts:
+        compressed_slices.append(__compress_slice(view, 0, compression_level))
+    compressed_slices.append(struct.pack(">I", zlib.adler32(view)))
+    return b"".join(compressed_slices)
+
+
+def __compress_slice(view, start, compression_level) -> bytes:
+    end = start + PARALLEL_COMPRESSION_SLICE_SIZE
+    dictionary = view[max(start - DEFLATE_WINDOW_SIZE, 0):start]
+    if dictionary:
+        compressor = zlib.compressobj(compression_level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=dictionary)
+    else:
+        compressor = zlib.compressobj(compression_level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    compressed_slice = compressor.compress(view[start:end])
+    return compressed_slice + compressor.flush(zlib.Z_FINISH if end >= len(view) else zlib.Z_SYNC_FLUSH)
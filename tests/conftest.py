@@ -0,0 +1,11 @@
+import sys
+from os.path import abspath, dirname, join
+
+# The plugin modules use flat imports (Blender adds the add-on directory to sys.path) and the ones that import bpy
+# run on the stand-in API from the benchmarks.
+ROOT_DIRECTORY = dirname(dirname(abspath(__file__)))
+for directory in (join(ROOT_DIRECTORY, "src", "timbermesh_blender_plugin"),
+                  join(ROOT_DIRECTORY, "benchmarks", "blender_stand_in"),
+                  join(ROOT_DIRECTORY, "benchmarks")):
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
@@ -0,0 +1,101 @@
+import json
+import os
+import random
+import types
+import numpy
+import animation_workers
+import synthetic_scenes
+import timbermesh_exporter
+import timbermesh_reader
+
+bpy = synthetic_scenes.bpy
+
+
+class FinishedProcess:
+    returncode = 0
+
+    def wait(self, timeout=None) -> int:
+        return 0
+
+    def kill(self) -> None:
+        pass
+
+
+def start_job_in_process(job, collection, settings, blend_path, directory) -> None:
+    # Runs the worker of the job in this process instead of a background Blender.
+    job.output_path = os.path.join(directory, "job" + str(job.index) + ".pickle")
+    job.log_path = os.path.join(directory, "job" + str(job.index) + ".log")
+    job_path = os.path.join(directory, "job" + str(job.index) + ".json")
+    with open(job_path, "w") as file:
+        json.dump({"collection": collection.name,
+                   "merge_meshes": settings.merge_meshes,
+                   "use_vertex_animations": settings.use_vertex_animations,
+                   "use_packed_node_animations": settings.use_packed_node_animations,
+                   "collapse_held_frames": settings.collapse_held_frames,
+                   "target_framerate": settings.target_framerate,
+                   "skip_unaffected_actions": settings.skip_unaffected_actions,
+                   "clip": job.clip_name,
+                   "action": job.action_name,
+                   "frame_start": job.frame_start,
+                   "frame_end": job.frame_end}, file)
+    animation_workers.run_worker(job_path, job.output_path)
+    job.process = FinishedProcess()
+
+
+def create_armature_scene() -> (bpy.types.Collection, bpy.types.Object):
+    # An armature without an action and a prop parented to one of its bones, so the prop is only animated by the
+    # clip actions assigned to the armature. The other object has its own animation.
+    parameters = synthetic_scenes.SceneParameters(object_count=1, triangle_count=20, frame_count=60,
+                                                  animation=synthetic_scenes.ANIMATION_NODE, material_count=1)
+    collection = synthetic_scenes.create_scene(parameters)
+    root = next(obj for obj in collection.objects if obj.name == "#Root")
+    armature = bpy.types.Object("#Armature", object_type="ARMATURE")
+    armature.animation_data = bpy.types.AnimationData()
+    armature.set_parent(root)
+    prop_mesh = synthetic_scenes.create_grid_mesh("PropMesh", parameters, random.Random(0))
+    prop = bpy.types.Object("#Prop", prop_mesh)
+    prop.material_slots = list(collection.objects[1].material_slots)
+    prop.set_parent(armature)
+    prop.parent_type = "BONE"
+    for obj in (armature, prop):
+        collection.objects.append(obj)
+        bpy.data.objects.append(obj)
+        bpy.context.scene.objects.append(obj)
+    bpy.context.selectable_objects = list(collection.objects)
+    for name in ("Walk", "Run"):
+        bpy.data.actions.new(name)
+    for action in bpy.data.actions:
+        action.frame_range = (0, 60)
+    return collection, armature
+
+
+def read_animations(path) -> list:
+    return [(node.name, [(animation.name, animation.frame_count, animation.positions, animation.rotations,
+                          animation.scales) for animation in node.node_animations])
+            for node in timbermesh_reader.ModelReader.read(path).nodes]
+
+
+def test_workers_match_sequential_export_of_armature_clips(tmp_path, monkeypatch):
+    monkeypatch.setattr(animation_workers, "__start_job", start_job_in_process)
+    monkeypatch.setattr(bpy, "ops", types.SimpleNamespace(wm=types.SimpleNamespace(
+        save_as_mainfile=lambda **arguments: None)), raising=False)
+    collection, armature = create_armature_scene()
+
+    exports = []
+    for worker_count in (0, 4):
+        armature.animation_data.action = None
+        path = str(tmp_path / ("Model" + str(worker_count) + ".timbermesh"))
+        settings = timbermesh_exporter.ExportSettings(bpy.context, merge_meshes=False, single_animation=False,
+                                                      use_vertex_animations=False, animation_workers=worker_count)
+        timbermesh_exporter.Exporter.export_collection(collection, path, settings)
+        exports.append(read_animations(path))
+
+    sequential_animations, worker_animations = exports
+    prop_clips = [clip[0] for name, clips in sequential_animations if name == "#Prop" for clip in clips]
+    assert prop_clips == [action.name for action in bpy.data.actions]
+    assert [(name, [clip[:2] for clip in clips]) for name, clips in worker_animations] == \
+           [(name, [clip[:2] for clip in clips]) for name, clips in sequential_animations]
+    for (_, sequential_clips), (_, worker_clips) in zip(sequential_animations, worker_animations):
+        for sequential_clip, worker_clip in zip(sequential_clips, worker_clips):
+            for sequential_track, worker_track in zip(sequential_clip[2:], worker_clip[2:]):
+                numpy.testing.assert_array_equal(worker_track, sequential_track)
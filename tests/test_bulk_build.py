@@ -0,0 +1,51 @@
+import pytest
+import model_pb2
+from google.protobuf.internal import python_message
+
+
+def fill_model(model) -> None:
+    model.name = "Model"
+    for node_index in range(3):
+        node = model.nodes.add(name="Node" + str(node_index), parent=node_index - 1)
+        node.position.x = node_index
+        node.rotation.w = 1
+        node.meshes.add(material="Wood").indices.extend(range(node_index * 30))
+        animation = node.nodeAnimations.add(name="Clip", framerate=30)
+        animation.frames.add().scale.z = 2
+        animation.frameRuns.extend([1, 2])
+
+
+def test_bulk_build_creates_the_same_model():
+    model = model_pb2.Model()
+    fill_model(model)
+    bulk_model = model_pb2.Model()
+    bulk_model.ByteSize()
+    with python_message.BulkBuild():
+        fill_model(bulk_model)
+    assert bulk_model.ByteSize() == model.ByteSize()
+    assert bulk_model.SerializeToString() == model.SerializeToString()
+    assert bulk_model.nodes[2].nodeAnimations[0].frames[0].HasField("scale")
+
+
+def test_bulk_build_updates_cached_sizes_on_exit():
+    model = model_pb2.Model()
+    fill_model(model)
+    size = model.ByteSize()
+    with python_message.BulkBuild():
+        with python_message.BulkBuild():
+            model.nodes[0].nodeAnimations[0].frames[0].position.y = 5
+        model.nodes[1].meshes[0].indices.append(7)
+    assert model.ByteSize() == len(model.SerializeToString()) > size
+
+
+def test_bulk_build_notifies_parents_after_an_error():
+    model = model_pb2.Model()
+    model.nodes.add()
+    model.ByteSize()
+    with pytest.raises(RuntimeError):
+        with python_message.BulkBuild():
+            model.nodes[0].scale.x = 1
+            raise RuntimeError()
+    assert model.ByteSize() == len(model.SerializeToString())
+    model.nodes[0].scale.y = 1
+    assert model.ByteSize() == len(model.SerializeToString())
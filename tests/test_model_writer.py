@@ -0,0 +1,204 @@
+import array
+import io
+import random
+import pytest
+import model_encoder
+import model_pb2
+import model_writer
+import timbermesh_container
+from animation_builder import NodeAnimation, VertexAnimation
+from node_builder import Mesh, Node
+from vertex_animation_textures import VertexAnimationTexture, VertexAnimationTextureClip
+from vertex_properties_utils import VertexProperty
+
+# model_writer writes the wire format straight from the exporter records. These tests build the same models as
+# model_pb2 messages and check that model_writer, model_encoder and SerializeToString() emit identical bytes.
+SCALAR_TYPE_FLOAT = model_pb2.ScalarType.SCALAR_TYPE_FLOAT
+
+
+def create_floats(generator, count) -> array.array:
+    # Zeros are not serialized, so some of them are included.
+    return array.array("f", [generator.choice((0.0, generator.uniform(-10, 10))) for _ in range(count)])
+
+
+def create_vertex_property(generator, name, dimension, vertex_count) -> VertexProperty:
+    return VertexProperty(name, SCALAR_TYPE_FLOAT, dimension, create_floats(generator, vertex_count * dimension)
+                          .tobytes())
+
+
+def create_vertex_animation(generator, name, vertex_count, frame_count, use_frame_runs) -> VertexAnimation:
+    animation = VertexAnimation(name, generator.choice((0, 24, 30, 12.5)), vertex_count)
+    for _ in range(frame_count):
+        animation.add_frame([create_vertex_property(generator, "offset", 3, vertex_count),
+                             create_vertex_property(generator, "rotation", 4, vertex_count)])
+        if use_frame_runs:
+            for _ in range(generator.randrange(3)):
+                animation.hold_frame()
+    return animation
+
+
+def create_node_animation(generator, name, frame_count, packed, use_frame_runs, use_key_frames) -> NodeAnimation:
+    animation = NodeAnimation(name, generator.choice((0, 24, 30)), packed)
+    for _ in range(frame_count):
+        animation.add_frame(create_floats(generator, 3), create_floats(generator, 4), create_floats(generator, 3))
+        if use_frame_runs:
+            for _ in range(generator.randrange(3)):
+                animation.hold_frame()
+    if use_key_frames and frame_count:
+        key_frames = sorted(generator.sample(range(1, frame_count * 3), frame_count - 1))
+        animation.key_frames = array.array("i", [0] + key_frames)
+    return animation
+
+
+def create_texture(generator, name, width, clip_frame_counts) -> VertexAnimationTexture:
+    height = sum(clip_frame_counts)
+    clips = []
+    first_row = 0
+    for index, frame_count in enumerate(clip_frame_counts):
+        clips.append(VertexAnimationTextureClip("Clip" + str(index), 30, first_row, frame_count))
+        first_row += frame_count
+    data = bytes(generator.randrange(256) for _ in range(width * height * 8))
+    return VertexAnimationTexture(name, model_pb2.TextureFormat.TEXTURE_FORMAT_RGBA_HALF, width, height, data, clips)
+
+
+def create_node(generator, index, packed, use_frame_runs, use_key_frames) -> Node:
+    node = Node()
+    node.name = "Node" + str(index) if index else ""
+    node.parent_index = index - 1
+    node.position = create_floats(generator, 3)
+    node.rotation = create_floats(generator, 4)
+    node.scale = create_floats(generator, 3)
+    node.vertex_count = generator.choice((0, 5, 300))
+    node.vertex_properties = [create_vertex_property(generator, name, dimension, node.vertex_count)
+                              for name, dimension in (("position", 3), ("normal", 3), ("uv0", 2))]
+    for material in ("", "Wood", "Metal"):
+        mesh = Mesh()
+        mesh.material = material
+        mesh.indices = array.array("i", [generator.randrange(100000) for _ in range(generator.randrange(0, 60, 3))])
+        node.meshes.append(mesh)
+
+    animated_vertex_count = min(node.vertex_count, 7)
+    node.vertex_animations = [create_vertex_animation(generator, "Clip" + str(clip), animated_vertex_count,
+                                                      generator.randrange(4), use_frame_runs) for clip in range(2)]
+    node.node_animations = [create_node_animation(generator, "Clip" + str(clip), generator.randrange(1, 6), packed,
+                                                  use_frame_runs, use_key_frames) for clip in range(2)]
+    # Deduplicated clips store no frames and name the clip they share.
+    shared_vertex_animation = VertexAnimation("Shared", 30, animated_vertex_count)
+    shared_vertex_animation.shared_clip = "Clip0"
+    shared_node_animation = NodeAnimation("Shared", 30, packed)
+    shared_node_animation.shared_clip = "Clip0"
+    node.vertex_animations.append(shared_vertex_animation)
+    node.node_animations.append(shared_node_animation)
+    if animated_vertex_count:
+        node.vertex_animation_textures = [create_texture(generator, "offset", animated_vertex_count, (2, 3)),
+                                          create_texture(generator, "rotation", animated_vertex_count, (1,))]
+    return node
+
+
+def to_message(node) -> model_pb2.Node:
+    message = model_pb2.Node(parent=node.parent_index, name=node.name, vertexCount=node.vertex_count)
+    set_transform(message, node.position, node.rotation, node.scale, 0)
+    message.vertexProperties.extend(to_vertex_property_message(p) for p in node.vertex_properties)
+    for mesh in node.meshes:
+        message.meshes.add(indices=mesh.indices.tolist(), material=mesh.material)
+    for animation in node.vertex_animations:
+        animation_message = message.vertexAnimations.add(name=animation.name, framerate=animation.framerate,
+                                                         animatedVertexCount=animation.animated_vertex_count,
+                                                         frameRuns=animation.frame_runs.tolist(),
+                                                         sharedClip=animation.shared_clip)
+        for frame in animation.frames:
+            animation_message.frames.add().vertexProperties.extend(to_vertex_property_message(p) for p in frame)
+    for animation in node.node_animations:
+        animation_message = message.nodeAnimations.add(name=animation.name, framerate=animation.framerate,
+                                                       frameRuns=animation.frame_runs.tolist(),
+                                                       keyFrames=animation.key_frames.tolist(),
+                                                       sharedClip=animation.shared_clip)
+        if animation.packed:
+            animation_message.frameCount = animation.frame_count
+            if animation.frame_count:
+                animation_message.positions = animation.positions.tobytes()
+                animation_message.rotations = animation.rotations.tobytes()
+                animation_message.scales = animation.scales.tobytes()
+        else:
+            for frame_index in range(animation.frame_count):
+                set_transform(animation_message.frames.add(), animation.positions, animation.rotations,
+                              animation.scales, frame_index)
+    for texture in node.vertex_animation_textures:
+        texture_message = message.vertexAnimationTextures.add(name=texture.name, format=texture.format,
+                                                              width=texture.width, height=texture.height,
+                                                              data=texture.data)
+        for clip in texture.clips:
+            texture_message.clips.add(name=clip.name, framerate=clip.framerate, firstRow=clip.first_row,
+                                      frameCount=clip.frame_count)
+    return message
+
+
+def to_vertex_property_message(vertex_property) -> model_pb2.VertexProperty:
+    return model_pb2.VertexProperty(name=vertex_property.name, scalarType=vertex_property.scalar_type,
+                                    scalarTypeDimension=vertex_property.scalar_type_dimension,
+                                    data=bytes(vertex_property.data))
+
+
+def set_transform(message, positions, rotations, scales, index) -> None:
+    # The writer always emits the transform messages, even when all of their values are zero.
+    for field, values, dimension in (("position", positions, 3), ("rotation", rotations, 4), ("scale", scales, 3)):
+        transform = getattr(message, field)
+        transform.SetInParent()
+        for axis, value in zip("xyzw", values[index * dimension:(index + 1) * dimension]):
+            setattr(transform, axis, value)
+
+
+def create_model(seed, packed, use_frame_runs, use_key_frames) -> (list, model_pb2.Model):
+    generator = random.Random(seed)
+    nodes = [create_node(generator, index, packed, use_frame_runs, use_key_frames) for index in range(3)]
+    model = model_pb2.Model(version=2, name="Model")
+    model.nodes.extend(to_message(node) for node in nodes)
+    return nodes, model
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("packed", [False, True])
+@pytest.mark.parametrize("use_frame_runs", [False, True])
+@pytest.mark.parametrize("use_key_frames", [False, True])
+def test_writer_matches_serialize_to_string(seed, packed, use_frame_runs, use_key_frames):
+    nodes, model = create_model(seed, packed, use_frame_runs, use_key_frames)
+    serialized_model = model.SerializeToString()
+
+    assert model_writer.encode_model(nodes, model.name, model.version) == serialized_model
+    assert model_encoder.encode_model(model) == serialized_model
+    assert model_pb2.Model.FromString(serialized_model) == model
+
+
+def assert_sizes_match_messages(sizes, nodes, model) -> None:
+    for node, message in zip(nodes, model.nodes):
+        assert sizes[node] == message.ByteSize()
+        for records, messages in ((node.meshes, message.meshes),
+                                  (node.vertex_properties, message.vertexProperties),
+                                  (node.vertex_animations, message.vertexAnimations),
+                                  (node.node_animations, message.nodeAnimations),
+                                  (node.vertex_animation_textures, message.vertexAnimationTextures)):
+            assert [sizes[record] for record in records] == [record_message.ByteSize() for record_message in messages]
+
+
+@pytest.mark.parametrize("packed", [False, True])
+def test_writer_sizes_match_serialized_sizes(packed):
+    nodes, model = create_model(7, packed, True, True)
+    sizes = {}
+    assert model_writer.encode_model(nodes, model.name, model.version, sizes) == model.SerializeToString()
+    assert_sizes_match_messages(sizes, nodes, model)
+    for node, message in zip(nodes, model.nodes):
+        for vertex_property, property_message in zip(node.vertex_properties, message.vertexProperties):
+            assert model_writer.encode_vertex_property(vertex_property) == property_message.SerializeToString()
+        for animation, animation_message in zip(node.vertex_animations, message.vertexAnimations):
+            assert model_writer.encode_vertex_animation(animation) == animation_message.SerializeToString()
+        for animation, animation_message in zip(node.node_animations, message.nodeAnimations):
+            assert model_writer.encode_node_animation(animation) == animation_message.SerializeToString()
+        for texture, texture_message in zip(node.vertex_animation_textures, message.vertexAnimationTextures):
+            assert model_writer.encode_vertex_animation_texture(texture) == texture_message.SerializeToString()
+
+
+def test_container_writer_sizes_match_serialized_sizes():
+    nodes, model = create_model(8, True, True, True)
+    sizes = {}
+    timbermesh_container.ContainerWriter.write(nodes, io.BytesIO(), sizes=sizes)
+    assert_sizes_match_messages(sizes, nodes, model)
@@ -0,0 +1,93 @@
+import numpy
+import pytest
+import exporter_utils
+import synthetic_scenes
+import timbermesh_exporter
+import timbermesh_reader
+from hierarchy import Hierarchy
+from node_builder import NodeBuilder
+
+bpy = synthetic_scenes.bpy
+WHITE = (1.0, 1.0, 1.0, 1.0)
+RED = (1.0, 0.0, 0.0, 1.0)
+
+
+def create_quad_scene() -> bpy.types.Collection:
+    # Two triangles of a quad with different materials. The loop of vertex 2 in the second triangle has another
+    # color, so that vertex is split while vertex 0 is shared by both triangles.
+    bpy.reset()
+    materials = [bpy.types.Material("Wood"), bpy.types.Material("Metal")]
+    up = (0.0, 0.0, 1.0)
+    mesh = bpy.types.Mesh.from_geometry("Quad", [(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0)], [(0, 1, 2), (0, 2, 3)],
+                                        [up] * 6, [1, 0],
+                                        [("UVMap", [(0, 0), (1, 0), (1, 1), (0, 0), (1, 1), (0, 1)])],
+                                        [("Color", [WHITE, WHITE, WHITE, WHITE, RED, WHITE])])
+    collection = bpy.types.Collection("Quad")
+    bpy.data.collections.append(collection)
+    root = bpy.types.Object("#Root")
+    quad = bpy.types.Object("#Quad", mesh)
+    quad.material_slots = [bpy.types.MaterialSlot(material) for material in materials]
+    quad.set_parent(root)
+    collection.objects.extend((root, quad))
+    bpy.data.objects.extend(collection.objects)
+    bpy.context.scene.objects.extend(collection.objects)
+    bpy.context.selectable_objects = list(collection.objects)
+    return collection
+
+
+def export(collection, path, export_threads=0) -> list:
+    settings = timbermesh_exporter.ExportSettings(bpy.context, merge_meshes=False, single_animation=False,
+                                                  use_vertex_animations=False, export_threads=export_threads)
+    timbermesh_exporter.Exporter.export_collection(collection, path, settings)
+    return timbermesh_reader.ModelReader.read(path).nodes
+
+
+def test_vertices_are_shared_between_matching_corners(tmp_path):
+    nodes = export(create_quad_scene(), str(tmp_path / "Quad.timbermesh"))
+    node = next(node for node in nodes if node.name == "#Quad")
+
+    # Triangles are grouped by material and their corners are taken in reversed order, vertices are numbered by
+    # their first corner.
+    assert node.vertex_count == 5
+    assert [(mesh.material, list(mesh.indices)) for mesh in node.meshes] == [("Metal", [3, 4, 2]),
+                                                                              ("Wood", [0, 1, 2])]
+    numpy.testing.assert_array_equal(node.vertex_properties["color"], [WHITE, RED, WHITE, WHITE, WHITE])
+    numpy.testing.assert_array_equal(node.vertex_properties["position"],
+                                     [(0, 0, -1), (-1, 0, -1), (0, 0, 0), (-1, 0, -1), (-1, 0, 0)])
+
+
+def test_node_transforms_are_captured_with_the_meshes():
+    collection = create_quad_scene()
+    quad = next(obj for obj in collection.objects if obj.name == "#Quad")
+    quad.location = synthetic_scenes.mathutils.Vector((1.0, 2.0, 3.0))
+    root_hierarchy_node = Hierarchy.create(exporter_utils.get_exportable_objects(collection.all_objects),
+                                           collection.name, False)
+
+    # Moving the object after the last node is captured does not change the saved transform.
+    node_iterator = NodeBuilder.iterate_nodes(root_hierarchy_node, bpy.context)
+    assert list(iter(lambda: next(node_iterator), 1.0))
+    quad.location = synthetic_scenes.mathutils.Vector((4.0, 5.0, 6.0))
+    with pytest.raises(StopIteration) as stop:
+        next(node_iterator)
+
+    node = next(node for node in stop.value.value if node.name == "#Quad")
+    assert list(node.position) == [-1.0, 3.0, -2.0]
+    assert list(node.rotation) == [0.0, 0.0, 0.0, 1.0]
+    assert list(node.scale) == [1.0, 1.0, 1.0]
+
+
+@pytest.mark.parametrize("export_threads", [2, 4])
+def test_vertices_do_not_depend_on_the_thread_count(tmp_path, export_threads):
+    parameters = synthetic_scenes.SceneParameters(object_count=4, triangle_count=400, frame_count=0,
+                                                  material_count=3, uv_layer_count=2, use_colors=True)
+    collection = synthetic_scenes.create_scene(parameters)
+    sequential_nodes = export(collection, str(tmp_path / "Sequential.timbermesh"))
+    threaded_nodes = export(collection, str(tmp_path / "Threaded.timbermesh"), export_threads)
+
+    assert [node.name for node in threaded_nodes] == [node.name for node in sequential_nodes]
+    for threaded_node, sequential_node in zip(threaded_nodes, sequential_nodes):
+        assert [(mesh.material, list(mesh.indices)) for mesh in threaded_node.meshes] == \
+               [(mesh.material, list(mesh.indices)) for mesh in sequential_node.meshes]
+        assert threaded_node.vertex_properties.keys() == sequential_node.vertex_properties.keys()
+        for name, values in sequential_node.vertex_properties.items():
+            numpy.testing.assert_array_equal(threaded_node.vertex_properties[name], values)
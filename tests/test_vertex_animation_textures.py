@@ -0,0 +1,45 @@
+import numpy
+import synthetic_scenes
+import timbermesh_exporter
+import timbermesh_reader
+import vertex_animation_textures
+
+bpy = synthetic_scenes.bpy
+
+
+def create_mixed_scene() -> bpy.types.Collection:
+    # Objects without the "#" root prefix are merged into the root node: one with a vertex animation, one static.
+    parameters = synthetic_scenes.SceneParameters(object_count=2, triangle_count=60, frame_count=6,
+                                                  animation=synthetic_scenes.ANIMATION_VERTEX, material_count=1)
+    collection = synthetic_scenes.create_scene(parameters)
+    for obj in collection.objects:
+        if obj.name.startswith("#Object"):
+            obj.name = obj.name[1:]
+    next(obj for obj in collection.objects if obj.name == "Object1").animation_data = None
+    return collection
+
+
+def test_textures_of_node_merging_animated_and_static_objects(tmp_path):
+    collection = create_mixed_scene()
+    path = str(tmp_path / "Model.timbermesh")
+    settings = timbermesh_exporter.ExportSettings(bpy.context, merge_meshes=True, single_animation=True,
+                                                  use_vertex_animations=True, bake_vertex_animation_textures=True,
+                                                  vertex_animation_texture_format="RGBA32F",
+                                                  add_vertex_animation_texture_uvs=True)
+    timbermesh_exporter.Exporter.export_collection(collection, path, settings)
+
+    node = next(node for node in timbermesh_reader.ModelReader.read(path).nodes if node.vertex_animations)
+    animation = node.vertex_animations[0]
+    frame_vertex_count = animation.vertex_properties["offset"].shape[1]
+    assert frame_vertex_count > animation.animated_vertex_count
+
+    for texture in node.vertex_animation_textures:
+        assert texture.width == frame_vertex_count
+        frames = animation.vertex_properties[texture.name]
+        numpy.testing.assert_array_equal(texture.pixels[:, :, :frames.shape[2]], frames)
+
+    # Every stored vertex gets its own column, the other vertices none.
+    uvs = node.vertex_properties[vertex_animation_textures.UV_PROPERTY_NAME][:, 0]
+    columns = uvs[uvs >= 0] * frame_vertex_count - 0.5
+    assert len(columns) == frame_vertex_count
+    numpy.testing.assert_allclose(numpy.sort(columns), numpy.arange(frame_vertex_count), atol=1e-3)
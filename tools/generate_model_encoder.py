@@ -0,0 +1,210 @@
+# Generates src/timbermesh_blender_plugin/model_encoder.py: a serializer specialized for the messages in
+# proto/model.proto that emits the same bytes as SerializeToString() through straight-line code.
+# Run after regenerating model_pb2.py: python tools/generate_model_encoder.py [--check]
+import argparse
+import re
+import sys
+from os.path import abspath, dirname, join
+
+PLUGIN_DIRECTORY = join(dirname(dirname(abspath(__file__))), "src", "timbermesh_blender_plugin")
+OUTPUT_PATH = join(PLUGIN_DIRECTORY, "model_encoder.py")
+
+sys.path.insert(0, PLUGIN_DIRECTORY)
+import model_pb2
+from google.protobuf.descriptor import FieldDescriptor
+
+WIRE_TYPE_VARINT = 0
+WIRE_TYPE_FIXED64 = 1
+WIRE_TYPE_LENGTH_DELIMITED = 2
+WIRE_TYPE_FIXED32 = 5
+
+VARINT_TYPES = {FieldDescriptor.TYPE_INT32, FieldDescriptor.TYPE_INT64, FieldDescriptor.TYPE_UINT32,
+                FieldDescriptor.TYPE_UINT64, FieldDescriptor.TYPE_ENUM, FieldDescriptor.TYPE_BOOL}
+FIXED_TYPES = {FieldDescriptor.TYPE_FLOAT: ("_pack_float", "f", 4, WIRE_TYPE_FIXED32),
+               FieldDescriptor.TYPE_DOUBLE: ("_pack_double", "d", 8, WIRE_TYPE_FIXED64)}
+
+PRELUDE = '''# Generated by tools/generate_model_encoder.py from proto/model.proto.  DO NOT EDIT!
+import struct
+from google.protobuf.internal import encoder
+
+_pack_float = struct.Struct("<f").pack
+_pack_double = struct.Struct("<d").pack
+_packed_varint_bytes = encoder._PackedVarintBytes
+_SMALL_VARINTS = [bytes((value,)) for value in range(0x80)]
+
+
+def _varint(value) -> bytes:
+    if value < 0x80:
+        return _SMALL_VARINTS[value]
+    encoded = bytearray()
+    while value > 0x7f:
+        encoded.append((value & 0x7f) | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def _signed_varint(value) -> bytes:
+    if value < 0:
+        value += 1 << 64
+    return _varint(value)
+'''
+
+
+def get_function_name(message_descriptor) -> str:
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", message_descriptor.name).lower()
+
+
+def get_tag(field, wire_type) -> bytes:
+    tag = (field.number << 3) | wire_type
+    encoded = bytearray()
+    while tag > 0x7f:
+        encoded.append((tag & 0x7f) | 0x80)
+        tag >>= 7
+    encoded.append(tag)
+    return bytes(encoded)
+
+
+def format_bytes(value) -> str:
+    return "b\"" + "".join("\\x%02x" % byte for byte in value) + "\""
+
+
+def generate_field(field, lines) -> None:
+    name = field.name
+    is_repeated = field.label == FieldDescriptor.LABEL_REPEATED
+    if field.containing_oneof is not None:
+        raise NotImplementedError("oneof fields are not supported: " + field.full_name)
+
+    if field.type == FieldDescriptor.TYPE_MESSAGE:
+        tag = get_tag(field, WIRE_TYPE_LENGTH_DELIMITED)
+        write_function = "_write_" + get_function_name(field.message_type)
+        if is_repeated:
+            lines.append("    for element in message.%s:" % name)
+            indent = "        "
+            element = "element"
+        else:
+            lines.append("    if message.HasField(\"%s\"):" % name)
+            indent = "        "
+            element = "message." + name
+        lines.append(indent + "index = len(parts)")
+        lines.append(indent + "parts.append(None)")
+        lines.append(indent + "element_size = %s(%s, parts)" % (write_function, element))
+        lines.append(indent + "header = %s + _varint(element_size)" % format_bytes(tag))
+        lines.append(indent + "parts[index] = header")
+        lines.append(indent + "size += len(header) + element_size")
+
+    elif field.type in (FieldDescriptor.TYPE_STRING, FieldDescriptor.TYPE_BYTES):
+        tag = get_tag(field, WIRE_TYPE_LENGTH_DELIMITED)
+        encode = ".encode(\"utf-8\")" if field.type == FieldDescriptor.TYPE_STRING else ""
+        if is_repeated:
+            lines.append("    for element in message.%s:" % name)
+            lines.append("        encoded = element%s" % encode)
+        else:
+            lines.append("    value = message.%s" % name)
+            lines.append("    if value:")
+            lines.append("        encoded = value%s" % encode)
+        lines.append("        header = %s + _varint(len(encoded))" % format_bytes(tag))
+        lines.append("        parts.append(header)")
+        lines.append("        parts.append(encoded)")
+        lines.append("        size += len(header) + len(encoded)")
+
+    elif field.type in VARINT_TYPES:
+        if is_repeated:
+            tag = get_tag(field, WIRE_TYPE_LENGTH_DELIMITED)
+            lines.append("    values = message.%s" % name)
+            lines.append("    if values:")
+            lines.append("        encoded = _packed_varint_bytes(values)")
+            lines.append("        header = %s + _varint(len(encoded))" % format_bytes(tag))
+            lines.append("        parts.append(header)")
+            lines.append("        parts.append(encoded)")
+            lines.append("        size += len(header) + len(encoded)")
+        else:
+            tag = get_tag(field, WIRE_TYPE_VARINT)
+            signed = field.type in (FieldDescriptor.TYPE_INT32, FieldDescriptor.TYPE_INT64,
+                                    FieldDescriptor.TYPE_ENUM)
+            lines.append("    value = message.%s" % name)
+            lines.append("    if value:")
+            lines.append("        encoded = %s + %s(value)" % (format_bytes(tag),
+                                                                 "_signed_varint" if signed else "_varint"))
+            lines.append("        parts.append(encoded)")
+            lines.append("        size += len(encoded)")
+
+    elif field.type in FIXED_TYPES:
+        pack_function, struct_format, value_size, wire_type = FIXED_TYPES[field.type]
+        if is_repeated:
+            tag = get_tag(field, WIRE_TYPE_LENGTH_DELIMITED)
+            lines.append("    values = message.%s" % name)
+            lines.append("    if values:")
+            lines.append("        encoded = struct.pack(\"<%%d%s\" %% len(values), *values)" % struct_format)
+            lines.append("        header = %s + _varint(len(encoded))" % format_bytes(tag))
+            lines.append("        parts.append(header)")
+            lines.append("        parts.append(encoded)")
+            lines.append("        size += len(header) + len(encoded)")
+        else:
+            tag = get_tag(field, wire_type)
+            lines.append("    value = message.%s" % name)
+            lines.append("    if value:")
+            lines.append("        parts.append(%s + %s(value))" % (format_bytes(tag), pack_function))
+            lines.append("        size += %d" % (len(tag) + value_size))
+
+    else:
+        raise NotImplementedError("Unsupported field type %d: %s" % (field.type, field.full_name))
+
+
+def generate_message(message_descriptor, lines) -> None:
+    function_name = get_function_name(message_descriptor)
+    lines.append("")
+    lines.append("")
+    lines.append("def encode_%s(message) -> bytes:" % function_name)
+    lines.append("    parts = []")
+    lines.append("    _write_%s(message, parts)" % function_name)
+    lines.append("    return b\"\".join(parts)")
+    lines.append("")
+    lines.append("")
+    lines.append("def _write_%s(message, parts) -> int:" % function_name)
+    lines.append("    size = 0")
+    for field in sorted(message_descriptor.fields, key=lambda f: f.number):
+        generate_field(field, lines)
+    lines.append("    return size")
+
+
+def generate(file_descriptor) -> str:
+    if file_descriptor.syntax != "proto3":
+        raise NotImplementedError("Only proto3 schemas are supported")
+
+    lines = [PRELUDE.rstrip("\n")]
+    for message_descriptor in file_descriptor.message_types_by_name.values():
+        generate_message(message_descriptor, lines)
+
+    lines.append("")
+    lines.append("")
+    lines.append("ENCODERS = {")
+    for message_descriptor in file_descriptor.message_types_by_name.values():
+        lines.append("    \"%s\": encode_%s," % (message_descriptor.full_name, get_function_name(message_descriptor)))
+    lines.append("}")
+    lines.append("")
+    lines.append("")
+    lines.append("def encode(message) -> bytes:")
+    lines.append("    return ENCODERS[message.DESCRIPTOR.full_name](message)")
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the Timbermesh model encoder")
+    parser.add_argument("--check", action="store_true", help="fail if the generated file is out of date")
+    arguments = parser.parse_args()
+
+    source = generate(model_pb2.DESCRIPTOR)
+    if arguments.check:
+        with open(OUTPUT_PATH, encoding="utf-8") as file:
+            if file.read() != source:
+                print(OUTPUT_PATH, "is out of date, run tools/generate_model_encoder.py")
+                sys.exit(1)
+        return
+
+    with open(OUTPUT_PATH, "w", encoding="utf-8", newline="\n") as file:
+        file.write(source)
+
+
+if __name__ == "__main__":
+    main()